@@ -0,0 +1,182 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Benchmark YAIXM processing stages on synthetic data of various sizes
+#
+#   $ python benchmark/bench.py --sizes 1000 10000 -o results.json
+#   $ python benchmark/bench.py --sizes 1000 10000 --baseline results.json
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import yaixm
+from yaixm.build import service_frequencies
+from yaixm.tests.synthetic import generate
+
+# Benchmark stages. Each is a function of the synthetic data (and the
+# YAML/JSON text) returning a function to be timed
+def stage_load_yaml(data, text):
+    return lambda: yaixm.load(text['yaml'])
+
+def stage_load_json(data, text):
+    return lambda: yaixm.load(text['json'], json=True)
+
+def stage_validate(data, text):
+    return lambda: yaixm.validate(data)
+
+def stage_merge_loa(data, text):
+    return lambda: yaixm.merge_loa(data['airspace'], data['loa'])
+
+def stage_merge_service(data, text):
+    service = service_frequencies(data.get('service', []))
+    return lambda: yaixm.merge_service(data['airspace'], service)
+
+def stage_filter(data, text):
+    airfilter = yaixm.make_filter(noatz=False, microlight=False, hgl=False,
+                                  gliding_site=False, north=55, south=51,
+                                  max_level=6600)
+    pairs = [(v, f) for f in data['airspace'] for v in f['geometry']]
+    return lambda: [airfilter(v, f) for v, f in pairs]
+
+def stage_openair(data, text):
+    converter = yaixm.Openair()
+    return lambda: converter.convert(data['airspace'], data['obstacle'])
+
+def stage_tnp(data, text):
+    converter = yaixm.Tnp()
+    return lambda: converter.convert(data['airspace'], data['obstacle'])
+
+def stage_geojson(data, text):
+    from yaixm.geojson import geojson
+    return lambda: geojson(data['airspace'])
+
+STAGES = {
+    'load_yaml': stage_load_yaml,
+    'load_json': stage_load_json,
+    'validate': stage_validate,
+    'merge_loa': stage_merge_loa,
+    'merge_service': stage_merge_service,
+    'filter': stage_filter,
+    'openair': stage_openair,
+    'tnp': stage_tnp,
+    'geojson': stage_geojson
+}
+
+# Best of repeat timings
+def timeit(func, repeat):
+    best = None
+    for n in range(repeat):
+        tstart = time.perf_counter()
+        func()
+        t = time.perf_counter() - tstart
+        best = t if best is None else min(best, t)
+
+    return best
+
+def run(sizes, stages, repeat, seed):
+    import yaml
+    try:
+        from yaml import CDumper as Dumper
+    except ImportError:
+        from yaml import Dumper
+
+    results = {}
+    for size in sizes:
+        data = generate(size, seed=seed)
+        text = {
+            'yaml': yaml.dump(data, Dumper=Dumper),
+            'json': json.dumps(data)
+        }
+
+        results[str(size)] = {}
+        for name in stages:
+            try:
+                func = STAGES[name](data, text)
+            except ImportError as e:
+                print("Skipping %s: %s" % (name, e), file=sys.stderr)
+                continue
+
+            secs = timeit(func, repeat)
+            results[str(size)][name] = secs
+            print("%8d %-14s %9.4fs" % (size, name, secs), file=sys.stderr)
+
+    return results
+
+# Print comparison with baseline, returning list of regressions
+def compare(results, baseline, threshold):
+    regressions = []
+    for size, stages in results.items():
+        for name, secs in stages.items():
+            base = baseline.get(size, {}).get(name)
+            if not base:
+                continue
+
+            ratio = secs / base
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressions.append((size, name, ratio))
+
+            print("%8s %-14s %9.4fs %9.4fs %6.2fx%s" %
+                  (size, name, base, secs, ratio, flag))
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="Number of airspace volumes")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES),
+                        choices=list(STAGES), help="Stages to benchmark")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="Number of repeats, best time is reported")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Synthetic data random seed")
+    parser.add_argument("-o", "--output", type=argparse.FileType("w"),
+                        help="JSON results file")
+    parser.add_argument("-b", "--baseline", type=argparse.FileType("r"),
+                        help="JSON baseline results file for comparison")
+    parser.add_argument("-t", "--threshold", type=float, default=1.2,
+                        help="Regression threshold ratio")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.stages, args.repeat, args.seed)
+
+    if args.output:
+        json.dump({
+            'meta': {
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'seed': args.seed,
+                'repeat': args.repeat
+            },
+            'results': results
+        }, args.output, indent=4)
+
+    if args.baseline:
+        baseline = json.load(args.baseline)['results']
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Measure command line startup time, i.e. interpreter start plus import
+# of yaixm.cli, and list the heavy modules loaded at startup
+#
+#   $ python benchmark/import_time.py [-n RUNS] [-o results.json]
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules which shouldn't be loaded until needed
+HEAVY_MODULES = ["yaml", "jsonschema", "pkg_resources", "pygeodesy"]
+
+def run_time(code, runs):
+    times = []
+    for n in range(runs):
+        tstart = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        times.append(time.perf_counter() - tstart)
+
+    return statistics.median(times)
+
+# Cumulative import time (in microseconds) reported by -X importtime
+def import_time(module):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             "import " + module],
+                            check=True, stderr=subprocess.PIPE, text=True)
+    for line in result.stderr.splitlines():
+        fields = [f.strip() for f in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+
+    return None
+
+def loaded_modules(module):
+    code = "import sys, %s; print(' '.join(sys.modules))" % module
+    result = subprocess.run([sys.executable, "-c", code], check=True,
+                            stdout=subprocess.PIPE, text=True)
+    return result.stdout.split()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--runs", type=int, default=20,
+                        help="Number of runs (median is reported)")
+    parser.add_argument("-o", "--output", type=argparse.FileType("w"),
+                        default=sys.stdout, help="JSON results file")
+    args = parser.parse_args()
+
+    baseline = run_time("pass", args.runs)
+    startup = run_time("import yaixm.cli", args.runs)
+    modules = loaded_modules("yaixm.cli")
+
+    results = {
+        'python': sys.version.split()[0],
+        'interpreter_ms': round(baseline * 1000, 2),
+        'cli_startup_ms': round(startup * 1000, 2),
+        'cli_import_ms': round((startup - baseline) * 1000, 2),
+        'cli_importtime_us': import_time("yaixm.cli"),
+        'heavy_modules_loaded': [m for m in HEAVY_MODULES if m in modules]
+    }
+
+    json.dump(results, args.output, indent=4)
+    args.output.write("\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Measure memory held by loaded data, with and without compact loading.
+# Each measurement is made in a fresh process
+#
+#   $ python benchmark/memory.py airspace.yaml
+#   $ python benchmark/memory.py --size 10000
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# Run in subprocess: load the file and report memory retained by the
+# data. Resident set size (Linux only) is measured without tracemalloc
+MEASURE = """
+import gc, json, os, sys, tracemalloc
+sys.path.insert(0, %(path)r)
+import yaixm
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return None
+
+data = open(%(file)r, "rb").read()
+yaixm.load(b"release: {}")
+
+if %(trace)r:
+    tracemalloc.start()
+
+rss_start = rss_kb()
+yaixm_data = yaixm.load(data, compact=%(compact)r)
+del data
+gc.collect()
+
+if %(trace)r:
+    print(json.dumps({'traced_bytes': tracemalloc.get_traced_memory()[0]}))
+else:
+    rss = rss_kb()
+    print(json.dumps({'rss_kb': rss - rss_start if rss else None}))
+"""
+
+def measure(filename, compact, trace):
+    code = MEASURE % {'path': os.path.join(os.path.dirname(__file__), ".."),
+                      'file': filename, 'compact': compact, 'trace': trace}
+    result = subprocess.run([sys.executable, "-c", code], check=True,
+                            stdout=subprocess.PIPE, text=True)
+    return json.loads(result.stdout)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("airspace_file", nargs="?",
+                        help="YAML airspace file (default synthetic data)")
+    parser.add_argument("--size", type=int, default=10000,
+                        help="Number of synthetic airspace volumes")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Synthetic data random seed")
+    args = parser.parse_args()
+
+    tmp = None
+    filename = args.airspace_file
+    if filename is None:
+        import yaml
+        from yaixm.tests.synthetic import generate
+
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False)
+        yaml.dump(generate(args.size, seed=args.seed), tmp)
+        tmp.close()
+        filename = tmp.name
+
+    try:
+        results = {}
+        for mode in ["default", "compact"]:
+            results[mode] = measure(filename, mode == "compact", True)
+            results[mode].update(measure(filename, mode == "compact", False))
+    finally:
+        if tmp:
+            os.unlink(tmp.name)
+
+    for mode, result in results.items():
+        print("%-8s %12d bytes traced %10s kB RSS increase" %
+              (mode, result['traced_bytes'], result['rss_kb']))
+
+    ratio = results['compact']['traced_bytes'] / \
+            results['default']['traced_bytes']
+    print("compact/default %.2f" % ratio)
+
+if __name__ == "__main__":
+    main()
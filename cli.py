@@ -19,6 +19,32 @@ elif script_name == "merge":
     yaixm.cli.merge()
 elif script_name == "geojson":
     yaixm.cli.geojson()
+elif script_name == "server":
+    yaixm.cli.server()
+elif script_name == "build":
+    yaixm.cli.build()
+elif script_name == "watch":
+    yaixm.cli.watch()
+elif script_name == "compile":
+    yaixm.cli.compile_binary()
+elif script_name == "route":
+    yaixm.cli.route()
+elif script_name == "measure":
+    yaixm.cli.measure()
+elif script_name == "qa":
+    yaixm.cli.qa()
+elif script_name == "split":
+    yaixm.cli.split()
+elif script_name == "gpkg":
+    yaixm.cli.gpkg()
+elif script_name == "columnar":
+    yaixm.cli.columnar()
+elif script_name == "roundtrip":
+    yaixm.cli.roundtrip()
+elif script_name == "diff":
+    yaixm.cli.diff()
+elif script_name == "patch":
+    yaixm.cli.patch()
 else:
     print("Unrecognised script: " + script_name, file=sys.stderr)
 
@@ -30,7 +30,20 @@ setup(
             "yaixm_tnp = yaixm.cli:tnp",
             "yaixm_json = yaixm.cli:to_json",
             "yaixm_merge = yaixm.cli:merge",
-            "yaixm_geojson = yaixm.cli:geojson"
+            "yaixm_geojson = yaixm.cli:geojson",
+            "yaixm_server = yaixm.cli:server",
+            "yaixm_build = yaixm.cli:build",
+            "yaixm_watch = yaixm.cli:watch",
+            "yaixm_compile = yaixm.cli:compile_binary",
+            "yaixm_route = yaixm.cli:route",
+            "yaixm_measure = yaixm.cli:measure",
+            "yaixm_qa = yaixm.cli:qa",
+            "yaixm_split = yaixm.cli:split",
+            "yaixm_gpkg = yaixm.cli:gpkg",
+            "yaixm_columnar = yaixm.cli:columnar",
+            "yaixm_roundtrip = yaixm.cli:roundtrip",
+            "yaixm_diff = yaixm.cli:diff",
+            "yaixm_patch = yaixm.cli:patch"
         ]
     }
 )
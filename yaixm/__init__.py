@@ -17,5 +17,6 @@
 
 from .helpers import load, validate, ordered_map_representer, merge_loa
 from .helpers import parse_latlon, parse_deg, dms, merge_service
+from .helpers import dump, iter_dump
 from .convert import Openair, Tnp, make_filter, make_openair_type, \
                      make_tnp_class, make_tnp_type, seq_name, noseq_name
@@ -0,0 +1,161 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import json
+
+from .convert import Openair, Tnp
+
+# Generate OpenAir/TNP text from converter blocks. Joined chunks are
+# identical to Converter.convert() output
+def converter_text(converter, airspace, obstacles=None):
+    first = True
+    for block in converter.blocks(airspace, obstacles):
+        if block:
+            text = "\n".join(block)
+            yield text if first else "\n" + text
+            first = False
+
+# Generate GeoJSON text. Joined chunks are identical to
+# json.dumps(geojson(...), sort_keys=True, indent=4)
+def geojson_text(airspace, resolution=15):
+    from .geojson import iter_features
+
+    yield '{\n    "features": ['
+    sep = "\n"
+    for feature in iter_features(airspace, resolution):
+        text = json.dumps(feature, sort_keys=True, indent=4)
+        yield sep + "        " + text.replace("\n", "\n        ")
+        sep = ",\n"
+
+    yield ("\n    ]" if sep == ",\n" else "]") + \
+          ',\n    "name": "UKAIR",\n    "type": "FeatureCollection"\n}'
+
+# Shared conversion, fed with chunks from the worker thread and followed
+# by any number of consumers in the event loop
+class _Job():
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.event = asyncio.Event()
+
+    def feed(self, chunk):
+        self.chunks.append(chunk)
+        self.notify()
+
+    def finish(self, error=None):
+        self.done = True
+        self.error = error
+        self.notify()
+
+    def notify(self):
+        self.event.set()
+        self.event = asyncio.Event()
+
+    async def follow(self):
+        n = 0
+        while True:
+            while n < len(self.chunks):
+                yield self.chunks[n]
+                n += 1
+
+            if self.done:
+                if self.error:
+                    raise self.error
+                return
+
+            await self.event.wait()
+
+# Asynchronous conversions. CPU work runs in the executor (default is the
+# event loop's default executor) and concurrent requests with the same key
+# share a single conversion. The executor must be thread based since the
+# worker feeds its output back to the event loop as it is generated.
+class AsyncConverter():
+    def __init__(self, executor=None, chunk_size=65536):
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.jobs = {}
+
+    # Run generator function in executor, buffering output into chunks
+    def _produce(self, loop, job, gen_func, args):
+        buf = []
+        size = 0
+        for text in gen_func(*args):
+            buf.append(text)
+            size += len(text)
+            if size >= self.chunk_size:
+                loop.call_soon_threadsafe(job.feed, "".join(buf))
+                buf = []
+                size = 0
+
+        if buf:
+            loop.call_soon_threadsafe(job.feed, "".join(buf))
+
+    async def _run(self, key, job, gen_func, args):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self._produce,
+                                       loop, job, gen_func, args)
+        except Exception as e:
+            job.finish(e)
+        else:
+            job.finish()
+        finally:
+            del self.jobs[key]
+
+    # Stream chunks of output from generator function, joining any
+    # in-progress conversion with the same key
+    def stream(self, key, gen_func, *args):
+        job = self.jobs.get(key)
+        if job is None:
+            job = _Job()
+            self.jobs[key] = job
+            asyncio.ensure_future(self._run(key, job, gen_func, args))
+
+        return job.follow()
+
+    async def join(self, stream):
+        return "".join([chunk async for chunk in stream])
+
+    def stream_openair(self, airspace, obstacles=None, key=None, **kwargs):
+        key = ("openair", id(airspace), id(obstacles),
+               key or tuple(sorted(kwargs.items())))
+        return self.stream(key, converter_text, Openair(**kwargs),
+                           airspace, obstacles)
+
+    def stream_tnp(self, airspace, obstacles=None, key=None, **kwargs):
+        key = ("tnp", id(airspace), id(obstacles),
+               key or tuple(sorted(kwargs.items())))
+        return self.stream(key, converter_text, Tnp(**kwargs),
+                           airspace, obstacles)
+
+    def stream_geojson(self, airspace, resolution=15):
+        key = ("geojson", id(airspace), resolution)
+        return self.stream(key, geojson_text, airspace, resolution)
+
+    async def openair(self, airspace, obstacles=None, key=None, **kwargs):
+        return await self.join(
+            self.stream_openair(airspace, obstacles, key, **kwargs))
+
+    async def tnp(self, airspace, obstacles=None, key=None, **kwargs):
+        return await self.join(
+            self.stream_tnp(airspace, obstacles, key, **kwargs))
+
+    # Returns GeoJSON text, not the collection dictionary
+    async def geojson(self, airspace, resolution=15):
+        return await self.join(self.stream_geojson(airspace, resolution))
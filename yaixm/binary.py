@@ -0,0 +1,468 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compiled binary YAIXM format, read through a memory map.
+#
+# The file is a header followed by 8-byte aligned, little-endian,
+# fixed-width column arrays:
+#
+#   strings      - string table offsets (uint32) and UTF-8 data
+#   feature_*    - one entry per feature (string indices, frequency)
+#   volume_*     - one entry per volume (string indices, frequency,
+#                  normalised levels)
+#   segment_*    - one entry per boundary segment (kind, direction,
+#                  centre/to point indices, radius)
+#   point_*      - one entry per point (lat/lon string index, lat, lon)
+#   obstacle_*   - one entry per obstacle
+#
+# Feature -> volume, volume -> segment and segment -> point relations are
+# given by start offset arrays with one extra final entry. Missing values
+# are NONE (string/point indices) or NaN (frequency).
+#
+# The reader exposes the arrays as memoryviews on the mapped file, so
+# worker processes share a single page cache copy, and provides feature
+# and volume views which can be used in place of the loaded YAML data,
+# e.g. BinaryAirspace(path).airspace can be passed to Openair().convert()
+
+from collections.abc import Mapping, Sequence
+import json
+import math
+import mmap
+import struct
+import sys
+
+from .helpers import parse_latlon, level
+
+MAGIC = b"YAIXMBIN"
+VERSION = 1
+
+# Header and section table entry
+HEADER = struct.Struct("<8sII")
+SECTION = struct.Struct("<24sQQ4s4x")
+
+NONE = 0xffffffff
+
+SEGMENT_KINDS = ["line", "arc", "circle"]
+ARC_DIRS = ["cw", "ccw"]
+
+# Optional feature/volume string properties
+FEATURE_STRINGS = ["name", "type", "localtype", "class", "id",
+                   "controltype"]
+VOLUME_STRINGS = ["id", "name", "lower", "upper", "class", "seqno"]
+LIST_PROPS = ["rules", "notes"]
+OBSTACLE_STRINGS = ["id", "name", "type", "elevation"]
+
+# List separator, for rules and notes
+LIST_SEP = "\x1f"
+
+# Column typecodes
+COLUMNS = {}
+for name in FEATURE_STRINGS + LIST_PROPS:
+    COLUMNS['feature_' + name] = "I"
+for name in VOLUME_STRINGS + LIST_PROPS:
+    COLUMNS['volume_' + name] = "I"
+for name in OBSTACLE_STRINGS:
+    COLUMNS['obstacle_' + name] = "I"
+COLUMNS.update({
+    'string_offset': "I",
+    'string_data': "B",
+    'feature_frequency': "d",
+    'feature_volume_start': "I",
+    'volume_frequency': "d",
+    'volume_lower_ft': "i",
+    'volume_upper_ft': "i",
+    'volume_segment_start': "I",
+    'segment_kind': "B",
+    'segment_dir': "B",
+    'segment_centre': "I",
+    'segment_to': "I",
+    'segment_radius': "I",
+    'segment_point_start': "I",
+    'point_latlon': "I",
+    'point_lat': "d",
+    'point_lon': "d",
+    'obstacle_position': "I",
+    'release': "B"
+})
+
+#----------------------------------------------------------------------
+# Writer
+
+class _Builder():
+    def __init__(self):
+        self.strings = {}
+        self.points = {}
+        self.columns = {name: [] for name in COLUMNS}
+
+    def string(self, value):
+        if value is None:
+            return NONE
+
+        value = str(value)
+        n = self.strings.get(value)
+        if n is None:
+            n = len(self.strings)
+            self.strings[value] = n
+        return n
+
+    def point(self, latlon):
+        n = self.points.get(latlon)
+        if n is None:
+            n = len(self.points)
+            self.points[latlon] = n
+            lat, lon = parse_latlon(latlon)
+            self.columns['point_latlon'].append(self.string(latlon))
+            self.columns['point_lat'].append(lat)
+            self.columns['point_lon'].append(lon)
+        return n
+
+    def strlist(self, values):
+        return NONE if values is None else self.string(LIST_SEP.join(values))
+
+    def segment(self, segment):
+        cols = self.columns
+        kind = list(segment.keys())[0]
+        data = segment[kind]
+
+        cols['segment_kind'].append(SEGMENT_KINDS.index(kind))
+        cols['segment_point_start'].append(len(cols['point_line']))
+        if kind == "line":
+            cols['segment_dir'].append(0)
+            cols['segment_centre'].append(NONE)
+            cols['segment_to'].append(NONE)
+            cols['segment_radius'].append(NONE)
+            cols['point_line'].extend(self.point(p) for p in data)
+        else:
+            cols['segment_dir'].append(ARC_DIRS.index(data.get('dir', "cw")))
+            cols['segment_centre'].append(self.point(data['centre']))
+            cols['segment_to'].append(self.point(data['to'])
+                                      if 'to' in data else NONE)
+            cols['segment_radius'].append(self.string(data['radius']))
+
+    def volume(self, volume):
+        cols = self.columns
+        for name in VOLUME_STRINGS:
+            cols['volume_' + name].append(self.string(volume.get(name)))
+        for name in LIST_PROPS:
+            cols['volume_' + name].append(self.strlist(volume.get(name)))
+
+        cols['volume_frequency'].append(volume.get('frequency', math.nan))
+        cols['volume_lower_ft'].append(level(volume['lower']))
+        cols['volume_upper_ft'].append(level(volume['upper']))
+        cols['volume_segment_start'].append(len(cols['segment_kind']))
+
+        for segment in volume['boundary']:
+            self.segment(segment)
+
+    def feature(self, feature):
+        cols = self.columns
+        for name in FEATURE_STRINGS:
+            cols['feature_' + name].append(self.string(feature.get(name)))
+        for name in LIST_PROPS:
+            cols['feature_' + name].append(self.strlist(feature.get(name)))
+
+        cols['feature_frequency'].append(feature.get('frequency', math.nan))
+        cols['feature_volume_start'].append(len(cols['volume_lower']))
+
+        for volume in feature['geometry']:
+            self.volume(volume)
+
+    def obstacle(self, obstacle):
+        cols = self.columns
+        for name in OBSTACLE_STRINGS:
+            cols['obstacle_' + name].append(self.string(obstacle.get(name)))
+        cols['obstacle_position'].append(self.point(obstacle['position']))
+
+# Compile YAIXM data (airspace, obstacles and release header) to binary
+# file object
+def compile_binary(yaixm, fileobj):
+    builder = _Builder()
+    cols = builder.columns
+
+    # Point indices for line segments (not in COLUMNS, only used in build)
+    cols['point_line'] = []
+
+    for feature in yaixm.get('airspace', []):
+        builder.feature(feature)
+    for obstacle in yaixm.get('obstacle', []):
+        builder.obstacle(obstacle)
+
+    # Final entries for start offset arrays
+    cols['feature_volume_start'].append(len(cols['volume_lower']))
+    cols['volume_segment_start'].append(len(cols['segment_kind']))
+    cols['segment_point_start'].append(len(cols['point_line']))
+
+    # String table
+    offset = 0
+    data = []
+    for s in builder.strings:
+        cols['string_offset'].append(offset)
+        b = s.encode("utf-8")
+        data.append(b)
+        offset += len(b)
+    cols['string_offset'].append(offset)
+    cols['string_data'] = b"".join(data)
+
+    cols['release'] = json.dumps(yaixm.get('release')).encode("utf-8")
+
+    # Line point indices are stored as an extra column
+    columns = dict(COLUMNS, segment_points="I")
+    cols['segment_points'] = cols.pop('point_line')
+
+    # Serialise columns
+    blobs = []
+    for name, typecode in columns.items():
+        values = cols[name]
+        if isinstance(values, bytes):
+            blob = values
+        else:
+            blob = struct.pack("<%d%s" % (len(values), typecode), *values)
+        blobs.append((name, typecode, blob))
+
+    offset = HEADER.size + SECTION.size * len(blobs)
+    table = []
+    for name, typecode, blob in blobs:
+        offset += -offset % 8
+        table.append(SECTION.pack(name.encode("ascii"), offset, len(blob),
+                                  typecode.encode("ascii")))
+        offset += len(blob)
+
+    fileobj.write(HEADER.pack(MAGIC, VERSION, len(blobs)))
+    fileobj.write(b"".join(table))
+    pos = HEADER.size + SECTION.size * len(blobs)
+    for name, typecode, blob in blobs:
+        pad = -pos % 8
+        fileobj.write(b"\0" * pad)
+        fileobj.write(blob)
+        pos += pad + len(blob)
+
+#----------------------------------------------------------------------
+# Reader
+
+class VolumeView(Mapping):
+    __slots__ = ["_reader", "_n"]
+
+    def __init__(self, reader, n):
+        self._reader = reader
+        self._n = n
+
+    def __getitem__(self, key):
+        value = self._reader._volume_value(self._n, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return (k for k in self._reader.VOLUME_KEYS
+                if self._reader._volume_value(self._n, k) is not None)
+
+    def __len__(self):
+        return sum(1 for k in self)
+
+    def __eq__(self, other):
+        if isinstance(other, VolumeView):
+            return self._reader is other._reader and self._n == other._n
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self):
+        return hash((id(self._reader), self._n))
+
+class VolumeList(Sequence):
+    __slots__ = ["_reader", "_start", "_stop"]
+
+    def __init__(self, reader, start, stop):
+        self._reader = reader
+        self._start = start
+        self._stop = stop
+
+    def __getitem__(self, n):
+        if isinstance(n, slice):
+            return [self[i] for i in range(*n.indices(len(self)))]
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError(n)
+        return VolumeView(self._reader, self._start + n)
+
+    def __len__(self):
+        return self._stop - self._start
+
+class FeatureView(Mapping):
+    __slots__ = ["_reader", "_n"]
+
+    def __init__(self, reader, n):
+        self._reader = reader
+        self._n = n
+
+    def __getitem__(self, key):
+        value = self._reader._feature_value(self._n, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return (k for k in self._reader.FEATURE_KEYS
+                if self._reader._feature_value(self._n, k) is not None)
+
+    def __len__(self):
+        return sum(1 for k in self)
+
+class FeatureList(Sequence):
+    __slots__ = ["_reader"]
+
+    def __init__(self, reader):
+        self._reader = reader
+
+    def __getitem__(self, n):
+        if isinstance(n, slice):
+            return [self[i] for i in range(*n.indices(len(self)))]
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError(n)
+        return FeatureView(self._reader, n)
+
+    def __len__(self):
+        return self._reader.nfeatures
+
+# Memory mapped binary YAIXM file
+class BinaryAirspace():
+    FEATURE_KEYS = FEATURE_STRINGS + LIST_PROPS + ["frequency", "geometry"]
+    VOLUME_KEYS = VOLUME_STRINGS + LIST_PROPS + ["frequency", "boundary"]
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._buf = memoryview(self._mmap)
+        magic, version, nsections = HEADER.unpack_from(self._buf)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Not a YAIXM binary file (version %d)" % VERSION)
+
+        # Column arrays, as views on the mapped file
+        self.columns = {}
+        for n in range(nsections):
+            name, offset, size, typecode = SECTION.unpack_from(
+                    self._buf, HEADER.size + n * SECTION.size)
+            name = name.rstrip(b"\0").decode("ascii")
+            typecode = typecode.rstrip(b"\0").decode("ascii")
+            self.columns[name] = self._buf[offset:offset + size].cast(typecode)
+
+        # Binary format is little-endian
+        if sys.byteorder != "little":
+            self.close()
+            raise ValueError("Big-endian hosts are not supported")
+
+        for name, view in self.columns.items():
+            setattr(self, name, view)
+
+        self.nfeatures = len(self.feature_volume_start) - 1
+        self.nvolumes = len(self.volume_segment_start) - 1
+        self.nobstacles = len(self.obstacle_position)
+
+        self.release = json.loads(bytes(self.columns['release']))
+        self.airspace = FeatureList(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # Views must be released before the map can be closed
+    def close(self):
+        for view in getattr(self, 'columns', {}).values():
+            view.release()
+        self.columns = {}
+        self._buf.release()
+        self._mmap.close()
+
+    def string(self, n):
+        if n == NONE:
+            return None
+
+        offsets = self.string_offset
+        return str(self.string_data[offsets[n]:offsets[n + 1]], "utf-8")
+
+    def strlist(self, n):
+        s = self.string(n)
+        return None if s is None else s.split(LIST_SEP)
+
+    def frequency(self, value):
+        return None if math.isnan(value) else value
+
+    def point(self, n):
+        return self.string(self.point_latlon[n])
+
+    # Boundary segment as YAIXM dictionary
+    def segment(self, n):
+        kind = SEGMENT_KINDS[self.segment_kind[n]]
+        if kind == "line":
+            start, stop = self.segment_point_start[n:n + 2]
+            return {'line': [self.point(p) for p in
+                             self.segment_points[start:stop]]}
+        elif kind == "arc":
+            return {'arc': {'centre': self.point(self.segment_centre[n]),
+                            'dir': ARC_DIRS[self.segment_dir[n]],
+                            'radius': self.string(self.segment_radius[n]),
+                            'to': self.point(self.segment_to[n])}}
+        else:
+            return {'circle': {'centre': self.point(self.segment_centre[n]),
+                               'radius': self.string(self.segment_radius[n])}}
+
+    def _feature_value(self, n, key):
+        if key in FEATURE_STRINGS:
+            return self.string(self.columns['feature_' + key][n])
+        elif key in LIST_PROPS:
+            return self.strlist(self.columns['feature_' + key][n])
+        elif key == "frequency":
+            return self.frequency(self.feature_frequency[n])
+        elif key == "geometry":
+            start, stop = self.feature_volume_start[n:n + 2]
+            return VolumeList(self, start, stop)
+        return None
+
+    def _volume_value(self, n, key):
+        if key == "seqno":
+            seqno = self.string(self.volume_seqno[n])
+            if seqno is not None and seqno.isdigit():
+                seqno = int(seqno)
+            return seqno
+        elif key in VOLUME_STRINGS:
+            return self.string(self.columns['volume_' + key][n])
+        elif key in LIST_PROPS:
+            return self.strlist(self.columns['volume_' + key][n])
+        elif key == "frequency":
+            return self.frequency(self.volume_frequency[n])
+        elif key == "boundary":
+            start, stop = self.volume_segment_start[n:n + 2]
+            return [self.segment(s) for s in range(start, stop)]
+        return None
+
+    # Obstacles as list of YAIXM dictionaries
+    def obstacles(self):
+        obstacles = []
+        for n in range(self.nobstacles):
+            obstacle = {'position': self.point(self.obstacle_position[n])}
+            for name in OBSTACLE_STRINGS:
+                value = self.string(self.columns['obstacle_' + name][n])
+                if value is not None:
+                    obstacle[name] = value
+            obstacles.append(obstacle)
+
+        return obstacles
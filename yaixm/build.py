@@ -0,0 +1,227 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import time
+
+from .convert import Openair, Tnp, make_filter, make_openair_type, \
+                     make_tnp_class, make_tnp_type, seq_name, noseq_name
+from .helpers import load, merge_loa, merge_service
+from .obstacle import ObstacleArray
+from . import instrument
+from .instrument import stage
+
+FORMATS = ["openair", "tnp", "geojson", "json"]
+
+# Filter factory arguments
+FILTER_ARGS = ["noatz", "microlight", "hgl", "gliding_site", "north",
+               "south", "max_level", "exclude"]
+
+# Create Openair/TNP converter from (flat) dictionary of options
+def make_converter(fmt, options):
+    filter_func = make_filter(**{k: options[k] for k in FILTER_ARGS
+                                 if k in options})
+    name_func = seq_name if options.get('seqno') else noseq_name
+    header = options.get('header')
+    cluster = options.get('obstacle_cluster')
+
+    if fmt == "openair":
+        type_args = dict(options.get('type', {}))
+        if options.get('comp'):
+            type_args['comp'] = True
+        return Openair(filter_func=filter_func, name_func=name_func,
+                       type_func=make_openair_type(**type_args),
+                       header=header, obstacle_cluster=cluster)
+    elif fmt == "tnp":
+        return Tnp(filter_func=filter_func, name_func=name_func,
+                   class_func=make_tnp_class(**options.get('class', {})),
+                   type_func=make_tnp_type(**options.get('type', {})),
+                   header=header, obstacle_cluster=cluster)
+    else:
+        raise ValueError("Unknown converter format: %s" % fmt)
+
+# Map of volume/feature id to frequency from YAIXM service list
+def service_frequencies(services):
+    return {control: service['frequency']
+            for service in services for control in service['controls']}
+
+# Source data and merged airspace, shared between outputs
+class Source():
+    def __init__(self, yaixm):
+        self.yaixm = yaixm
+        self.loa = {loa['name']: loa for loa in yaixm.get('loa', [])}
+        self.service = service_frequencies(yaixm.get('service', []))
+        self.merged = {}
+
+    # Normalised merge key for output specification
+    def merge_key(self, spec):
+        loa_names = spec.get('loa') or []
+        if loa_names == "all":
+            loa_names = list(self.loa)
+        elif loa_names == "default":
+            loa_names = [n for n, l in self.loa.items() if l.get('default')]
+        elif isinstance(loa_names, str):
+            loa_names = [loa_names]
+
+        missing = [n for n in loa_names if n not in self.loa]
+        if missing:
+            raise ValueError("Unknown LOA: %s" % ", ".join(missing))
+
+        return (tuple(sorted(loa_names)), bool(spec.get('service')),
+                bool(spec.get('rat')))
+
+    # Get airspace merged with LoAs, RATs and services
+    def airspace(self, key):
+        if key not in self.merged:
+            loa_names, service, rat = key
+
+            airspace = self.yaixm['airspace']
+            if loa_names:
+                airspace = merge_loa(airspace,
+                                     [self.loa[n] for n in loa_names])
+            if rat:
+                airspace = airspace + self.yaixm.get('rat', [])
+            if service:
+                airspace = merge_service(airspace, self.service)
+
+            self.merged[key] = airspace
+
+        return self.merged[key]
+
+# Generate output for a single manifest entry. A level index of the
+# airspace can be given, to share between outputs
+def build_output(airspace, obstacles, spec, level_index=None):
+    fmt = spec['format']
+    if fmt == "geojson":
+        from .geojson import geojson
+        gjson = geojson(airspace, resolution=spec.get('resolution', 15))
+        return json.dumps(gjson, sort_keys=True, indent=4)
+    elif fmt == "json":
+        return json.dumps({'airspace': airspace}, sort_keys=True, indent=4)
+    else:
+        converter = make_converter(fmt, spec)
+        obstacles = obstacles if spec.get('obstacle') else None
+        if spec.get('level_band'):
+            if level_index is None:
+                from .index import LevelIndex
+                level_index = LevelIndex(airspace)
+
+            volumes = level_index.band(*spec['level_band'])
+            output = converter.convert_volumes(volumes, obstacles)
+        else:
+            output = converter.convert(airspace, obstacles)
+
+        # Don't accept anything other than ASCII
+        return output.encode("ascii").decode("ascii")
+
+# Worker process state, set by pool initializer (or directly if serial)
+_worker = {}
+
+def _init_worker(merged, obstacles, outputs, profile=False):
+    _worker['merged'] = merged
+    _worker['obstacles'] = obstacles
+    _worker['outputs'] = outputs
+    _worker['level_index'] = {}
+
+    # Pool workers return their own profiling statistics
+    _worker['profile'] = profile
+    if profile:
+        instrument.enable()
+        instrument.reset()
+
+def _run_output(n):
+    tstart = time.perf_counter()
+
+    spec, key = _worker['outputs'][n]
+    with stage(os.path.basename(spec['file'])):
+        # Obstacles are parsed once per worker, when first needed
+        obstacles = _worker['obstacles']
+        if spec.get('obstacle') and obstacles and \
+           not isinstance(obstacles, ObstacleArray):
+            obstacles = _worker['obstacles'] = ObstacleArray(obstacles)
+
+        # Level indices are built once per worker and merge key
+        airspace = _worker['merged'][key]
+        level_index = None
+        if spec.get('level_band') and spec['format'] in ["openair", "tnp"]:
+            from .index import LevelIndex
+            if key not in _worker['level_index']:
+                _worker['level_index'][key] = LevelIndex(airspace)
+            level_index = _worker['level_index'][key]
+
+        output = build_output(airspace, obstacles, spec, level_index)
+
+        encoding = "utf-8" if spec['format'] in ["json", "geojson"] \
+                   else "ascii"
+        with open(spec['file'], "w", encoding=encoding) as f:
+            f.write(output)
+
+    stats = None
+    if _worker['profile']:
+        stats = instrument.snapshot()
+        instrument.reset()
+
+    return time.perf_counter() - tstart, len(output), stats
+
+# Build all outputs in manifest. Returns list of (description, seconds,
+# size) timing records
+def build(manifest, base_dir=".", jobs=None):
+    timing = []
+
+    def path(p):
+        return os.path.join(base_dir, p)
+
+    # Load source once
+    tstart = time.perf_counter()
+    with stage("load"), open(path(manifest['source'])) as f:
+        source = Source(load(f))
+    timing.append(("load " + manifest['source'],
+                   time.perf_counter() - tstart, None))
+
+    # Check specifications and create shared, merged airspace
+    tstart = time.perf_counter()
+    outputs = []
+    with stage("merge"):
+        for spec in manifest['outputs']:
+            if spec.get('format') not in FORMATS:
+                raise ValueError("Bad format for %s: %s" %
+                                 (spec.get('file'), spec.get('format')))
+
+            spec = dict(spec, file=path(spec['file']))
+            key = source.merge_key(spec)
+            source.airspace(key)
+            outputs.append((spec, key))
+    timing.append(("merge", time.perf_counter() - tstart, None))
+
+    args = (source.merged, source.yaixm.get('obstacle'), outputs)
+    if jobs == 1:
+        _init_worker(*args)
+        results = [_run_output(n) for n in range(len(outputs))]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=args + (instrument.enabled(),)) \
+                as executor:
+            results = list(executor.map(_run_output, range(len(outputs))))
+
+    for (spec, key), (secs, size, stats) in zip(outputs, results):
+        timing.append((spec['file'], secs, size))
+        if stats:
+            instrument.merge(stats)
+
+    return timing
@@ -16,28 +16,157 @@
 # along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
 
 import argparse
+import atexit
 import json
+import os
 import sys
+import time
 
 from .convert import Openair, Tnp, seq_name, make_openair_type
-from .helpers import load, validate, merge_loa
+from .helpers import load, validate, merge_loa, LEVEL_RE
+from . import instrument
+from .instrument import stage
+
+# Add profiling options
+def add_profile_args(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help="Print profiling report to stderr")
+    parser.add_argument("--profile-json", metavar="FILE",
+                        help="Write JSON profiling report to file")
+
+# Start profiling if requested, the report is produced on exit
+def start_profile(args):
+    if args.profile or args.profile_json:
+        instrument.enable()
+        atexit.register(instrument.report, args.profile_json)
+
+# Add JSON output options
+def add_json_args(parser):
+    parser.add_argument("--compact", action="store_true",
+                        help="Compact JSON output, no whitespace")
+    parser.add_argument("--precision", type=int, metavar="N",
+                        help="Round floating point values to N decimal places")
+    parser.add_argument("--json-backend", default="auto",
+                        choices=["auto", "json", "orjson"],
+                        help="JSON encoder (default %(default)s)")
+
+# Check JSON options can be used, call after parsing arguments
+def check_json_args(parser, args):
+    from .serialise import have_orjson
+
+    if args.json_backend == "orjson":
+        if not have_orjson():
+            parser.error("--json-backend orjson requires the orjson package")
+        if not args.compact:
+            parser.error("--json-backend orjson requires --compact")
+
+# Write JSON output. Default format is set by indent and sort_keys, which
+# compact overrides
+def write_json(data, fileobj, args, indent=None, sort_keys=False):
+    from .serialise import dump
+
+    if args.compact:
+        indent = None
+
+    dump(data, fileobj, sort_keys=sort_keys, indent=indent,
+         compact=args.compact, precision=args.precision,
+         backend=args.json_backend)
+
+# Add obstacle options
+def add_obstacle_args(parser):
+    parser.add_argument("--obstacle", action="store_true",
+                        help="Include obstacles")
+    parser.add_argument("--obstacle-cluster", type=float, metavar="NM",
+                        help="Merge obstacles within NM of each other")
+
+# Level string argument, e.g. "SFC", "FL65" or "3000 ft"
+def level_arg(value):
+    if not LEVEL_RE.match(value):
+        raise argparse.ArgumentTypeError("invalid level: %r" % value)
+    return value
+
+# Add level band option
+def add_level_args(parser):
+    parser.add_argument("--level-band", nargs=2, metavar=("LOWER", "UPPER"),
+                        type=level_arg,
+                        help="Only airspace volumes overlapping level band, "
+                             "e.g. SFC FL65")
+
+# Obstacles to include in output
+def obstacles(yaixm, args):
+    return yaixm.get('obstacle') if args.obstacle else None
+
+# Add LOA merge option
+def add_merge_args(parser):
+    parser.add_argument("-m", "--merge", default="",
+                        help="Comma separated list of LOAs to merge")
+
+# Airspace merged with LOAs given by merge option
+def merged_airspace(yaixm, args):
+    airspace = yaixm['airspace']
+    loa_names = [x.strip() for x in args.merge.split(",")]
+    if loa_names[0]:
+        with stage("merge"):
+            loa = [x for x in yaixm.get('loa', []) if x['name'] in loa_names]
+            airspace = merge_loa(airspace, loa)
+
+    return airspace
+
+# Convert airspace, or only volumes in level band
+def convert_airspace(converter, yaixm, args):
+    if args.level_band:
+        from .index import LevelIndex
+
+        volumes = LevelIndex(yaixm['airspace']).band(*args.level_band)
+        return converter.convert_volumes(volumes, obstacles(yaixm, args))
+    else:
+        return converter.convert(yaixm['airspace'], obstacles(yaixm, args))
 
 def check():
+    from .validity import TOLERANCE, ARC_TOLERANCE
+
     parser = argparse.ArgumentParser()
     parser.add_argument("airspace_file", nargs="?",
                         help="YAML airspace file",
                         type=argparse.FileType("r"), default=sys.stdin)
+    parser.add_argument("-g", "--geometry", action="store_true",
+                        help="Check volume boundary geometry")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of worker processes (default CPU count)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Distinct point tolerance, nm "
+                             "(default %(default)s)")
+    parser.add_argument("--arc-tolerance", type=float, default=ARC_TOLERANCE,
+                        help="Arc radius tolerance, nm (default %(default)s)")
+    add_profile_args(parser)
     args = parser.parse_args()
+    start_profile(args)
 
     # Load airspace
-    airspace = load(args.airspace_file)
+    with stage("load"):
+        airspace = load(args.airspace_file)
 
     # Validate and write any errors to stderr
-    e = validate(airspace)
+    with stage("validate"):
+        e = validate(airspace)
     if e:
         print(e.message, file=sys.stderr)
         sys.exit(1)
 
+    if args.geometry:
+        from .validity import check_geometry
+
+        with stage("geometry"):
+            issues = check_geometry(airspace['airspace'], jobs=args.jobs,
+                                    tolerance=args.tolerance,
+                                    arc_tolerance=args.arc_tolerance)
+        for issue in issues:
+            print("%s: %s: %s (tolerance %s)" %
+                  (issue['volume'], issue['check'], issue['message'],
+                   issue['tolerance']), file=sys.stderr)
+        if issues:
+            sys.exit(1)
+
 def openair():
     parser = argparse.ArgumentParser()
     parser.add_argument("airspace_file", nargs="?",
@@ -49,22 +178,31 @@ def openair():
                         default=sys.stdout)
     parser.add_argument("--comp",
                         help="Competition airspace", action="store_true")
+    add_obstacle_args(parser)
+    add_level_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    start_profile(args)
 
     # Load airspace
-    airspace = load(args.airspace_file)
+    with stage("load"):
+        airspace = load(args.airspace_file)
 
     # Convert to openair
-    if args.comp:
-        convert = Openair(name_func=seq_name, type_func=make_openair_type(comp=True))
-    else:
-        convert = Openair()
-    oa = convert.convert(airspace['airspace'])
+    with stage("convert"):
+        if args.comp:
+            convert = Openair(name_func=seq_name,
+                              type_func=make_openair_type(comp=True),
+                              obstacle_cluster=args.obstacle_cluster)
+        else:
+            convert = Openair(obstacle_cluster=args.obstacle_cluster)
+        oa = convert_airspace(convert, airspace, args)
 
     # Don't accept anything other than ASCII
     output_oa = oa.encode("ascii").decode("ascii")
 
-    args.openair_file.write(output_oa)
+    with stage("write"):
+        args.openair_file.write(output_oa)
 
 def tnp():
     parser = argparse.ArgumentParser()
@@ -75,19 +213,26 @@ def tnp():
                         help="TNP output file, stdout if not specified",
                         type=argparse.FileType("w", encoding="ascii"),
                         default=sys.stdout)
+    add_obstacle_args(parser)
+    add_level_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    start_profile(args)
 
     # Load airspace
-    airspace = load(args.airspace_file)
+    with stage("load"):
+        airspace = load(args.airspace_file)
 
     # Convert to openair
-    convert = Tnp()
-    oa = convert.convert(airspace['airspace'])
+    with stage("convert"):
+        convert = Tnp(obstacle_cluster=args.obstacle_cluster)
+        oa = convert_airspace(convert, airspace, args)
 
     # Don't accept anything other than ASCII
     output_oa = oa.encode("ascii").decode("ascii")
 
-    args.tnp_file.write(output_oa)
+    with stage("write"):
+        args.tnp_file.write(output_oa)
 
 def to_json():
     parser = argparse.ArgumentParser()
@@ -100,10 +245,18 @@ def to_json():
     parser.add_argument("-i", "--indent", type=int, help="indent level",
                         default=None)
     parser.add_argument("-s", "--sort", help="sort keys", action="store_true")
+    add_json_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    check_json_args(parser, args)
+    start_profile(args)
+
+    with stage("load"):
+        data = load(args.yaml_file)
 
-    data = load(args.yaml_file)
-    json.dump(data, args.json_file, sort_keys=args.sort, indent=args.indent)
+    with stage("write"):
+        write_json(data, args.json_file, args, indent=args.indent,
+                   sort_keys=args.sort)
 
     if args.json_file is sys.stdout:
         print()
@@ -118,9 +271,14 @@ def merge():
                         type=argparse.FileType("w"), default=sys.stdout)
     parser.add_argument("-m", "--merge", default="",
                         help="Comma separated list of LOAs to merge")
+    add_json_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    check_json_args(parser, args)
+    start_profile(args)
 
-    yaixm = load(args.input_file)
+    with stage("load"):
+        yaixm = load(args.input_file)
     airspace = yaixm['airspace']
     loa = yaixm['loa']
 
@@ -129,18 +287,13 @@ def merge():
     if loa_names[0]:
         loa = [x for x in loa if x['name'] in loa_names]
 
-    merged = {'airspace': merge_loa(airspace, loa)}
+    with stage("merge"):
+        merged = {'airspace': merge_loa(airspace, loa)}
 
-    json.dump(merged, args.output_file, sort_keys=True, indent=4)
+    with stage("write"):
+        write_json(merged, args.output_file, args, indent=4, sort_keys=True)
 
 def geojson():
-    # Do the import here to avoid hard dependency on pygeodesy
-    try:
-        from .geojson import geojson as convert_geojson
-    except ModuleNotFoundError:
-        print("ERROR: GeoJSON requires the PyGeodesy package")
-        sys.exit(1)
-
     parser = argparse.ArgumentParser()
     parser.add_argument("airspace_file", nargs="?",
                         help="YAML airspace file",
@@ -151,12 +304,509 @@ def geojson():
                         default=sys.stdout)
     parser.add_argument("-r", "--resolution", type=int, default=15,
                         help="Angular resolution, per 90 degrees")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker processes, 0 for CPU count "
+                             "(default %(default)s)")
+    add_json_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    check_json_args(parser, args)
+
+    # Do the import here to avoid hard dependency on pygeodesy
+    try:
+        from . import geojson as gj
+    except ModuleNotFoundError:
+        print("ERROR: GeoJSON requires the PyGeodesy package")
+        sys.exit(1)
+
+    start_profile(args)
 
     # Load airspace
-    airspace = load(args.airspace_file)
+    with stage("load"):
+        airspace = load(args.airspace_file)
 
     # Convert to GeoJSON
-    gjson = convert_geojson(airspace['airspace'], resolution=args.resolution)
+    with stage("convert"):
+        gjson = gj.geojson(airspace['airspace'], resolution=args.resolution,
+                           jobs=args.jobs or None)
+
+    with stage("write"):
+        write_json(gjson, args.geojson_file, args, indent=4, sort_keys=True)
+
+def server():
+    import logging
+    from .server import make_server
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("airspace_file", help="YAML airspace file")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Listen address (default %(default)s)")
+    parser.add_argument("-p", "--port", type=int, default=8080,
+                        help="Listen port (default %(default)s)")
+    parser.add_argument("-s", "--socket",
+                        help="Listen on Unix socket instead of TCP port")
+    parser.add_argument("-c", "--cache-size", type=int, default=32,
+                        help="Maximum number of cached results")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    logging.basicConfig(level=logging.INFO)
+
+    httpd = make_server(args.airspace_file, host=args.host, port=args.port,
+                        socket_path=args.socket, cache_size=args.cache_size)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+def build():
+    from .build import build as build_outputs
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("manifest_file",
+                        help="YAML/JSON manifest of outputs",
+                        type=argparse.FileType("r"))
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of worker processes (default CPU count)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    manifest = load(args.manifest_file)
+    base_dir = os.path.dirname(args.manifest_file.name)
+
+    tstart = time.perf_counter()
+    timing = build_outputs(manifest, base_dir=base_dir, jobs=args.jobs)
+
+    # Summary of time spent per output
+    for name, secs, size in timing:
+        size_str = " " * 16 if size is None else "%10d chars" % size
+        print("%8.3fs %s %s" % (secs, size_str, name), file=sys.stderr)
+    print("%8.3fs total" % (time.perf_counter() - tstart), file=sys.stderr)
+
+def watch():
+    from .watch import IncrementalBuild, watch as watch_files
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("airspace_files", nargs="+",
+                        help="YAML airspace, LOA, obstacle, etc. files")
+    parser.add_argument("-o", "--output",
+                        help="Output file, check only if not specified")
+    parser.add_argument("-f", "--format", choices=["openair", "tnp"],
+                        default="openair", help="Output format")
+    parser.add_argument("--obstacle", action="store_true",
+                        help="Include obstacles in output")
+    parser.add_argument("-i", "--interval", type=float, default=0.5,
+                        help="Polling interval, in seconds")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    converter = None
+    if args.output:
+        converter = Openair() if args.format == "openair" else Tnp()
+
+    incremental = IncrementalBuild(converter, obstacles=args.obstacle)
+
+    def rebuild(yaixm, error):
+        if error:
+            print("ERROR: %s" % error, file=sys.stderr)
+            return
+
+        tstart = time.perf_counter()
+        with stage("rebuild"):
+            errors, output = incremental.update(yaixm)
+        for e in errors:
+            print(e, file=sys.stderr)
+
+        if output is not None:
+            # Don't accept anything other than ASCII
+            with open(args.output, "w", encoding="ascii") as f:
+                f.write(output)
+
+        print("%s: %d changed, %d unchanged, %.3fs" %
+              ("FAILED" if errors else "OK", incremental.counts['changed'],
+               incremental.counts['reused'], time.perf_counter() - tstart),
+              file=sys.stderr)
+
+    try:
+        watch_files(args.airspace_files, rebuild, interval=args.interval)
+    except KeyboardInterrupt:
+        pass
+
+def compile_binary():
+    from .binary import compile_binary as compile_yaixm
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input_file", nargs="?",
+                        help="YAML input file, stdin if not specified",
+                        type=argparse.FileType("r"), default=sys.stdin)
+    parser.add_argument("output_file",
+                        help="Binary output file",
+                        type=argparse.FileType("wb"))
+    add_merge_args(parser)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    with stage("load"):
+        yaixm = load(args.input_file)
+
+    yaixm['airspace'] = merged_airspace(yaixm, args)
+
+    with stage("write"):
+        compile_yaixm(yaixm, args.output_file)
+
+def route():
+    from .route import RouteQuery, parse_waypoint
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("airspace_file", help="YAML airspace file",
+                        type=argparse.FileType("r"))
+    parser.add_argument("waypoints", nargs="+",
+                        help="Waypoints, e.g. \"513654N 0010545W\" or "
+                             "51.615,-1.096")
+    parser.add_argument("-a", "--altitude", nargs="+",
+                        help="Altitude at each waypoint, e.g. 2000 or FL65")
+    add_merge_args(parser)
+    parser.add_argument("--json", action="store_true",
+                        help="JSON output")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    with stage("load"):
+        yaixm = load(args.airspace_file)
+
+    airspace = merged_airspace(yaixm, args)
+
+    waypoints = [parse_waypoint(w) for w in args.waypoints]
+    altitudes = None
+    if args.altitude:
+        altitudes = [int(a) if a.isdigit() else a for a in args.altitude]
+
+    with stage("query"):
+        crossings = RouteQuery(airspace).query(waypoints, altitudes)
+
+    if args.json:
+        for c in crossings:
+            del c['volume'], c['feature']
+        print(json.dumps(crossings, indent=4))
+    else:
+        for c in crossings:
+            print("%3d %7.2f %7.2f %-8s %-8s %s" %
+                  (c['leg'] + 1, c['entry'], c['exit'], c['lower'],
+                   c['upper'], c['name']))
+
+def measure():
+    from .measure import measure, write_csv
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("airspace_file", nargs="?",
+                        help="YAML airspace file",
+                        type=argparse.FileType("r"), default=sys.stdin)
+    parser.add_argument("csv_file", nargs="?",
+                        help="CSV output file, stdout if not specified",
+                        type=argparse.FileType("w"), default=sys.stdout)
+    parser.add_argument("-p", "--precision", type=int, default=3,
+                        help="Decimal places (default %(default)s)")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    with stage("load"):
+        yaixm = load(args.airspace_file)
+
+    with stage("measure"):
+        rows = measure(yaixm['airspace'])
+
+    with stage("write"):
+        write_csv(rows, args.csv_file, args.precision)
+
+def qa():
+    from .qa import find_conflicts, TOLERANCE, GAP
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("airspace_file", nargs="?",
+                        help="YAML airspace file",
+                        type=argparse.FileType("r"), default=sys.stdin)
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of worker processes (default CPU count)")
+    parser.add_argument("-t", "--tolerance", type=float, default=TOLERANCE,
+                        help="Boundary tolerance, nm (default %(default)s)")
+    parser.add_argument("-g", "--gap", type=float, default=GAP,
+                        help="Maximum gap width, nm (default %(default)s)")
+    parser.add_argument("-f", "--same-feature", action="store_true",
+                        help="Only report volumes of the same feature")
+    parser.add_argument("--json", action="store_true",
+                        help="JSON output")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    with stage("load"):
+        yaixm = load(args.airspace_file)
+
+    with stage("qa"):
+        findings = find_conflicts(yaixm['airspace'], jobs=args.jobs,
+                                  tolerance=args.tolerance, gap=args.gap)
+
+    if args.same_feature:
+        findings = [f for f in findings if f['same_feature']]
+
+    if args.json:
+        print(json.dumps(findings, indent=4))
+    else:
+        for f in findings:
+            distance = " %.3f nm" % f['distance'] if 'distance' in f else ""
+            print("%-9s %s, %s (%s, %s)%s" %
+                  (f['type'], f['volumes'][0], f['volumes'][1],
+                   f['names'][0], f['names'][1], distance))
+
+    if findings:
+        sys.exit(1)
+
+def split():
+    from .convert import make_filter
+    from .region import make_regions, split, region_obstacles
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("airspace_file", help="YAML airspace file",
+                        type=argparse.FileType("r"))
+    parser.add_argument("region_file", help="YAML region file",
+                        type=argparse.FileType("r"))
+    parser.add_argument("output_dir", help="Output directory")
+    parser.add_argument("-f", "--format", default="openair",
+                        choices=["openair", "tnp", "geojson"],
+                        help="Output format (default %(default)s)")
+    add_merge_args(parser)
+    parser.add_argument("-c", "--clip", action="store_true",
+                        help="Clip GeoJSON output to regions")
+    parser.add_argument("-r", "--resolution", type=int, default=15,
+                        help="GeoJSON angular resolution, per 90 degrees")
+    add_obstacle_args(parser)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    with stage("load"):
+        yaixm = load(args.airspace_file)
+        regions = make_regions(load(args.region_file)['regions'])
+
+    airspace = merged_airspace(yaixm, args)
+
+    with stage("split"):
+        volumes = split(airspace, regions)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    ext = {'openair': "txt", 'tnp': "tnp", 'geojson': "geojson"}[args.format]
+
+    for region in regions:
+        path = os.path.join(args.output_dir, "%s.%s" % (region.name, ext))
+        with stage(region.name):
+            if args.format == "geojson":
+                from .geojson import geojson_volumes
+
+                clip = region.points(args.resolution) if args.clip else None
+
+                gjson = geojson_volumes(volumes[region.name],
+                                        args.resolution, clip)
+                with open(path, "w") as f:
+                    json.dump(gjson, f, sort_keys=True, indent=4)
+            else:
+                # Regions replace the default latitude limits
+                filter_func = make_filter(north=90, south=-90)
+                if args.format == "openair":
+                    convert = Openair(filter_func=filter_func,
+                                      obstacle_cluster=args.obstacle_cluster)
+                else:
+                    convert = Tnp(filter_func=filter_func,
+                                  obstacle_cluster=args.obstacle_cluster)
+
+                obstacles = yaixm.get('obstacle') if args.obstacle else None
+                if obstacles:
+                    obstacles = region_obstacles(obstacles, region)
+
+                output = convert.convert_volumes(volumes[region.name],
+                                                 obstacles)
+                with open(path, "w", encoding="ascii") as f:
+                    f.write(output)
+
+def gpkg():
+    from .geopackage import write_geopackage
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("airspace_file", help="YAML airspace file",
+                        type=argparse.FileType("r"))
+    parser.add_argument("gpkg_file", help="GeoPackage output file")
+    add_merge_args(parser)
+    parser.add_argument("--obstacle", action="store_true",
+                        help="Include obstacles")
+    parser.add_argument("-r", "--resolution", type=int, default=15,
+                        help="Angular resolution, per 90 degrees")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    with stage("load"):
+        yaixm = load(args.airspace_file)
+
+    airspace = merged_airspace(yaixm, args)
+
+    with stage("write"):
+        write_geopackage(args.gpkg_file, airspace,
+                         obstacles(yaixm, args), resolution=args.resolution)
+
+def columnar():
+    from .columnar import columns, write_npz, write_arrow
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("airspace_file", help="YAML airspace file",
+                        type=argparse.FileType("r"))
+    parser.add_argument("output_file", help="Output file, .npz or .arrow")
+    parser.add_argument("-f", "--format", choices=["npz", "arrow"],
+                        help="Output format (default from file extension)")
+    add_merge_args(parser)
+    parser.add_argument("-r", "--resolution", type=int, default=15,
+                        help="Angular resolution, per 90 degrees")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    fmt = args.format or \
+          ("arrow" if args.output_file.endswith(".arrow") else "npz")
+    try:
+        __import__("pyarrow" if fmt == "arrow" else "numpy")
+    except ModuleNotFoundError:
+        print("ERROR: %s output requires the %s package" %
+              (fmt, "pyarrow" if fmt == "arrow" else "NumPy"))
+        sys.exit(1)
+
+    start_profile(args)
+
+    with stage("load"):
+        yaixm = load(args.airspace_file)
+
+    airspace = merged_airspace(yaixm, args)
+
+    with stage("columns"):
+        cols = columns(airspace, args.resolution)
+
+    with stage("write"), open(args.output_file, "wb") as f:
+        if fmt == "arrow":
+            write_arrow(f, cols)
+        else:
+            write_npz(f, cols)
+
+def roundtrip():
+    from .roundtrip import check_roundtrip
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("airspace_file", help="YAML airspace file",
+                        type=argparse.FileType("r"))
+    parser.add_argument("output_file", help="OpenAir or TNP file to check",
+                        type=argparse.FileType("r", encoding="ascii"))
+    parser.add_argument("-f", "--format", choices=["openair", "tnp"],
+                        help="Output format (default from file extension)")
+    parser.add_argument("--comp",
+                        help="Competition airspace", action="store_true")
+    add_obstacle_args(parser)
+    add_level_args(parser)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    fmt = args.format or \
+          ("tnp" if args.output_file.name.endswith(".tnp") else "openair")
+    if fmt == "tnp":
+        converter = Tnp(obstacle_cluster=args.obstacle_cluster)
+    elif args.comp:
+        converter = Openair(name_func=seq_name,
+                            type_func=make_openair_type(comp=True),
+                            obstacle_cluster=args.obstacle_cluster)
+    else:
+        converter = Openair(obstacle_cluster=args.obstacle_cluster)
+
+    with stage("load"):
+        yaixm = load(args.airspace_file)
+
+    if args.level_band:
+        from .index import LevelIndex
+
+        volumes = LevelIndex(yaixm['airspace']).band(*args.level_band)
+    else:
+        volumes = [(volume, feature) for feature in yaixm['airspace']
+                   for volume in feature['geometry']]
+
+    with stage("check"):
+        try:
+            mismatches = check_roundtrip(converter, volumes, args.output_file,
+                                         obstacles(yaixm, args))
+        except ValueError as e:
+            print("ERROR: %s" % e)
+            sys.exit(1)
+
+    for m in mismatches:
+        print("%5d %-8s %s: expected %s, found %s" %
+              (m['index'], m['field'], m['name'], m['expected'], m['found']))
+
+    if mismatches:
+        sys.exit(1)
+
+def diff():
+    from .delta import make_delta
+    from .serialise import dump
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("old_file", help="Old OpenAir or TNP file",
+                        type=argparse.FileType("r", encoding="ascii"))
+    parser.add_argument("new_file", help="New OpenAir or TNP file",
+                        type=argparse.FileType("r", encoding="ascii"))
+    parser.add_argument("delta_file", nargs="?",
+                        help="JSON delta output file, stdout if not specified",
+                        type=argparse.FileType("w"), default=sys.stdout)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    with stage("load"):
+        old_text = args.old_file.read()
+        new_text = args.new_file.read()
+
+    with stage("diff"):
+        delta = make_delta(old_text, new_text)
+
+    with stage("write"):
+        dump(delta, args.delta_file, compact=True)
+
+def patch():
+    from .delta import apply_delta
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("old_file", help="Old OpenAir or TNP file",
+                        type=argparse.FileType("r", encoding="ascii"))
+    parser.add_argument("delta_file", help="JSON delta file",
+                        type=argparse.FileType("r"))
+    parser.add_argument("new_file", nargs="?",
+                        help="New file, stdout if not specified",
+                        type=argparse.FileType("w", encoding="ascii"),
+                        default=sys.stdout)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profile(args)
+
+    with stage("load"):
+        old_text = args.old_file.read()
+        delta = json.load(args.delta_file)
+
+    with stage("patch"):
+        try:
+            new_text = apply_delta(old_text, delta)
+        except ValueError as e:
+            print("ERROR: %s" % e, file=sys.stderr)
+            sys.exit(1)
 
-    json.dump(gjson, args.geojson_file, sort_keys=True, indent=4)
+    with stage("write"):
+        args.new_file.write(new_text)
@@ -0,0 +1,149 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Columnar airspace, one row per volume.
+#
+# Volume columns are the string columns in STRING_COLUMNS (empty string
+# if missing) and:
+#
+#   feature              - feature index
+#   normlower, normupper - normalised levels (ft)
+#   south, west, north, east - polygon bounding box
+#
+# Polygon vertices (densified, see geometry.polygon_points) are in the
+# lon and lat columns, with volume n's vertices from offsets[n] to
+# offsets[n + 1]. The last vertex of each polygon repeats the first.
+#
+# Columns are written to NumPy .npz or Arrow IPC files, which need numpy
+# or pyarrow. In the Arrow file the vertices are list columns of the
+# volume table, sharing the same offsets.
+
+from array import array
+
+from .convert import seq_name
+from .geometry import polygon_points
+from .helpers import level
+
+STRING_COLUMNS = ["id", "feature_id", "name", "type", "localtype", "class",
+                  "rules", "lower", "upper"]
+VOLUME_COLUMNS = STRING_COLUMNS + ["feature", "normlower", "normupper",
+                                   "south", "west", "north", "east"]
+VERTEX_COLUMNS = ["lon", "lat"]
+
+# Separator for rules lists
+RULES_SEP = ","
+
+# Columns for airspace, strings as lists and numbers as arrays
+def columns(airspace, resolution=15):
+    cols = {name: [] for name in STRING_COLUMNS}
+    cols.update({
+        'feature': array('l'),
+        'normlower': array('l'),
+        'normupper': array('l'),
+        'south': array('d'),
+        'west': array('d'),
+        'north': array('d'),
+        'east': array('d'),
+        'offsets': array('q', [0]),
+        'lon': array('d'),
+        'lat': array('d')
+    })
+
+    for n, feature in enumerate(airspace):
+        for volume in feature['geometry']:
+            cols['id'].append(volume.get('id', ""))
+            cols['feature_id'].append(feature.get('id', ""))
+            cols['name'].append(seq_name(volume, feature))
+            cols['type'].append(feature['type'])
+            cols['localtype'].append(feature.get('localtype', ""))
+            cols['class'].append(volume.get('class') or
+                                 feature.get('class', ""))
+            cols['rules'].append(RULES_SEP.join(
+                feature.get('rules', []) + volume.get('rules', [])))
+            cols['lower'].append(volume['lower'])
+            cols['upper'].append(volume['upper'])
+
+            cols['feature'].append(n)
+            cols['normlower'].append(level(volume['lower']))
+            cols['normupper'].append(level(volume['upper']))
+
+            points = polygon_points(volume['boundary'], resolution)
+            lon = [p[0] for p in points]
+            lat = [p[1] for p in points]
+            cols['lon'].extend(lon)
+            cols['lat'].extend(lat)
+            cols['offsets'].append(len(cols['lon']))
+
+            cols['south'].append(min(lat))
+            cols['west'].append(min(lon))
+            cols['north'].append(max(lat))
+            cols['east'].append(max(lon))
+
+    return cols
+
+# Write columns to NumPy .npz file
+def write_npz(fileobj, cols):
+    import numpy as np
+
+    arrays = {}
+    for name, values in cols.items():
+        if name in STRING_COLUMNS:
+            arrays[name] = np.array(values, dtype=str)
+        else:
+            arrays[name] = np.frombuffer(values, dtype=values.typecode)
+
+    np.savez(fileobj, **arrays)
+
+# Read columns from NumPy .npz file, as a dict of arrays
+def load_npz(fileobj):
+    import numpy as np
+
+    with np.load(fileobj, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+def _arrow_table(cols):
+    import pyarrow as pa
+
+    offsets = pa.array(cols['offsets'], type=pa.int64())
+    data = {name: pa.array(cols[name]) for name in VOLUME_COLUMNS}
+    for name in VERTEX_COLUMNS:
+        data[name] = pa.LargeListArray.from_arrays(
+                offsets, pa.array(cols[name], type=pa.float64()))
+    return pa.table(data)
+
+# Write columns to Arrow IPC file
+def write_arrow(fileobj, cols):
+    import pyarrow as pa
+
+    table = _arrow_table(cols)
+    with pa.ipc.new_file(fileobj, table.schema) as writer:
+        writer.write_table(table)
+
+# Read columns from Arrow IPC file, as a dict of Arrow arrays, with
+# vertices flattened to offsets, lon and lat as for columns()
+def load_arrow(fileobj):
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(fileobj).read_all()
+    cols = {name: table.column(name).combine_chunks()
+            for name in VOLUME_COLUMNS}
+
+    lon = table.column('lon').combine_chunks()
+    cols['offsets'] = lon.offsets
+    cols['lon'] = lon.values
+    cols['lat'] = table.column('lat').combine_chunks().values
+    return cols
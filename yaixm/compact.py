@@ -0,0 +1,149 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Compact in-memory representation of loaded YAIXM data.
+#
+# Repeated strings and numbers (levels, types, rules, coordinates, etc.)
+# are shared, line points are stored as tuples and boundary segments,
+# arcs and circles are stored as read-only, slot based Mapping records
+# in place of dicts. Features, volumes, LoAs, etc. remain dicts so they
+# can be modified (e.g. by merge_loa and merge_service).
+#
+# Compacted data can be used by the converters, but JSON schema
+# validation requires plain dicts so validate before compacting, and use
+# json_default when serialising to JSON.
+
+from collections.abc import Mapping
+import sys
+
+class Record(Mapping):
+    __slots__ = []
+
+    def __init__(self, *args, **kwargs):
+        for field in self.__slots__:
+            object.__setattr__(self, field, None)
+        for key, value in dict(*args, **kwargs).items():
+            if key not in self.__slots__:
+                raise KeyError(key)
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("%s is read-only" % type(self).__name__)
+
+    def __getitem__(self, key):
+        try:
+            value = getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return (k for k in self.__slots__ if getattr(self, k) is not None)
+
+    def __len__(self):
+        return sum(1 for k in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    # Records are immutable, so can be shared by copies
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+# Line points, a tuple which compares equal to the equivalent list
+class Points(tuple):
+    __slots__ = []
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            other = tuple(other)
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = tuple.__hash__
+
+class Arc(Record):
+    __slots__ = ["centre", "dir", "radius", "to"]
+
+class Circle(Record):
+    __slots__ = ["centre", "radius"]
+
+class Line(Record):
+    __slots__ = ["line"]
+
+class ArcSegment(Record):
+    __slots__ = ["arc"]
+
+class CircleSegment(Record):
+    __slots__ = ["circle"]
+
+# Compact data, returning compacted copy
+def compact(data):
+    memo = {}
+
+    def share(value):
+        if isinstance(value, str):
+            return sys.intern(value)
+        elif isinstance(value, float):
+            return memo.setdefault(value, value)
+        return value
+
+    def segment(seg):
+        if 'line' in seg:
+            return Line(line=Points(share(p) for p in seg['line']))
+        elif 'arc' in seg:
+            return ArcSegment(arc=Arc(
+                {k: share(v) for k, v in seg['arc'].items()}))
+        elif 'circle' in seg:
+            return CircleSegment(circle=Circle(
+                {k: share(v) for k, v in seg['circle'].items()}))
+        return walk(seg)
+
+    def walk(value):
+        if isinstance(value, dict):
+            out = {}
+            for k, v in value.items():
+                if k == "boundary" and isinstance(v, list):
+                    out[sys.intern(k)] = [segment(s) for s in v]
+                else:
+                    out[sys.intern(k)] = walk(v)
+            return out
+        elif isinstance(value, list):
+            return [walk(v) for v in value]
+        else:
+            return share(value)
+
+    return walk(data)
+
+# Default function for json.dump(s) with compacted data
+def json_default(obj):
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    elif isinstance(obj, tuple):
+        return list(obj)
+    raise TypeError("%s is not JSON serializable" % type(obj).__name__)
@@ -88,6 +88,10 @@ def make_filter(noatz=True, microlight=True, hgl=True,
 
         return True
 
+    # Parameters, for bulk obstacle filtering
+    airfilter.params = {'north': north, 'south': south,
+                        'max_level': max_level, 'exclude': exclude}
+
     return airfilter
 
 # Default filter includes everything
@@ -306,6 +310,23 @@ def make_tnp_type(ils="OTHER", glider="OTHER"):
 
 default_tnp_type = make_tnp_type()
 
+# Create dummy volume/feature for an obstacle
+def obstacle_volume(obstacle):
+    name = obstacle.get('name') or \
+           OBSTACLE_TYPES.get(obstacle['type'], "OBSTACLE")
+    feature = {
+        'name': name,
+        'type': "OTHER"
+    }
+    volume = {
+        'upper': obstacle['elevation'],
+        'lower': "SFC",
+        'boundary': [{'circle': {'centre': obstacle['position'],
+                                 'radius': "0.5 nm"}}]
+    }
+
+    return volume, feature
+
 # Base class for TNP and OpenAir converters
 class Converter():
     def format_latlon(self, latlon):
@@ -352,35 +373,75 @@ class Converter():
     def end(self):
         return []
 
-    def convert(self, airspace, obstacles=None):
-        output = self.start()
+    # Convert volumes of a single feature, one block per volume
+    def do_feature(self, feature):
+        return [self.do_volume(volume, feature)
+                for volume in feature['geometry']
+                if self.filter_func(volume, feature)]
+
+    # Convert obstacles (list or obstacle.ObstacleArray), one block per
+    # obstacle, or per cluster of obstacles within obstacle_cluster nm of
+    # each other. Done in bulk if possible
+    def do_obstacles(self, obstacles):
+        from .obstacle import convert_obstacles
+
+        cluster = getattr(self, 'obstacle_cluster', None)
+        output = convert_obstacles(self, obstacles, cluster)
+        if output is not None:
+            return output
+
+        if cluster:
+            raise ValueError("Obstacle clustering requires a make_filter() "
+                             "filter")
+
+        output = []
+        for obstacle in obstacles:
+            volume, feature = obstacle_volume(obstacle)
+            if self.filter_func(volume, feature):
+                output.append(self.do_volume(volume, feature))
+
+        return output
+
+    # Generate output one block (header, volume or trailer) at a time
+    def blocks(self, airspace, obstacles=None):
+        yield self.start()
+
         for feature in airspace:
-            for volume in feature['geometry']:
-                if self.filter_func(volume, feature):
-                    x = self.do_volume(volume, feature)
-                    output.extend(x)
+            for block in self.do_feature(feature):
+                yield block
 
         if obstacles:
-            for obstacle in obstacles:
-                # Create dummy feature/volume
-                name = obstacle.get('name') or \
-                       OBSTACLE_TYPES.get(obstacle['type'], "OBSTACLE")
-                feature = {
-                    'name': name,
-                    'type': "OTHER"
-                }
-                volume = {
-                    'upper': obstacle['elevation'],
-                    'lower': "SFC",
-                    'boundary': [{'circle': {'centre': obstacle['position'],
-                                             'radius': "0.5 nm"}}]
-                }
-
-                if self.filter_func(volume, feature):
-                    x = self.do_volume(volume, feature)
-                    output.extend(x)
-
-        output.extend(self.end())
+            for block in self.do_obstacles(obstacles):
+                yield block
+
+        yield self.end()
+
+    def convert(self, airspace, obstacles=None):
+        output = []
+        for block in self.blocks(airspace, obstacles):
+            output.extend(block)
+
+        return "\n".join(output)
+
+    # Generate output blocks from (volume, feature) pairs, e.g. selected
+    # from an index
+    def volume_blocks(self, volumes, obstacles=None):
+        yield self.start()
+
+        for volume, feature in volumes:
+            if self.filter_func(volume, feature):
+                yield self.do_volume(volume, feature)
+
+        if obstacles:
+            for block in self.do_obstacles(obstacles):
+                yield block
+
+        yield self.end()
+
+    def convert_volumes(self, volumes, obstacles=None):
+        output = []
+        for block in self.volume_blocks(volumes, obstacles):
+            output.extend(block)
 
         return "\n".join(output)
 
@@ -390,11 +451,13 @@ class Openair(Converter):
                   "{1[d]:03d}:{1[m]:02d}:{1[s]:02d} {1[ew]}"
 
     def __init__(self, filter_func=default_filter, name_func=noseq_name,
-                 type_func=default_openair_type, header=None):
+                 type_func=default_openair_type, header=None,
+                 obstacle_cluster=None):
         self.filter_func = filter_func
         self.name_func = name_func
         self.type_func = type_func
         self.header = header
+        self.obstacle_cluster = obstacle_cluster
         self.comment_char ="*"
 
     def do_name(self, name):
@@ -463,12 +526,13 @@ class Tnp(Converter):
 
     def __init__(self, filter_func=default_filter, name_func=noseq_name,
                  class_func=default_tnp_class, type_func=default_tnp_type,
-                 header=None):
+                 header=None, obstacle_cluster=None):
         self.filter_func = filter_func
         self.name_func = name_func
         self.class_func = class_func
         self.type_func = type_func
         self.header = header
+        self.obstacle_cluster = obstacle_cluster
         self.comment_char = "#"
 
     def end(self):
@@ -0,0 +1,188 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Block deltas between OpenAir or TNP files written by the converters.
+#
+# Files are split into a header, one block per volume and (TNP only) a
+# trailer. Blocks in the old file are keyed by [name, n], where n counts
+# earlier blocks with the same name. Unchanged blocks are matched by
+# content and, between them, old and new blocks with the same name are
+# paired as changed blocks. A delta lists the keys of removed blocks,
+# changed blocks and added blocks (each with the key of the old block it
+# follows), in new file order. Moved blocks are removed and added.
+# SHA-256 hashes of the old and new files are included so a delta is
+# only applied to the file it was made from, and the result can be
+# verified.
+
+import difflib
+import hashlib
+
+from .convert import Tnp
+
+# Line starting a block, and the line it is prefixed with
+FORMATS = {
+    'openair': ("AC ", "*"),
+    'tnp': ("TITLE=", "#")
+}
+
+TRAILERS = {
+    'openair': [],
+    'tnp': Tnp().end()
+}
+
+def file_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+# Guess file format from first block
+def file_format(lines):
+    for line in lines:
+        for fmt, (start, sep) in FORMATS.items():
+            if line.startswith(start):
+                return fmt
+
+    return "openair"
+
+# Split lines into header, list of (key, block lines) and trailer
+def split_blocks(lines, fmt):
+    start, sep = FORMATS[fmt]
+    name_tag = "AN " if fmt == "openair" else "TITLE="
+
+    trailer = TRAILERS[fmt]
+    if trailer and lines[-len(trailer):] == trailer:
+        lines = lines[:-len(trailer)]
+    else:
+        trailer = []
+
+    starts = [n - 1 for n, line in enumerate(lines)
+              if line.startswith(start) and n > 0 and lines[n - 1] == sep]
+    header = lines[:starts[0]] if starts else lines
+
+    counts = {}
+    blocks = []
+    for n, first in enumerate(starts):
+        block = lines[first:starts[n + 1] if n + 1 < len(starts) else None]
+        name = next((line[len(name_tag):] for line in block
+                     if line.startswith(name_tag)), "")
+
+        count = counts.get(name, 0)
+        counts[name] = count + 1
+        blocks.append(((name, count), block))
+
+    return header, blocks, trailer
+
+# Delta from old to new file text
+def make_delta(old_text, new_text):
+    old_lines = old_text.split("\n")
+    new_lines = new_text.split("\n")
+    fmt = file_format(new_lines)
+
+    old_header, old_blocks, old_trailer = split_blocks(old_lines, fmt)
+    new_header, new_blocks, new_trailer = split_blocks(new_lines, fmt)
+
+    delta = {
+        'format': fmt,
+        'source': file_hash(old_text),
+        'target': file_hash(new_text)
+    }
+    if new_header != old_header:
+        delta['header'] = new_header
+    if new_trailer != old_trailer:
+        delta['trailer'] = new_trailer
+
+    # Match unchanged blocks
+    matcher = difflib.SequenceMatcher(None,
+                                      ["\n".join(b) for k, b in old_blocks],
+                                      ["\n".join(b) for k, b in new_blocks],
+                                      autojunk=False)
+
+    remove = []
+    change = []
+    add = []
+
+    # Key of the last old block in the new file
+    anchor = None
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            anchor = list(old_blocks[i2 - 1][0])
+            continue
+
+        # Pair old and new blocks with the same name, in order, as changed
+        # blocks. Other blocks are removed or added
+        names = {}
+        for k in range(i2 - 1, i1 - 1, -1):
+            names.setdefault(old_blocks[k][0][0], []).append(k)
+
+        i = i1
+        for key, block in new_blocks[j1:j2]:
+            # First unused old block with the same name
+            indices = names.get(key[0], [])
+            while indices and indices[-1] < i:
+                indices.pop()
+
+            if not indices:
+                add.append([anchor, block])
+            else:
+                k = indices.pop()
+                remove.extend(list(old_blocks[n][0]) for n in range(i, k))
+                anchor = list(old_blocks[k][0])
+                change.append([anchor, block])
+                i = k + 1
+
+        remove.extend(list(old_blocks[n][0]) for n in range(i, i2))
+
+    delta['remove'] = remove
+    delta['change'] = change
+    delta['add'] = add
+
+    return delta
+
+# Apply delta to old file text, returning new file text
+def apply_delta(old_text, delta):
+    if file_hash(old_text) != delta['source']:
+        raise ValueError("Delta doesn't apply to this file")
+
+    fmt = delta['format']
+    header, blocks, trailer = split_blocks(old_text.split("\n"), fmt)
+    header = delta.get('header', header)
+    trailer = delta.get('trailer', trailer)
+
+    remove = set(tuple(k) for k in delta['remove'])
+    change = {tuple(k): block for k, block in delta['change']}
+
+    # Added blocks, by key of the old block they follow
+    following = {}
+    for anchor, block in delta['add']:
+        anchor = tuple(anchor) if anchor is not None else None
+        following.setdefault(anchor, []).append(block)
+
+    lines = list(header)
+    for block in following.get(None, []):
+        lines.extend(block)
+
+    for key, block in blocks:
+        if key not in remove:
+            lines.extend(change.get(key, block))
+        for block in following.get(key, []):
+            lines.extend(block)
+
+    lines.extend(trailer)
+    text = "\n".join(lines)
+
+    if file_hash(text) != delta['target']:
+        raise ValueError("Patched file doesn't match delta target")
+
+    return text
@@ -17,6 +17,7 @@
 
 from pygeodesy.ellipsoidalVincenty import LatLon
 
+from .geometry import clip_polygon
 from .helpers import parse_latlon, level
 
 def do_line(line):
@@ -75,65 +76,159 @@ def do_arc(arc, from_lonlat, resolution):
 
     return points
 
-def geojson(airspace, resolution=15):
-    geo_features = []
-    for feature in airspace:
-        for volume in feature['geometry']:
-            # Create new GeoJSON feature
-            geo_feature = {'type': "Feature"}
-
-            # Add properties
-            name =  volume.get('name') or feature.get('name')
-            if 'seqno' in volume:
-                name = "{} {}".format(name, volume['seqno'])
-            properties = {
-                'name': name,
-                'lower': volume['lower'],
-                'upper': volume['upper'],
-                'type' : feature['type'],
-                'normlower': level(volume['lower'])
-            }
-
-            cls = volume.get('class') or feature.get('class')
-            if cls:
-                properties['class'] = cls
-
-            if feature.get('localtype'):
-                properties['localtype'] = feature.get('localtype')
-
-            rules = feature.get('rules', [])
-            rules.extend(volume.get('rules', []))
-            if rules:
-                properties['rules'] = rules
-
-            geo_feature['properties'] = properties
-
-            # Add polygon geometry
-            points = []
-            for segment in volume['boundary']:
-                if 'line' in segment:
-                    points.extend(do_line(segment['line']))
-                elif 'arc' in segment:
-                    points.extend(do_arc(segment['arc'], points[-1],
-                                         resolution))
-                elif 'circle' in segment:
-                    points = do_circle(segment['circle'], resolution)
-
-            # Close the polygon
-            if points[0] != points[-1]:
-                points.append(points[0])
-
-            # Add feature to feature list
-            geo_feature['geometry'] = {
-                'type': "Polygon",
-                'coordinates': [points]
-            }
-            geo_features.append(geo_feature)
-
-    collection = {
+# Polygon points, (lon, lat), for volume boundary. The polygon is closed
+def boundary_points(boundary, resolution=15):
+    points = []
+    for segment in boundary:
+        if 'line' in segment:
+            points.extend(do_line(segment['line']))
+        elif 'arc' in segment:
+            points.extend(do_arc(segment['arc'], points[-1], resolution))
+        elif 'circle' in segment:
+            points = do_circle(segment['circle'], resolution)
+
+    # Close the polygon
+    if points[0] != points[-1]:
+        points.append(points[0])
+
+    return points
+
+# GeoJSON feature for a volume, optionally clipped to a polygon of
+# (lon, lat) points. Returns None if the clipped volume is empty, and a
+# MultiPolygon if clipping splits the volume. Polygon points can be
+# given, e.g. if calculated in another process
+def volume_feature(volume, feature, resolution=15, clip=None, points=None):
+    # Create new GeoJSON feature
+    geo_feature = {'type': "Feature"}
+
+    # Add properties
+    name =  volume.get('name') or feature.get('name')
+    if 'seqno' in volume:
+        name = "{} {}".format(name, volume['seqno'])
+    properties = {
+        'name': name,
+        'lower': volume['lower'],
+        'upper': volume['upper'],
+        'type' : feature['type'],
+        'normlower': level(volume['lower'])
+    }
+
+    cls = volume.get('class') or feature.get('class')
+    if cls:
+        properties['class'] = cls
+
+    if feature.get('localtype'):
+        properties['localtype'] = feature.get('localtype')
+
+    rules = feature.get('rules', []) + volume.get('rules', [])
+    if rules:
+        properties['rules'] = rules
+
+    geo_feature['properties'] = properties
+
+    # Add polygon geometry
+    if points is None:
+        points = boundary_points(volume['boundary'], resolution)
+    if clip:
+        polygons = [p + [p[0]] for p in clip_polygon(points[:-1], clip)
+                    if len(p) > 2]
+        if not polygons:
+            return None
+    else:
+        polygons = [points]
+
+    # Add polygon to feature
+    if len(polygons) == 1:
+        geo_feature['geometry'] = {
+            'type': "Polygon",
+            'coordinates': polygons
+        }
+    else:
+        geo_feature['geometry'] = {
+            'type': "MultiPolygon",
+            'coordinates': [[p] for p in polygons]
+        }
+
+    return geo_feature
+
+# Boundary as tuples of strings, to send to worker processes
+def compact_boundary(boundary):
+    result = []
+    for segment in boundary:
+        if 'line' in segment:
+            result.append(("line", tuple(segment['line'])))
+        elif 'arc' in segment:
+            arc = segment['arc']
+            result.append(("arc", arc['centre'], arc['radius'], arc['to'],
+                           arc['dir']))
+        else:
+            circle = segment['circle']
+            result.append(("circle", circle['centre'], circle['radius']))
+    return tuple(result)
+
+def expand_boundary(boundary):
+    result = []
+    for segment in boundary:
+        if segment[0] == "line":
+            result.append({'line': list(segment[1])})
+        elif segment[0] == "arc":
+            result.append({'arc': {'centre': segment[1], 'radius': segment[2],
+                                   'to': segment[3], 'dir': segment[4]}})
+        else:
+            result.append({'circle': {'centre': segment[1],
+                                      'radius': segment[2]}})
+    return result
+
+def _chunk_points(args):
+    boundaries, resolution = args
+    return [boundary_points(expand_boundary(b), resolution)
+            for b in boundaries]
+
+# Polygon points for each boundary, calculated by a pool of jobs worker
+# processes. Results are in boundary order
+def parallel_points(boundaries, resolution=15, jobs=None, chunk_size=200):
+    from concurrent.futures import ProcessPoolExecutor
+
+    compact = [compact_boundary(b) for b in boundaries]
+    chunks = [(compact[n:n + chunk_size], resolution)
+              for n in range(0, len(compact), chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return [points for result in executor.map(_chunk_points, chunks)
+                for points in result]
+
+# Generate GeoJSON features, one per volume. With jobs other than 1 the
+# polygons are calculated in parallel, the output is the same
+def iter_features(airspace, resolution=15, jobs=1):
+    volumes = [(volume, feature) for feature in airspace
+               for volume in feature['geometry']]
+
+    if jobs == 1:
+        for volume, feature in volumes:
+            yield volume_feature(volume, feature, resolution)
+    else:
+        points = parallel_points([v['boundary'] for v, f in volumes],
+                                 resolution, jobs)
+        for (volume, feature), p in zip(volumes, points):
+            yield volume_feature(volume, feature, resolution, points=p)
+
+# GeoJSON features for (volume, feature) pairs, optionally clipped
+def iter_volume_features(volumes, resolution=15, clip=None):
+    for volume, feature in volumes:
+        geo_feature = volume_feature(volume, feature, resolution, clip)
+        if geo_feature:
+            yield geo_feature
+
+def _collection(geo_features):
+    return {
         'type': "FeatureCollection",
         'name': "UKAIR",
         'features': geo_features
     }
 
-    return collection
+def geojson(airspace, resolution=15, jobs=1):
+    return _collection(list(iter_features(airspace, resolution, jobs)))
+
+# GeoJSON for (volume, feature) pairs, optionally clipped
+def geojson_volumes(volumes, resolution=15, clip=None):
+    return _collection(list(iter_volume_features(volumes, resolution, clip)))
@@ -0,0 +1,756 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Planar geometry of airspace volume boundaries.
+#
+# Each volume is projected onto a plane (x east, y north, in nm) with an
+# equirectangular projection about its own reference point, and its
+# boundary is held as exact line, arc and circle edges - arcs are not
+# densified. Over the size of a UK airspace volume the projection error
+# is small (about 0.1% at 50 nm from the reference point), and lines
+# between points (and route legs) are treated as straight in the
+# projection rather than as great circles.
+#
+# A polygon with arcs is the "chord polygon" through its vertices with
+# the circular segment between each arc and its chord toggled in or out
+# (i.e. the symmetric difference), which handles arcs bulging either
+# inwards or outwards.
+
+import functools
+import math
+
+from .helpers import parse_latlon, NM_TO_DEGREES
+
+EARTH_RADIUS_NM = 3440.065
+KM_TO_NM = 1 / 1.852
+
+TWO_PI = 2 * math.pi
+
+# Tolerance for coincident points, in nm
+EPSILON = 1e-9
+
+# Boundary points are shared between volumes, and shapes are rebuilt in
+# other projections for comparison, so parsed points are cached
+_parse_latlon = functools.lru_cache(maxsize=65536)(parse_latlon)
+
+# Radius string, nm or km, as nm
+def radius_nm(radius):
+    dist, unit = radius.split()
+    return float(dist) * KM_TO_NM if unit == "km" else float(dist)
+
+# Great circle distance between points, in nm
+def haversine(lat1, lon1, lat2, lon2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * \
+        math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * math.asin(min(1, math.sqrt(a)))
+
+# WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_E2 = 6.69437999014e-3
+
+# Meridional and prime vertical radii of curvature (m) at latitude
+def _wgs84_radii(lat):
+    s2 = math.sin(math.radians(lat)) ** 2
+    w = math.sqrt(1 - WGS84_E2 * s2)
+    return WGS84_A * (1 - WGS84_E2) / w ** 3, WGS84_A / w
+
+# Point at distance (m) and bearing (degrees) from lat/lon. Uses a sphere
+# with the ellipsoid's mean radius of curvature at the start point, with
+# latitude and longitude differences scaled to the ellipsoid. For
+# distances of tens of km this is within a metre or so of the geodesic
+def destination(lat, lon, distance, bearing):
+    m, n = _wgs84_radii(lat)
+    r = math.sqrt(m * n)
+
+    phi1 = math.radians(lat)
+    theta = math.radians(bearing)
+    delta = distance / r
+
+    phi2 = math.asin(math.sin(phi1) * math.cos(delta) +
+                     math.cos(phi1) * math.sin(delta) * math.cos(theta))
+    dlam = math.atan2(math.sin(theta) * math.sin(delta) * math.cos(phi1),
+                      math.cos(delta) - math.sin(phi1) * math.sin(phi2))
+
+    return (lat + math.degrees(phi2 - phi1) * r / m,
+            lon + math.degrees(dlam) * r / n)
+
+# Bearing (degrees, 0 - 360) from one lat/lon to another, the inverse of
+# destination()
+def bearing(lat1, lon1, lat2, lon2):
+    m, n = _wgs84_radii(lat1)
+    r = math.sqrt(m * n)
+
+    phi1 = math.radians(lat1)
+    phi2 = phi1 + math.radians(lat2 - lat1) * m / r
+    dlam = math.radians(lon2 - lon1) * n / r
+
+    return math.degrees(math.atan2(
+        math.sin(dlam) * math.cos(phi2),
+        math.cos(phi1) * math.sin(phi2) -
+        math.sin(phi1) * math.cos(phi2) * math.cos(dlam))) % 360
+
+# Polygon of (lon, lat) points for a volume boundary, closed, with arcs
+# and circles at the given angular resolution (per 90 degrees). Points
+# are as for GeoJSON output, but using destination() and bearing()
+# rather than the (much slower) Vincenty formulae
+def polygon_points(boundary, resolution=15):
+    points = []
+    for segment in boundary:
+        if 'line' in segment:
+            points.extend(_parse_latlon(p)[::-1] for p in segment['line'])
+        elif 'circle' in segment:
+            circle = segment['circle']
+            lat, lon = _parse_latlon(circle['centre'])
+            radius = radius_nm(circle['radius']) * 1852
+            points = []
+            for i in range(resolution * 4):
+                dest = destination(lat, lon, radius, i * 90 / resolution)
+                points.append(dest[::-1])
+        elif 'arc' in segment:
+            arc = segment['arc']
+            lat, lon = _parse_latlon(arc['centre'])
+            radius = radius_nm(arc['radius']) * 1852
+            to_lat, to_lon = _parse_latlon(arc['to'])
+
+            bearing_from = bearing(lat, lon, points[-1][1], points[-1][0])
+            bearing_to = bearing(lat, lon, to_lat, to_lon)
+            arc_len = (bearing_to - bearing_from) % 360
+            if arc['dir'] == "ccw":
+                arc_len = 360 - arc_len
+
+            num_incs = round(arc_len / (90 / resolution))
+            if num_incs > 0:
+                delta = arc_len / num_incs
+                if arc['dir'] == "ccw":
+                    delta = -delta
+                for i in range(1, num_incs):
+                    dest = destination(lat, lon, radius,
+                                       bearing_from + i * delta)
+                    points.append(dest[::-1])
+
+            points.append((to_lon, to_lat))
+
+    if points[0] != points[-1]:
+        points.append(points[0])
+
+    return points
+
+# Local equirectangular projection, nm from reference point
+class Projection():
+    def __init__(self, lat0, lon0):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        self.kx = math.cos(math.radians(lat0)) / NM_TO_DEGREES
+        self.ky = 1 / NM_TO_DEGREES
+
+    def xy(self, lat, lon):
+        # Longitude difference in range -180 to 180
+        dlon = (lon - self.lon0 + 180) % 360 - 180
+        return (dlon * self.kx, (lat - self.lat0) * self.ky)
+
+    def latlon(self, x, y):
+        return (self.lat0 + y / self.ky, self.lon0 + x / self.kx)
+
+# Straight edge
+class Line():
+    def __init__(self, p0, p1):
+        self.p0 = p0
+        self.p1 = p1
+
+    # Parameter values (0-1) where segment p-q crosses the edge
+    def crossings(self, p, q):
+        (x0, y0), (x1, y1) = self.p0, self.p1
+        dx, dy = q[0] - p[0], q[1] - p[1]
+        ex, ey = x1 - x0, y1 - y0
+
+        denom = dx * ey - dy * ex
+        if abs(denom) < EPSILON:
+            return []
+
+        wx, wy = x0 - p[0], y0 - p[1]
+        t = (wx * ey - wy * ex) / denom
+        u = (wx * dy - wy * dx) / denom
+        if 0 <= t <= 1 and 0 <= u <= 1:
+            return [t]
+        return []
+
+    # Mid-points of the pieces of the edge between crossings with other
+    # edges
+    def midpoints(self, edges):
+        ts = {0.0, 1.0}
+        for edge in edges:
+            ts.update(edge.crossings(self.p0, self.p1))
+        ts = sorted(ts)
+
+        (x0, y0), (x1, y1) = self.p0, self.p1
+        return [(x0 + (x1 - x0) * (t0 + t1) / 2, y0 + (y1 - y0) * (t0 + t1) / 2)
+                for t0, t1 in zip(ts, ts[1:]) if t1 - t0 > 1e-12]
+
+    # Distance from point to the edge
+    def distance(self, p):
+        (x0, y0), (x1, y1) = self.p0, self.p1
+        ex, ey = x1 - x0, y1 - y0
+        length2 = ex * ex + ey * ey
+
+        t = 0.0
+        if length2 > 0:
+            t = max(0.0, min(1.0, ((p[0] - x0) * ex + (p[1] - y0) * ey) /
+                                  length2))
+        return math.hypot(p[0] - (x0 + t * ex), p[1] - (y0 + t * ey))
+
+# Circle, or arc from p0 to p1 with signed angular sweep (positive
+# anti-clockwise)
+class Arc():
+    def __init__(self, centre, radius, p0=None, p1=None, cw=True):
+        self.centre = centre
+        self.radius = radius
+        self.p0 = p0
+        self.p1 = p1
+
+        if p0 is None:
+            # Full circle
+            self.start = 0.0
+            self.sweep = TWO_PI
+        else:
+            self.start = self.angle(p0)
+            end = self.angle(p1)
+            if cw:
+                self.sweep = -((self.start - end) % TWO_PI or TWO_PI)
+            else:
+                self.sweep = (end - self.start) % TWO_PI or TWO_PI
+
+    def angle(self, p):
+        return math.atan2(p[1] - self.centre[1], p[0] - self.centre[0])
+
+    def point(self, angle):
+        return (self.centre[0] + self.radius * math.cos(angle),
+                self.centre[1] + self.radius * math.sin(angle))
+
+    def is_circle(self):
+        return self.p0 is None
+
+    # True if direction from centre is within the arc
+    def on_arc(self, angle):
+        if self.sweep >= 0:
+            return (angle - self.start) % TWO_PI <= self.sweep + EPSILON
+        else:
+            return (self.start - angle) % TWO_PI <= -self.sweep + EPSILON
+
+    # Parameter values (0-1) where segment p-q crosses the arc
+    def crossings(self, p, q):
+        cx, cy = self.centre
+        dx, dy = q[0] - p[0], q[1] - p[1]
+        fx, fy = p[0] - cx, p[1] - cy
+
+        a = dx * dx + dy * dy
+        if a < EPSILON:
+            return []
+        b = 2 * (fx * dx + fy * dy)
+        c = fx * fx + fy * fy - self.radius * self.radius
+
+        disc = b * b - 4 * a * c
+        if disc < 0:
+            return []
+
+        sq = math.sqrt(disc)
+        ts = []
+        for t in [(-b - sq) / (2 * a), (-b + sq) / (2 * a)]:
+            if 0 <= t <= 1:
+                x, y = fx + t * dx, fy + t * dy
+                if self.on_arc(math.atan2(y, x)):
+                    ts.append(t)
+        return ts
+
+    # Points where another edge crosses the arc
+    def edge_crossings(self, edge):
+        if isinstance(edge, Line):
+            p, q = edge.p0, edge.p1
+            return [(p[0] + t * (q[0] - p[0]), p[1] + t * (q[1] - p[1]))
+                    for t in self.crossings(p, q)]
+
+        return [p for p in circle_intersections(self.centre, self.radius,
+                                                edge.centre, edge.radius)
+                if self.on_arc(self.angle(p)) and edge.on_arc(edge.angle(p))]
+
+    # Mid-points of the pieces of the arc between crossings with other
+    # edges
+    def midpoints(self, edges):
+        sweep = abs(self.sweep)
+        fs = {0.0, 1.0}
+        for edge in edges:
+            for p in self.edge_crossings(edge):
+                da = self.angle(p) - self.start
+                if self.sweep < 0:
+                    da = -da
+                fs.add(min(da % TWO_PI, sweep) / sweep)
+        fs = sorted(fs)
+
+        return [self.point(self.start + self.sweep * (f0 + f1) / 2)
+                for f0, f1 in zip(fs, fs[1:]) if f1 - f0 > 1e-12]
+
+    # Distance from point to the arc, radially if the point is within the
+    # arc's sweep, otherwise to the nearer end point
+    def distance(self, p):
+        dx, dy = p[0] - self.centre[0], p[1] - self.centre[1]
+        if self.is_circle() or self.on_arc(math.atan2(dy, dx)):
+            return abs(math.hypot(dx, dy) - self.radius)
+
+        return min(math.hypot(p[0] - self.p0[0], p[1] - self.p0[1]),
+                   math.hypot(p[0] - self.p1[0], p[1] - self.p1[1]))
+
+    # True if point is in the circular segment between arc and chord
+    def in_segment(self, p):
+        cx, cy = self.centre
+        if (p[0] - cx) ** 2 + (p[1] - cy) ** 2 > self.radius ** 2:
+            return False
+        if self.is_circle():
+            return True
+
+        # Same side of the chord as the arc mid-point
+        mid = self.point(self.start + self.sweep / 2)
+        return _side(self.p0, self.p1, p) * _side(self.p0, self.p1, mid) > 0
+
+# Intersection points of two circles
+def circle_intersections(c0, r0, c1, r1):
+    dx, dy = c1[0] - c0[0], c1[1] - c0[1]
+    d = math.hypot(dx, dy)
+    if d < EPSILON or d > r0 + r1 or d < abs(r0 - r1):
+        return []
+
+    a = (r0 * r0 - r1 * r1 + d * d) / (2 * d)
+    h = math.sqrt(max(r0 * r0 - a * a, 0))
+    mx, my = c0[0] + a * dx / d, c0[1] + a * dy / d
+    return [(mx + h * dy / d, my - h * dx / d),
+            (mx - h * dy / d, my + h * dx / d)]
+
+# Points where two edges cross
+def intersections(edge1, edge2):
+    if isinstance(edge1, Arc):
+        return edge1.edge_crossings(edge2)
+
+    p, q = edge1.p0, edge1.p1
+    return [(p[0] + t * (q[0] - p[0]), p[1] + t * (q[1] - p[1]))
+            for t in edge2.crossings(p, q)]
+
+def _side(a, b, p):
+    return (b[0] - a[0]) * (p[1] - a[1]) - (b[1] - a[1]) * (p[0] - a[0])
+
+# True if point is inside polygon (crossing number)
+def in_polygon(vertices, p):
+    x, y = p
+    inside = False
+    n = len(vertices)
+    for i in range(n):
+        x0, y0 = vertices[i - 1]
+        x1, y1 = vertices[i]
+        if (y0 > y) != (y1 > y):
+            if x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+                inside = not inside
+    return inside
+
+# Vertex of polygon being clipped, in a circular doubly linked list
+class _ClipNode():
+    def __init__(self, p, alpha=0, intersect=False, out=None):
+        self.p = p
+        self.out = out or p
+        self.alpha = alpha
+        self.intersect = intersect
+        self.entry = False
+        self.visited = False
+        self.neighbour = None
+        self.next = self.prev = self
+
+    def insert_after(self, node):
+        node.prev, node.next = self, self.next
+        self.next.prev = node
+        self.next = node
+
+# Raised when a vertex of one polygon lies on an edge of the other
+class _Degenerate(Exception):
+    pass
+
+# Crossings of polygons a and b, as maps of edge (index of end vertex)
+# to crossing nodes, or None if the polygons don't cross. Only edges of b
+# overlapping the bounding box of a are tested
+def _crossings(a, b):
+    xs = [p[0] for p in a]
+    ys = [p[1] for p in a]
+    xmin, xmax, ymin, ymax = min(xs), max(xs), min(ys), max(ys)
+
+    b_edges = []
+    for j in range(len(b)):
+        c, d = b[j - 1], b[j]
+        if max(c[0], d[0]) >= xmin and min(c[0], d[0]) <= xmax and \
+                max(c[1], d[1]) >= ymin and min(c[1], d[1]) <= ymax:
+            b_edges.append(j)
+
+    a_cross = {}
+    b_cross = {}
+    for i in range(len(a)):
+        p, q = a[i - 1], a[i]
+        ex0, ex1 = min(p[0], q[0]), max(p[0], q[0])
+        ey0, ey1 = min(p[1], q[1]), max(p[1], q[1])
+        for j in b_edges:
+            c, d = b[j - 1], b[j]
+            if max(c[0], d[0]) < ex0 or min(c[0], d[0]) > ex1 or \
+                    max(c[1], d[1]) < ey0 or min(c[1], d[1]) > ey1:
+                continue
+
+            r = (q[0] - p[0], q[1] - p[1])
+            s = (d[0] - c[0], d[1] - c[1])
+            w = (c[0] - p[0], c[1] - p[1])
+            den = r[0] * s[1] - r[1] * s[0]
+            scale = math.hypot(*r) * math.hypot(*s)
+            if abs(den) <= EPSILON * scale:
+                # Parallel, degenerate if collinear and overlapping
+                if abs(w[0] * r[1] - w[1] * r[0]) <= EPSILON * scale:
+                    raise _Degenerate()
+                continue
+
+            t = (w[0] * s[1] - w[1] * s[0]) / den
+            u = (w[0] * r[1] - w[1] * r[0]) / den
+            if -EPSILON <= t <= 1 + EPSILON and -EPSILON <= u <= 1 + EPSILON:
+                if min(t, u) <= EPSILON or max(t, u) >= 1 - EPSILON:
+                    raise _Degenerate()
+
+                x = (p[0] + t * r[0], p[1] + t * r[1])
+                na = _ClipNode(x, t, True)
+                nb = _ClipNode(x, u, True)
+                na.neighbour, nb.neighbour = nb, na
+                a_cross.setdefault(i, []).append(na)
+                b_cross.setdefault(j, []).append(nb)
+
+    if not a_cross:
+        return None
+
+    return a_cross, b_cross
+
+# Linked list of polygon vertices, with crossings inserted in order.
+# Output points for the vertices are from original, if given
+def _linked(points, crossings, original=None):
+    original = original or points
+    head = node = _ClipNode(points[0], out=original[0])
+    for i in range(1, len(points) + 1):
+        for x in sorted(crossings.get(i % len(points), []),
+                        key=lambda n: n.alpha):
+            node.insert_after(x)
+            node = x
+        if i < len(points):
+            node.insert_after(_ClipNode(points[i], out=original[i]))
+            node = node.next
+
+    return head
+
+# Mark crossings as entering or leaving the other polygon
+def _mark_entries(head, other):
+    inside = in_polygon(other, head.p)
+    node = head
+    while True:
+        if node.intersect:
+            node.entry = not inside
+            inside = not inside
+        node = node.next
+        if node is head:
+            break
+
+# Intersection of two simple polygons (Greiner-Hormann). Points are (x, y)
+# pairs, neither polygon closed. Returns list of polygons (there may be
+# several, none if the polygons don't intersect).
+#
+# If a vertex of one polygon lies on an edge of the other the clipped
+# polygon is shifted by a small fraction of its size and clipped again
+def clip_polygon(points, clip, shift=1e-9):
+    size = max(max(p[0] for p in points) - min(p[0] for p in points),
+               max(p[1] for p in points) - min(p[1] for p in points))
+
+    for attempt in range(10):
+        dx = shift * size * attempt
+        subject = [(x + dx, y + 0.7 * dx) for x, y in points]
+        try:
+            crossings = _crossings(subject, clip)
+            break
+        except _Degenerate:
+            pass
+    else:
+        raise ValueError("Can't clip degenerate polygons")
+
+    if crossings is None:
+        # No crossings, one polygon may be inside the other
+        if in_polygon(clip, subject[0]):
+            return [list(points)]
+        elif in_polygon(subject, clip[0]):
+            return [list(clip)]
+        else:
+            return []
+
+    subject_head = _linked(subject, crossings[0], points)
+    clip_head = _linked(clip, crossings[1])
+    _mark_entries(subject_head, clip)
+    _mark_entries(clip_head, subject)
+
+    result = []
+    node = subject_head
+    while True:
+        if node.intersect and not node.visited:
+            start = current = node
+            polygon = []
+            while True:
+                polygon.append(current.out)
+                current.visited = current.neighbour.visited = True
+                forward = current.entry
+                current = current.next if forward else current.prev
+                while not current.intersect:
+                    polygon.append(current.out)
+                    current = current.next if forward else current.prev
+
+                if current is start or current.neighbour is start:
+                    break
+                current = current.neighbour
+
+            result.append(polygon)
+
+        node = node.next
+        if node is subject_head:
+            break
+
+    return result
+
+# Volume boundary in local projection
+#
+# The projection's reference point is the first point of the boundary
+# (or the circle centre), unless a projection is given, e.g. to compare
+# two shapes
+class Shape():
+    def __init__(self, boundary, projection=None):
+        self.edges = []
+        self.arcs = []
+        self.vertices = []
+
+        first = boundary[0]
+        if 'circle' in first:
+            lat, lon = _parse_latlon(first['circle']['centre'])
+            self.projection = projection or Projection(lat, lon)
+            arc = Arc(self.projection.xy(lat, lon),
+                      radius_nm(first['circle']['radius']))
+            self.edges.append(arc)
+            self.arcs.append(arc)
+        else:
+            self.projection = projection or \
+                    Projection(*_parse_latlon(first['line'][0]))
+            self._add_boundary(boundary)
+
+        self._set_bbox()
+
+    def xy(self, latlon):
+        return self.projection.xy(*_parse_latlon(latlon))
+
+    def _add_vertex(self, p):
+        if self.vertices:
+            last = self.vertices[-1]
+            if abs(last[0] - p[0]) < EPSILON and abs(last[1] - p[1]) < EPSILON:
+                return False
+        self.vertices.append(p)
+        return True
+
+    def _add_boundary(self, boundary):
+        for segment in boundary:
+            if 'line' in segment:
+                for point in segment['line']:
+                    p = self.xy(point)
+                    prev = self.vertices[-1] if self.vertices else None
+                    if self._add_vertex(p) and prev is not None:
+                        self.edges.append(Line(prev, p))
+            elif 'arc' in segment:
+                arc = segment['arc']
+                p0 = self.vertices[-1]
+                p1 = self.xy(arc['to'])
+                edge = Arc(self.xy(arc['centre']), radius_nm(arc['radius']),
+                           p0, p1, arc.get('dir', "cw") == "cw")
+                self.edges.append(edge)
+                self.arcs.append(edge)
+                if not self._add_vertex(p1):
+                    # Full circle arc, back to the same point
+                    self.vertices.append(p1)
+
+        # Close boundary
+        first, last = self.vertices[0], self.vertices[-1]
+        if abs(first[0] - last[0]) > EPSILON or \
+           abs(first[1] - last[1]) > EPSILON:
+            self.edges.append(Line(last, first))
+        elif len(self.vertices) > 1:
+            self.vertices.pop()
+
+    # Projected bounding box (xmin, ymin, xmax, ymax) and lat/lon bounding
+    # box (south, west, north, east)
+    def _set_bbox(self):
+        xs = [v[0] for v in self.vertices]
+        ys = [v[1] for v in self.vertices]
+        for arc in self.arcs:
+            cx, cy = arc.centre
+            xs.extend([cx - arc.radius, cx + arc.radius])
+            ys.extend([cy - arc.radius, cy + arc.radius])
+
+        self.bbox = (min(xs), min(ys), max(xs), max(ys))
+
+        proj = self.projection
+        south, west = proj.latlon(self.bbox[0], self.bbox[1])
+        north, east = proj.latlon(self.bbox[2], self.bbox[3])
+        self.latlon_bbox = (south, west, north, east)
+
+    # True if projected point is inside the boundary
+    def contains_xy(self, p):
+        x, y = p
+        xmin, ymin, xmax, ymax = self.bbox
+        if x < xmin or x > xmax or y < ymin or y > ymax:
+            return False
+
+        inside = in_polygon(self.vertices, p) if len(self.vertices) > 2 \
+                 else False
+        for arc in self.arcs:
+            if arc.in_segment(p):
+                inside = not inside
+        return inside
+
+    def contains(self, lat, lon):
+        return self.contains_xy(self.projection.xy(lat, lon))
+
+    # Lower bound for the distance from projected point to the boundary,
+    # zero inside the bounding box
+    def bbox_distance_xy(self, p):
+        xmin, ymin, xmax, ymax = self.bbox
+        dx = max(xmin - p[0], 0, p[0] - xmax)
+        dy = max(ymin - p[1], 0, p[1] - ymax)
+        return math.hypot(dx, dy)
+
+    # Distance from projected point to the boundary
+    def distance_xy(self, p):
+        return min(edge.distance(p) for edge in self.edges)
+
+    # Distance (nm) from lat/lon point to the boundary
+    def distance(self, lat, lon):
+        return self.distance_xy(self.projection.xy(lat, lon))
+
+    # Intervals (t0, t1), as fractions of the projected segment p-q, which
+    # are inside the boundary
+    def intervals_xy(self, p, q):
+        ts = {0.0, 1.0}
+        for edge in self.edges:
+            ts.update(edge.crossings(p, q))
+        ts = sorted(ts)
+
+        intervals = []
+        for t0, t1 in zip(ts, ts[1:]):
+            if t1 - t0 < 1e-12:
+                continue
+
+            tm = (t0 + t1) / 2
+            mid = (p[0] + tm * (q[0] - p[0]), p[1] + tm * (q[1] - p[1]))
+            if self.contains_xy(mid):
+                if intervals and abs(intervals[-1][1] - t0) < 1e-12:
+                    intervals[-1] = (intervals[-1][0], t1)
+                else:
+                    intervals.append((t0, t1))
+
+        return intervals
+
+    # Mid-points of the pieces of the boundary between crossings with
+    # another shape's boundary (in the same projection)
+    def midpoints(self, other):
+        points = []
+        for edge in self.edges:
+            points.extend(edge.midpoints(other.edges))
+        return points
+
+    # Compare with another shape (in the same projection), points within
+    # tolerance (nm) of a boundary are on it. Returns "overlap" if the
+    # interiors overlap, "coincident" if the boundaries are the same, or
+    # None if the shapes are separate or only touch
+    def compare(self, other, tolerance):
+        coincident = True
+        for s1, s2 in [(self, other), (other, self)]:
+            for p in s1.midpoints(s2):
+                if s2.distance_xy(p) > tolerance:
+                    coincident = False
+                    if s2.contains_xy(p):
+                        return "overlap"
+
+        return "coincident" if coincident else None
+
+    # Area, in square nm. The chord polygon area (shoelace) plus the signed
+    # area of each circular segment, r^2 / 2 * (theta - sin(theta)), with
+    # a first order correction for the projection's scale at the area's
+    # centroid
+    def area(self):
+        area = 0.0
+        moment = 0.0
+        for edge in self.edges:
+            if edge.p0 is not None:
+                (x0, y0), (x1, y1) = edge.p0, edge.p1
+                cross = x0 * y1 - x1 * y0
+                area += cross / 2
+                moment += (y0 + y1) * cross / 6
+
+            if isinstance(edge, Arc):
+                theta = edge.sweep
+                segment = edge.radius ** 2 / 2 * (theta - math.sin(theta))
+                area += segment
+
+                # Segment centroid is on the arc's bisector
+                a = abs(theta)
+                if a - math.sin(a) > EPSILON:
+                    d = 4 * edge.radius * math.sin(a / 2) ** 3 / \
+                        (3 * (a - math.sin(a)))
+                else:
+                    d = edge.radius
+                cy = edge.centre[1] + d * math.sin(edge.start + theta / 2)
+                moment += segment * cy
+
+        if area == 0:
+            return 0.0
+
+        proj = self.projection
+        lat_c = proj.lat0 + moment / area / proj.ky
+        return abs(area) * math.cos(math.radians(lat_c)) / \
+               math.cos(math.radians(proj.lat0))
+
+    # Perimeter, in nm. Lines are great circle distances and arcs are
+    # measured about their own centre
+    def perimeter(self):
+        proj = self.projection
+        perimeter = 0.0
+        for edge in self.edges:
+            if isinstance(edge, Arc):
+                if edge.is_circle():
+                    perimeter += TWO_PI * edge.radius
+                else:
+                    centre = Projection(*proj.latlon(*edge.centre))
+                    arc = Arc((0.0, 0.0), edge.radius,
+                              centre.xy(*proj.latlon(*edge.p0)),
+                              centre.xy(*proj.latlon(*edge.p1)),
+                              edge.sweep < 0)
+                    perimeter += edge.radius * abs(arc.sweep)
+            else:
+                perimeter += haversine(*proj.latlon(*edge.p0),
+                                       *proj.latlon(*edge.p1))
+        return perimeter
+
+    # Inside intervals of segment between lat/lon points
+    def intervals(self, lat0, lon0, lat1, lon1):
+        proj = self.projection
+        return self.intervals_xy(proj.xy(lat0, lon0), proj.xy(lat1, lon1))
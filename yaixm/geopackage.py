@@ -0,0 +1,265 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# SQLite export, as a GeoPackage.
+#
+# Tables are:
+#
+#   feature  - feature attributes
+#   volume   - volume attributes, normalised levels and polygon geometry
+#              (densified as for GeoJSON, see geometry.polygon_points)
+#   obstacle - obstacle attributes and point geometry
+#
+# with an R*Tree index, rtree_volume_geom, on volume bounding boxes (as
+# the GeoPackage R-tree extension, without the triggers which maintain it
+# when the table is changed) and indexes on id, type, localtype and
+# normalised levels. Geometry is WGS84 in GeoPackage binary format.
+#
+# Rows are inserted in batches, in a single transaction.
+
+import os
+import sqlite3
+import struct
+
+from .convert import seq_name, OBSTACLE_TYPES
+from .geometry import polygon_points
+from .helpers import parse_latlon, level
+
+# Rows per executemany() call
+BATCH_SIZE = 1000
+
+# GeoPackage application id ("GPKG") and version (1.2)
+APPLICATION_ID = 0x47504B47
+USER_VERSION = 10200
+
+SRS_ID = 4326
+
+SCHEMA = """
+CREATE TABLE gpkg_spatial_ref_sys (
+    srs_name TEXT NOT NULL,
+    srs_id INTEGER NOT NULL PRIMARY KEY,
+    organization TEXT NOT NULL,
+    organization_coordsys_id INTEGER NOT NULL,
+    definition TEXT NOT NULL,
+    description TEXT);
+CREATE TABLE gpkg_contents (
+    table_name TEXT NOT NULL PRIMARY KEY,
+    data_type TEXT NOT NULL,
+    identifier TEXT UNIQUE,
+    description TEXT DEFAULT '',
+    last_change DATETIME NOT NULL
+        DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE,
+    srs_id INTEGER);
+CREATE TABLE gpkg_geometry_columns (
+    table_name TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    geometry_type_name TEXT NOT NULL,
+    srs_id INTEGER NOT NULL,
+    z TINYINT NOT NULL,
+    m TINYINT NOT NULL,
+    CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name));
+CREATE TABLE gpkg_extensions (
+    table_name TEXT,
+    column_name TEXT,
+    extension_name TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    scope TEXT NOT NULL);
+
+CREATE TABLE feature (
+    fid INTEGER PRIMARY KEY,
+    id TEXT,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    localtype TEXT,
+    class TEXT,
+    rules TEXT);
+CREATE TABLE volume (
+    fid INTEGER PRIMARY KEY,
+    geom POLYGON,
+    feature_fid INTEGER NOT NULL REFERENCES feature(fid),
+    id TEXT,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    localtype TEXT,
+    class TEXT,
+    rules TEXT,
+    lower TEXT NOT NULL,
+    upper TEXT NOT NULL,
+    normlower INTEGER NOT NULL,
+    normupper INTEGER NOT NULL);
+CREATE TABLE obstacle (
+    fid INTEGER PRIMARY KEY,
+    geom POINT,
+    id TEXT,
+    name TEXT,
+    type TEXT NOT NULL,
+    elevation TEXT NOT NULL,
+    normelevation INTEGER NOT NULL);
+CREATE VIRTUAL TABLE rtree_volume_geom
+    USING rtree(id, minx, maxx, miny, maxy);
+"""
+
+INDEXES = """
+CREATE INDEX feature_id ON feature(id);
+CREATE INDEX feature_type ON feature(type, localtype);
+CREATE INDEX volume_id ON volume(id);
+CREATE INDEX volume_type ON volume(type);
+CREATE INDEX volume_localtype ON volume(localtype);
+CREATE INDEX volume_level ON volume(normlower, normupper);
+CREATE INDEX obstacle_id ON obstacle(id);
+"""
+
+SPATIAL_REF_SYS = [
+    ("Undefined cartesian SRS", -1, "NONE", -1, "undefined", None),
+    ("Undefined geographic SRS", 0, "NONE", 0, "undefined", None),
+    ("WGS 84 geodetic", 4326, "EPSG", 4326,
+     'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,'
+     '298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],'
+     'PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],'
+     'UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],'
+     'AUTHORITY["EPSG","4326"]]', "longitude/latitude in decimal degrees")
+]
+
+RTREE_EXTENSION = "http://www.geopackage.org/spec120/#extension_rtree"
+
+# GeoPackage binary polygon (single ring of (lon, lat) points) and its
+# envelope (min x, max x, min y, max y)
+def polygon_blob(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    envelope = (min(xs), max(xs), min(ys), max(ys))
+
+    # Header, little endian with xy envelope
+    header = struct.pack("<2sBBi4d", b"GP", 0, 0x03, SRS_ID, *envelope)
+    wkb = struct.pack("<BIII", 1, 3, 1, len(points)) + \
+          struct.pack("<%dd" % (2 * len(points)),
+                      *[c for p in points for c in p])
+    return header + wkb, envelope
+
+# GeoPackage binary point, no envelope
+def point_blob(lon, lat):
+    return struct.pack("<2sBBi", b"GP", 0, 0x01, SRS_ID) + \
+           struct.pack("<BIdd", 1, 1, lon, lat)
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _rules(rules):
+    return ",".join(rules) if rules else None
+
+# Write airspace (and optionally obstacles) to new GeoPackage file,
+# replacing any existing file
+def write_geopackage(path, airspace, obstacles=None, resolution=15):
+    volumes = [(volume, feature) for feature in airspace
+               for volume in feature['geometry']]
+    polygons = [polygon_points(v['boundary'], resolution) for v, f in volumes]
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    db = sqlite3.connect(path)
+    try:
+        db.execute("PRAGMA application_id = %d" % APPLICATION_ID)
+        db.execute("PRAGMA user_version = %d" % USER_VERSION)
+        db.execute("PRAGMA journal_mode = OFF")
+        db.execute("PRAGMA synchronous = OFF")
+        db.executescript(SCHEMA)
+
+        with db:
+            _write(db, airspace, volumes, polygons, obstacles)
+            db.executescript(INDEXES)
+    finally:
+        db.close()
+
+def _write(db, airspace, volumes, polygons, obstacles):
+    db.executemany("INSERT INTO gpkg_spatial_ref_sys VALUES (?,?,?,?,?,?)",
+                   SPATIAL_REF_SYS)
+
+    # Features
+    fids = {}
+    rows = []
+    for fid, feature in enumerate(airspace, 1):
+        fids[id(feature)] = fid
+        rows.append((fid, feature.get('id'), feature['name'], feature['type'],
+                     feature.get('localtype'), feature.get('class'),
+                     _rules(feature.get('rules'))))
+    for batch in _batches(rows):
+        db.executemany("INSERT INTO feature VALUES (?,?,?,?,?,?,?)", batch)
+
+    # Volumes and their bounding boxes
+    def volume_rows():
+        for fid, ((volume, feature), points) in \
+                enumerate(zip(volumes, polygons), 1):
+            blob, envelope = polygon_blob(points)
+            yield ((fid, blob, fids[id(feature)], volume.get('id'),
+                    seq_name(volume, feature), feature['type'],
+                    feature.get('localtype'),
+                    volume.get('class') or feature.get('class'),
+                    _rules(feature.get('rules', []) +
+                           volume.get('rules', [])),
+                    volume['lower'], volume['upper'],
+                    level(volume['lower']), level(volume['upper'])),
+                   (fid,) + envelope)
+
+    bbox = None
+    for batch in _batches(volume_rows()):
+        db.executemany("INSERT INTO volume VALUES "
+                       "(?,?,?,?,?,?,?,?,?,?,?,?,?)", [b[0] for b in batch])
+        db.executemany("INSERT INTO rtree_volume_geom VALUES (?,?,?,?,?)",
+                       [b[1] for b in batch])
+        for row in batch:
+            env = row[1][1:]
+            bbox = env if bbox is None else \
+                   (min(bbox[0], env[0]), max(bbox[1], env[1]),
+                    min(bbox[2], env[2]), max(bbox[3], env[3]))
+
+    # Obstacles
+    def obstacle_rows():
+        for fid, obstacle in enumerate(obstacles or [], 1):
+            lat, lon = parse_latlon(obstacle['position'])
+            yield (fid, point_blob(lon, lat), obstacle.get('id'),
+                   obstacle.get('name') or
+                   OBSTACLE_TYPES.get(obstacle['type'], "OBSTACLE"),
+                   obstacle['type'], obstacle['elevation'],
+                   level(obstacle['elevation']))
+
+    for batch in _batches(obstacle_rows()):
+        db.executemany("INSERT INTO obstacle VALUES (?,?,?,?,?,?,?)", batch)
+
+    # Metadata
+    minx, maxx, miny, maxy = bbox or (None, None, None, None)
+    db.executemany(
+        "INSERT INTO gpkg_contents (table_name, data_type, identifier, "
+        "min_x, min_y, max_x, max_y, srs_id) VALUES (?,?,?,?,?,?,?,?)",
+        [("feature", "attributes", "feature", None, None, None, None, None),
+         ("volume", "features", "volume", minx, miny, maxx, maxy, SRS_ID),
+         ("obstacle", "features", "obstacle", None, None, None, None,
+          SRS_ID)])
+    db.executemany("INSERT INTO gpkg_geometry_columns VALUES (?,?,?,?,?,?)",
+                   [("volume", "geom", "POLYGON", SRS_ID, 0, 0),
+                    ("obstacle", "geom", "POINT", SRS_ID, 0, 0)])
+    db.execute("INSERT INTO gpkg_extensions VALUES (?,?,?,?,?)",
+               ("volume", "geom", "gpkg_rtree_index", RTREE_EXTENSION,
+                "write-only"))
@@ -16,25 +16,28 @@
 # along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
 
 from copy import deepcopy
+import functools
 import json as _json
-import logging
-import math
 import re
 from string import ascii_uppercase
 
-import jsonschema
-import pkg_resources
-import yaml
-try:
-    from yaml import CLoader as Loader
-except ImportError:
-    from yaml import Loader
+# Heavy modules (yaml, jsonschema) are imported on first use to keep
+# command line startup fast
 
 # Load timestamps as strings
 def timestamp_constructor(loader, node):
     return loader.construct_scalar(node)
 
-Loader.add_constructor("tag:yaml.org,2002:timestamp", timestamp_constructor)
+# YAML loader class, C version if available
+@functools.lru_cache(maxsize=None)
+def yaml_loader():
+    try:
+        from yaml import CLoader as Loader
+    except ImportError:
+        from yaml import Loader
+
+    Loader.add_constructor("tag:yaml.org,2002:timestamp", timestamp_constructor)
+    return Loader
 
 # Property order for pretty printing (follows order in AIP)
 PPRINT_PROP_LIST = [
@@ -58,45 +61,167 @@ PPRINT_PROP_LIST = [
     "position", "elevation",
 
     "notes",
+
+    "service", "callsign", "controls", "frequency", "note",
 ]
 
+# Rank of each property, for fast sorting
+PPRINT_PROP_RANK = {prop: n for n, prop in enumerate(PPRINT_PROP_LIST)}
+
 # Latitude/longitude regex
 # Pattern is: [D]DDMMSS[.s[s[s]]]H
 DMS_PATTERN = "(?P<d>[0-9]{2}|[01][0-9]{2})(?P<m>[0-5][0-9])(?P<s>[0-5][0-9](\.[0-9]{1,3})?)(?P<h>[NESW])"
 DMS_RE = re.compile(DMS_PATTERN)
 
-# Conversion factor
+# Level regex, as in the schema
+LEVEL_RE = re.compile(r"^(SFC|FL\d{2,3}|\d{1,5} (m|ft))$")
+
+# Conversion factors
 NM_TO_DEGREES = 1 / 60
+FT_TO_M = 0.3048
 
-# Load data from either YAML or JSON
-def load(stream, json=False):
+# Load data from either YAML or JSON, optionally in compact form (see
+# compact.py)
+def load(stream, json=False, compact=False):
     if json:
         if hasattr(stream, 'read'):
             data = _json.load(stream)
         else:
             data = _json.loads(stream)
     else:
-        data = yaml.load(stream, Loader=Loader)
+        import yaml
+        data = yaml.load(stream, Loader=yaml_loader())
+
+    if compact:
+        from .compact import compact as compact_data
+        data = compact_data(data)
 
     return data
 
+# Load the YAIXM JSON schema. The returned schema is shared, don't modify it
+@functools.lru_cache(maxsize=None)
+def load_schema():
+    try:
+        from importlib.resources import files
+        data = files(__package__).joinpath("data/schema.yaml").read_bytes()
+    except ImportError:
+        # Python < 3.9
+        import pkgutil
+        data = pkgutil.get_data(__package__, "data/schema.yaml")
+
+    return load(data)
+
+# Schema validator, created once
+@functools.lru_cache(maxsize=None)
+def schema_validator():
+    import jsonschema
+
+    schema = load_schema()
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema, format_checker=jsonschema.FormatChecker())
+
+# Schema definition for items in each top level list
+SECTION_DEFINITIONS = {
+    'airspace': "feature",
+    'rat': "feature",
+    'loa': "loa",
+    'obstacle': "obstacle",
+    'service': "service"
+}
+
+# Validators for top level structure (not checking list items) and for
+# items in each top level list, created once
+@functools.lru_cache(maxsize=None)
+def section_validators():
+    import jsonschema
+
+    schema = load_schema()
+    cls = jsonschema.validators.validator_for(schema)
+    format_checker = jsonschema.FormatChecker()
+
+    top_schema = dict(schema, properties={
+        k: dict(v, items={}) if 'items' in v else v
+        for k, v in schema['properties'].items()})
+    top_validator = cls(top_schema, format_checker=format_checker)
+
+    item_validators = {
+        section: cls(schema['definitions'][defn],
+                     format_checker=format_checker)
+        for section, defn in SECTION_DEFINITIONS.items()}
+
+    return top_validator, item_validators
+
+# Item description for error messages
+def item_name(section, n, item):
+    name = item.get('name') if isinstance(item, dict) else None
+    if name:
+        return "%s[%d] %s" % (section, n, name)
+    else:
+        return "%s[%d]" % (section, n)
+
 # Check airspace against schema
 def validate(yaixm):
-    schema = load(pkg_resources.resource_string(__name__, "data/schema.yaml"))
-
-    try:
-        jsonschema.validate(yaixm, schema,
-                            format_checker=jsonschema.FormatChecker())
-    except jsonschema.exceptions.ValidationError as e:
-        return e
+    from jsonschema.exceptions import best_match
 
-    return None
+    return best_match(schema_validator().iter_errors(yaixm))
 
 # Representer to list properties in fixed order
 def ordered_map_representer(dumper, data):
     return dumper.represent_mapping(
             'tag:yaml.org,2002:map',
-            sorted(data.items(), key=lambda t: PPRINT_PROP_LIST.index(t[0])))
+            sorted(data.items(), key=lambda t: PPRINT_PROP_RANK[t[0]]))
+
+# YAML dumper class with properties in fixed order, C version if available
+@functools.lru_cache(maxsize=None)
+def yaml_dumper():
+    try:
+        from yaml import CDumper as BaseDumper
+    except ImportError:
+        from yaml import Dumper as BaseDumper
+
+    from .compact import Record, Points
+
+    class Dumper(BaseDumper):
+        pass
+
+    Dumper.add_representer(dict, ordered_map_representer)
+    Dumper.add_multi_representer(Record, ordered_map_representer)
+    Dumper.add_representer(Points, Dumper.represent_list)
+    return Dumper
+
+# Pretty print YAIXM data as YAML, properties in fixed order
+def dump(data, stream=None, **kwargs):
+    import yaml
+
+    return yaml.dump(data, stream, Dumper=yaml_dumper(), **kwargs)
+
+# Generate pretty printed YAML text, one list item at a time, from YAIXM
+# data or from (section, item) pairs (e.g. from stream.iter_load). The
+# joined text is identical to dump() provided objects aren't shared
+# between items (they would be written as YAML aliases)
+def iter_dump(data, **kwargs):
+    if isinstance(data, dict):
+        pairs = []
+        for section in sorted(data, key=lambda k: PPRINT_PROP_RANK[k]):
+            value = data[section]
+            if isinstance(value, list) and value:
+                pairs.extend((section, item) for item in value)
+            else:
+                pairs.append((section, value))
+    else:
+        pairs = data
+
+    current = None
+    for section, item in pairs:
+        if section in SECTION_DEFINITIONS and not isinstance(item, list):
+            if section != current:
+                yield "%s:\n" % section
+                current = section
+            yield dump([item], **kwargs)
+        else:
+            yield dump({section: item}, **kwargs)
+            current = None
 
 # Get volume and associated feature for given volume ID
 def find_volume(airspace, vid):
@@ -211,12 +336,15 @@ def minmax_lat(volume):
 
     return min(lat_arr), max(lat_arr)
 
-# Return "normalised" level from SFC, altitude or flight level
+# Return "normalised" level (in feet) from SFC, altitude (in feet or
+# metres) or flight level
 def level(value):
     if value.startswith("FL"):
         return int(value[2:]) * 100
     elif value.endswith("ft"):
         return int(value.split()[0])
+    elif value.endswith(" m"):
+        return round(int(value.split()[0]) / FT_TO_M)
     else:
         return 0
 
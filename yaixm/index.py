@@ -0,0 +1,151 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Indexes over airspace volumes
+
+from array import array
+import bisect
+
+from .helpers import level
+
+# Level as normalised feet, from integer or level string
+def level_ft(value):
+    return value if isinstance(value, int) else level(value)
+
+# Interval tree over normalised volume lower/upper levels.
+#
+# Intervals are sorted by lower level and held in an implicit balanced
+# tree (the node for index range [l, r) is at (l + r) // 2) with the
+# maximum upper level of each subtree, so queries visit only the
+# subtrees which can contain a match.
+class LevelIndex():
+    def __init__(self, airspace):
+        self.volumes = [(volume, feature) for feature in airspace
+                        for volume in feature['geometry']]
+
+        intervals = sorted((level(v['lower']), level(v['upper']), n)
+                           for n, (v, f) in enumerate(self.volumes))
+
+        self.lower = array('l', (i[0] for i in intervals))
+        self.upper = array('l', (i[1] for i in intervals))
+        self.ids = array('l', (i[2] for i in intervals))
+        self.max_upper = array('l', self.upper)
+
+        # Iterative post-order build of subtree maximum upper levels
+        stack = [(0, len(self.ids), False)]
+        while stack:
+            l, r, done = stack.pop()
+            if l >= r:
+                continue
+
+            m = (l + r) // 2
+            if done:
+                for child in [(l + m) // 2 if l < m else None,
+                              (m + 1 + r) // 2 if m + 1 < r else None]:
+                    if child is not None:
+                        self.max_upper[m] = max(self.max_upper[m],
+                                                self.max_upper[child])
+            else:
+                stack.extend([(l, r, True), (l, m, False), (m + 1, r, False)])
+
+    def __len__(self):
+        return len(self.ids)
+
+    # Indices (into self.volumes, in order) of volumes with vertical extent
+    # overlapping the band lower to upper, i.e. volume lower < upper and
+    # volume upper > lower. Levels are strings or integer feet
+    def query(self, lower, upper):
+        lower = level_ft(lower)
+        upper = level_ft(upper)
+
+        result = []
+        stack = [(0, len(self.ids))]
+        while stack:
+            l, r = stack.pop()
+            if l >= r:
+                continue
+
+            m = (l + r) // 2
+            if self.max_upper[m] <= lower:
+                continue
+
+            stack.append((l, m))
+            if self.lower[m] < upper:
+                if self.upper[m] > lower:
+                    result.append(self.ids[m])
+                stack.append((m + 1, r))
+
+        result.sort()
+        return result
+
+    # Indices of volumes containing the given level
+    def at(self, value):
+        value = level_ft(value)
+        return self.query(value, value + 1)
+
+    # (volume, feature) pairs, in airspace order, overlapping level band
+    def band(self, lower, upper):
+        return [self.volumes[n] for n in self.query(lower, upper)]
+
+    # Indices of volumes with lower level below the given level, e.g.
+    # equivalent to make_filter(max_level=...)
+    def below(self, value):
+        n = bisect.bisect_left(self.lower, level_ft(value))
+        return sorted(self.ids[:n])
+
+# Grid spatial index over volume bounding boxes. Shapes are built for all
+# volumes when the index is created
+class GridIndex():
+    def __init__(self, airspace, cell_size=0.25):
+        from .geometry import Shape
+
+        self.cell_size = cell_size
+        self.volumes = [(volume, feature) for feature in airspace
+                        for volume in feature['geometry']]
+        self.shapes = [Shape(v['boundary']) for v, f in self.volumes]
+
+        self.cells = {}
+        for n, shape in enumerate(self.shapes):
+            for cell in self._cells(shape.latlon_bbox):
+                self.cells.setdefault(cell, []).append(n)
+
+    def __len__(self):
+        return len(self.volumes)
+
+    def _cells(self, bbox):
+        south, west, north, east = bbox
+        size = self.cell_size
+        for i in range(int(south // size), int(north // size) + 1):
+            for j in range(int(west // size), int(east // size) + 1):
+                yield (i, j)
+
+    # Indices of volumes with bounding box overlapping the lat/lon
+    # bounding box (south, west, north, east)
+    def query(self, bbox):
+        south, west, north, east = bbox
+        candidates = set()
+        for cell in self._cells(bbox):
+            candidates.update(self.cells.get(cell, ()))
+
+        result = []
+        for n in candidates:
+            s, w, no, e = self.shapes[n].latlon_bbox
+            if s <= north and no >= south and w <= east and e >= west:
+                result.append(n)
+
+        result.sort()
+        return result
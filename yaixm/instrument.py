@@ -0,0 +1,303 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Per stage and per function profiling.
+#
+# Nothing is instrumented until enable() is called, which replaces the
+# functions and converter methods listed below with timing wrappers (in
+# every yaixm module that references them), so there is no overhead when
+# profiling is off. disable() puts the originals back. Function times are
+# inclusive of nested calls.
+#
+# Stages record wall time and the process peak resident set size so far,
+# which is not specific to the stage. If tracemalloc is running (e.g.
+# PYTHONTRACEMALLOC=1) the peak traced memory within each stage is also
+# recorded.
+
+from contextlib import contextmanager
+import functools
+import importlib
+import json
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Functions to instrument, by module
+FUNCTIONS = {
+    'yaixm.helpers': ["load", "validate", "merge_loa", "merge_service",
+                      "find_volume", "parse_deg", "parse_latlon",
+                      "minmax_lat", "level", "dms"],
+    'yaixm.convert': ["format_distance", "name_func", "seq_name",
+                      "noseq_name", "default_openair_type",
+                      "default_tnp_class", "default_tnp_type",
+                      "obstacle_volume"],
+    'yaixm.geojson': ["do_line", "do_circle", "do_arc", "geojson"]
+}
+
+# Converter classes, all do_* methods plus these are instrumented
+CLASSES = ['Converter', 'Openair', 'Tnp']
+METHODS = ["convert", "format_latlon", "start", "end"]
+
+_enabled = False
+_functions = {}
+_counters = {}
+_stages = []
+_stack = []
+
+# (object, attribute, original value) to undo enable()
+_originals = []
+
+def enabled():
+    return _enabled
+
+def count(name, n=1):
+    _counters[name] = _counters.get(name, 0) + n
+
+def _timed(name, func):
+    stat = _functions.setdefault(name, [0, 0.0])
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tstart = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stat[0] += 1
+            stat[1] += time.perf_counter() - tstart
+
+    return wrapper
+
+# Count filter decisions, by outcome and airspace type
+def _counted_filter(func):
+    @functools.wraps(func)
+    def wrapper(volume, feature):
+        result = func(volume, feature)
+
+        outcome = "filter.accept" if result else "filter.reject"
+        count(outcome)
+        count("%s.%s" % (outcome, feature.get('localtype') or feature['type']))
+
+        return result
+
+    return wrapper
+
+def _make_filter(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _timed("convert.filter", _counted_filter(func(*args, **kwargs)))
+
+    return wrapper
+
+def _setattr(obj, attr, value):
+    _originals.append((obj, attr, getattr(obj, attr)))
+    setattr(obj, attr, value)
+
+# Replace references to original objects in yaixm modules, classes and
+# function default arguments
+def _replace(replacements):
+    import inspect
+
+    def replace_defaults(func):
+        func = getattr(func, '__func__', func)
+        if func.__defaults__ and \
+           any(id(d) in replacements for d in func.__defaults__):
+            _setattr(func, '__defaults__',
+                     tuple(replacements.get(id(d), d)
+                           for d in func.__defaults__))
+
+    for name, module in list(sys.modules.items()):
+        if not (name == "yaixm" or name.startswith("yaixm.")) or \
+           module is None:
+            continue
+
+        for attr, value in list(vars(module).items()):
+            if id(value) in replacements:
+                _setattr(module, attr, replacements[id(value)])
+            elif inspect.isfunction(value):
+                replace_defaults(value)
+            elif inspect.isclass(value) and value.__module__ == name:
+                for fn in vars(value).values():
+                    if inspect.isfunction(fn):
+                        replace_defaults(fn)
+
+# Instrument functions and methods. Safe to call more than once
+def enable():
+    import inspect
+
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+
+    replacements = {}
+    for modname, names in FUNCTIONS.items():
+        try:
+            module = importlib.import_module(modname)
+        except ImportError:
+            # GeoJSON is optional
+            continue
+
+        short = modname.split(".")[-1]
+        for name in names:
+            func = getattr(module, name)
+            replacements[id(func)] = _timed("%s.%s" % (short, name), func)
+
+    convert = importlib.import_module("yaixm.convert")
+    func = convert.make_filter
+    replacements[id(func)] = _timed("convert.make_filter", _make_filter(func))
+
+    func = convert.default_filter
+    replacements[id(func)] = _timed("convert.default_filter",
+                                    _counted_filter(func))
+
+    for clsname in CLASSES:
+        cls = getattr(convert, clsname)
+        for name, func in list(vars(cls).items()):
+            if inspect.isfunction(func) and not \
+               inspect.isgeneratorfunction(func) and \
+               (name.startswith("do_") or name in METHODS):
+                _setattr(cls, name, _timed("%s.%s" % (clsname, name), func))
+
+    _replace(replacements)
+
+# Restore the original functions and methods
+def disable():
+    global _enabled
+    while _originals:
+        obj, attr, value = _originals.pop()
+        setattr(obj, attr, value)
+    _enabled = False
+
+def reset():
+    for stat in _functions.values():
+        stat[0] = 0
+        stat[1] = 0.0
+    _counters.clear()
+    del _stages[:]
+
+def _max_rss():
+    if resource is None:
+        return None
+
+    # Kilobytes on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+def _traced_peak():
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        return None
+
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    return peak
+
+# Time a processing stage. Stages can be nested
+@contextmanager
+def stage(name):
+    if not _enabled:
+        yield
+        return
+
+    # Parent's peak so far is carried forward before the peak is reset
+    peak = _traced_peak()
+    if _stack and peak is not None:
+        _stack[-1][1] = max(_stack[-1][1] or 0, peak)
+
+    # Record is added on entry, so stages are listed in start order
+    record = {'name': name, 'depth': len(_stack)}
+    _stages.append(record)
+
+    entry = [time.perf_counter(), None]
+    _stack.append(entry)
+    try:
+        yield
+    finally:
+        _stack.pop()
+        record['seconds'] = time.perf_counter() - entry[0]
+
+        peak = _traced_peak()
+        if peak is not None:
+            peak = max(peak, entry[1] or 0)
+            if _stack:
+                _stack[-1][1] = max(_stack[-1][1] or 0, peak)
+
+        record['process_max_rss_kb'] = _max_rss()
+        record['peak_traced_bytes'] = peak
+
+# Snapshot of statistics, e.g. for returning from a worker process
+def snapshot():
+    return {
+        'stages': list(_stages),
+        'functions': {name: {'calls': stat[0], 'seconds': stat[1]}
+                      for name, stat in _functions.items() if stat[0]},
+        'counters': dict(_counters)
+    }
+
+# Add statistics from another snapshot (e.g. from a worker process)
+def merge(stats, prefix=""):
+    for st in stats['stages']:
+        _stages.append(dict(st, name=prefix + st['name']))
+
+    for name, stat in stats['functions'].items():
+        total = _functions.setdefault(name, [0, 0.0])
+        total[0] += stat['calls']
+        total[1] += stat['seconds']
+
+    for name, n in stats['counters'].items():
+        count(name, n)
+
+def format_report(stats):
+    lines = ["%-40s %10s %15s %14s" %
+             ("Stage", "Seconds", "Process peak kB", "Peak traced kB")]
+    for st in stats['stages']:
+        # Unfinished stages (e.g. interrupted server) have no results
+        peak = st.get('peak_traced_bytes')
+        rss = st.get('process_max_rss_kb')
+        lines.append("%-40s %10.4f %15s %14s" % (
+            "  " * st['depth'] + st['name'], st.get('seconds', 0.0),
+            rss if rss is not None else "-",
+            peak // 1024 if peak is not None else "-"))
+
+    lines.append("")
+    lines.append("%-40s %10s %12s" % ("Function", "Seconds", "Calls"))
+    functions = sorted(stats['functions'].items(),
+                       key=lambda t: t[1]['seconds'], reverse=True)
+    for name, stat in functions:
+        lines.append("%-40s %10.4f %12d" %
+                     (name, stat['seconds'], stat['calls']))
+
+    if stats['counters']:
+        lines.append("")
+        lines.append("%-40s %10s" % ("Counter", "Count"))
+        for name, n in sorted(stats['counters'].items()):
+            lines.append("%-40s %10d" % (name, n))
+
+    return "\n".join(lines)
+
+# Print text report, or write JSON report to file
+def report(json_file=None):
+    stats = snapshot()
+    if json_file:
+        with open(json_file, "w") as f:
+            json.dump(stats, f, indent=4)
+    else:
+        print(format_report(stats), file=sys.stderr)
@@ -0,0 +1,55 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Volume area and perimeter, computed directly from the boundary
+# definitions with arcs and circles handled analytically (see
+# Shape.area() and Shape.perimeter() in geometry.py)
+
+import csv
+
+from .convert import seq_name
+from .geometry import Shape
+
+FIELDS = ["feature_id", "volume_id", "name", "type", "area_nm2",
+          "perimeter_nm"]
+
+# Table of area (square nm) and perimeter (nm), one row per volume
+def measure(airspace):
+    rows = []
+    for feature in airspace:
+        for volume in feature['geometry']:
+            shape = Shape(volume['boundary'])
+            rows.append({
+                'feature_id': feature.get('id', ""),
+                'volume_id': volume.get('id', ""),
+                'name': seq_name(volume, feature),
+                'type': feature['type'],
+                'area_nm2': shape.area(),
+                'perimeter_nm': shape.perimeter()
+            })
+
+    return rows
+
+# Write table as CSV, with values to given number of decimal places
+def write_csv(rows, fileobj, precision=3):
+    writer = csv.writer(fileobj, lineterminator="\n")
+    writer.writerow(FIELDS)
+    for row in rows:
+        writer.writerow([row['feature_id'], row['volume_id'], row['name'],
+                         row['type'],
+                         "%.*f" % (precision, row['area_nm2']),
+                         "%.*f" % (precision, row['perimeter_nm'])])
@@ -0,0 +1,204 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Bulk obstacle processing.
+#
+# Obstacle positions and elevations are parsed once into arrays, then
+# selected by bounding box and elevation, optionally clustered, and
+# rendered without building a dummy feature/volume for each obstacle.
+# Output is identical to converting each obstacle individually.
+
+from array import array
+import math
+
+from .convert import OBSTACLE_TYPES, obstacle_volume
+from .helpers import parse_latlon, level, dms, NM_TO_DEGREES
+
+# Obstacle circle radius, in nm
+OBSTACLE_RADIUS = 0.5
+
+# Position used to make converter circle templates
+TEMPLATE_POSITION = "000000N 0000000E"
+
+# Obstacles as parallel arrays
+class ObstacleArray():
+    def __init__(self, obstacles):
+        self.obstacles = list(obstacles)
+
+        lat = array('d')
+        lon = array('d')
+        for obstacle in self.obstacles:
+            la, lo = parse_latlon(obstacle['position'])
+            lat.append(la)
+            lon.append(lo)
+
+        self.lat = lat
+        self.lon = lon
+        self.elevation = array('i', (level(o['elevation'])
+                                     for o in self.obstacles))
+        self.name = [o.get('name') or OBSTACLE_TYPES.get(o['type'], "OBSTACLE")
+                     for o in self.obstacles]
+
+    def __len__(self):
+        return len(self.obstacles)
+
+    # Indices of obstacles within bounding box and elevation range
+    def select(self, north=90, south=-90, east=180, west=-180,
+               min_elevation=None, max_elevation=None, radius=0):
+        dlat = radius * NM_TO_DEGREES
+        lat, lon, elevation = self.lat, self.lon, self.elevation
+
+        if west <= east:
+            lon_ok = lambda x: west <= x <= east
+        else:
+            # Bounding box crosses 180 degrees
+            lon_ok = lambda x: x >= west or x <= east
+
+        lo_elev = -math.inf if min_elevation is None else min_elevation
+        hi_elev = math.inf if max_elevation is None else max_elevation
+
+        return array('l', (n for n in range(len(lat))
+                           if lat[n] - dlat <= north and lat[n] + dlat >= south
+                           and lon_ok(lon[n])
+                           and lo_elev <= elevation[n] <= hi_elev))
+
+# Group obstacles within distance (nm) of each other. Tallest obstacles
+# are taken first and each cluster is represented by its tallest member.
+# Returns list of (representative index, member indices)
+def cluster(obstacles, indices, distance=OBSTACLE_RADIUS):
+    lat, lon, elevation = obstacles.lat, obstacles.lon, obstacles.elevation
+
+    # Grid with cells at least the clustering distance across
+    cell_lat = distance * NM_TO_DEGREES
+    max_lat = max((abs(lat[n]) for n in indices), default=0)
+    cell_lon = cell_lat / max(math.cos(math.radians(max_lat)), 1e-6)
+    cells = {}
+    clusters = []
+
+    order = sorted(indices, key=lambda n: (-elevation[n], n))
+    for n in order:
+        coslat = math.cos(math.radians(lat[n]))
+        i = int(math.floor(lat[n] / cell_lat))
+        j = int(math.floor(lon[n] / cell_lon))
+
+        found = None
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for c in cells.get((i + di, j + dj), []):
+                    rep = clusters[c][0]
+                    dy = (lat[rep] - lat[n]) / NM_TO_DEGREES
+                    dx = (lon[rep] - lon[n]) * coslat / NM_TO_DEGREES
+                    if dx * dx + dy * dy <= distance * distance:
+                        found = c
+                        break
+                if found is not None:
+                    break
+            if found is not None:
+                break
+
+        if found is None:
+            cells.setdefault((i, j), []).append(len(clusters))
+            clusters.append((n, [n]))
+        else:
+            clusters[found][1].append(n)
+
+    # Restore input order
+    clusters.sort(key=lambda c: c[0])
+    return clusters
+
+# Bulk filter parameters, or None if the filter can't be applied in bulk
+def filter_params(filter_func):
+    return getattr(filter_func, 'params', None)
+
+# Indices of obstacles passing a make_filter() filter
+def filter_indices(obstacles, params):
+    # Obstacles are from surface upwards
+    max_level = params.get('max_level')
+    if max_level and level("SFC") >= max_level:
+        return array('l')
+
+    indices = obstacles.select(north=params['north'], south=params['south'],
+                               radius=OBSTACLE_RADIUS)
+
+    exclude = params.get('exclude')
+    if exclude:
+        features = [{'name': obstacles.name[n], 'type': "OTHER"}
+                    for n in indices]
+        indices = array('l', (n for n, f in zip(indices, features)
+                              if not any(all(e[k] == f.get(k) for k in e)
+                                         for e in exclude)))
+
+    return indices
+
+# Render converter blocks for given obstacle indices
+def render(converter, obstacles, indices):
+    # Circle lines for the template position, the position is substituted
+    # with the formatted obstacle position
+    template = converter.do_circle({'centre': TEMPLATE_POSITION,
+                                    'radius': "%s nm" % OBSTACLE_RADIUS})
+    marker = converter.format_latlon(TEMPLATE_POSITION)
+    latlon_fmt = converter.latlon_fmt
+
+    # Block header (type, name, etc.) depends only on the name and the
+    # level lines only on the elevation
+    heads = {}
+    levels = {}
+
+    blocks = []
+    for n in indices:
+        obstacle = obstacles.obstacles[n]
+        name = obstacles.name[n]
+        head = heads.get(name)
+        if head is None:
+            volume, feature = obstacle_volume(obstacle)
+            block = converter.do_volume(volume, feature)
+            level_lines = converter.do_levels(volume)
+            for i in range(len(block)):
+                if block[i:i + len(level_lines)] == level_lines:
+                    break
+            head = heads[name] = (block[:i],
+                                  block[i + len(level_lines):-len(template)])
+
+        elevation = obstacle['elevation']
+        level_lines = levels.get(elevation)
+        if level_lines is None:
+            level_lines = levels[elevation] = converter.do_levels(
+                    {'lower': "SFC", 'upper': elevation})
+
+        position = latlon_fmt.format(dms(obstacles.lat[n]),
+                                     dms(obstacles.lon[n]))
+        blocks.append(head[0] + level_lines + head[1] +
+                      [line.replace(marker, position) for line in template])
+
+    return blocks
+
+# Convert obstacles (list or ObstacleArray) to blocks, optionally
+# clustered, for a converter with a make_filter() filter. Returns None if
+# the converter's filter can't be applied in bulk
+def convert_obstacles(converter, obstacles, cluster_distance=None):
+    params = filter_params(converter.filter_func)
+    if params is None:
+        return None
+
+    if not isinstance(obstacles, ObstacleArray):
+        obstacles = ObstacleArray(obstacles)
+
+    indices = filter_indices(obstacles, params)
+    if cluster_distance:
+        indices = [c[0] for c in cluster(obstacles, indices, cluster_distance)]
+
+    return render(converter, obstacles, indices)
@@ -0,0 +1,202 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Streaming parsers for the OpenAir and TNP dialects written by the
+# converters in convert.py.
+#
+# Input is any iterable of lines (e.g. an open file) and output is
+# generated one (volume, feature) pair per airspace block, with levels,
+# lat/lons and distances converted back to YAIXM form. The polygon
+# closing point added by the converters is removed. OpenAir arcs don't
+# include a radius, so it is calculated from the arc's centre and start
+# point.
+
+from .geometry import haversine
+from .helpers import parse_latlon
+
+# YAIXM level from OpenAir/TNP level
+def parse_level(level_str):
+    if level_str.endswith("ALT"):
+        return level_str[:-3] + " ft"
+    else:
+        return level_str
+
+# YAIXM lat/lon from OpenAir lat/lon, e.g. "51:36:54 N 001:05:45 W"
+def openair_latlon(latlon_str):
+    lat, ns, lon, ew = latlon_str.split()
+    return "%s%s %s%s" % (lat.replace(":", ""), ns, lon.replace(":", ""), ew)
+
+# YAIXM lat/lon from TNP lat/lon, e.g. "N513654 W0010545"
+def tnp_latlon(latlon_str):
+    lat, lon = latlon_str.split()
+    return "%s%s %s%s" % (lat[1:], lat[0], lon[1:], lon[0])
+
+# Accumulates boundary segments for a single volume
+class BoundaryBuilder():
+    def __init__(self):
+        self.boundary = []
+        self.point = None
+
+    def add_point(self, point):
+        if self.boundary and 'line' in self.boundary[-1]:
+            self.boundary[-1]['line'].append(point)
+        else:
+            self.boundary.append({'line': [point]})
+        self.point = point
+
+    def add_arc(self, dir, centre, to, radius=None, from_point=None):
+        if from_point is not None and from_point != self.point:
+            self.add_point(from_point)
+
+        if radius is None:
+            # Radius from centre to start of arc
+            lat0, lon0 = parse_latlon(centre)
+            lat1, lon1 = parse_latlon(self.point)
+            radius = "%.3f" % haversine(lat0, lon0, lat1, lon1)
+
+        self.boundary.append({'arc': {'dir': dir,
+                                      'radius': "%s nm" % radius,
+                                      'centre': centre,
+                                      'to': to}})
+        self.point = to
+
+    def add_circle(self, centre, radius):
+        self.boundary.append({'circle': {'radius': "%s nm" % radius,
+                                         'centre': centre}})
+
+    # Boundary with closing point removed
+    def finish(self):
+        boundary = self.boundary
+        if len(boundary) > 1 and 'line' in boundary[0] and \
+                'line' in boundary[-1]:
+            last = boundary[-1]['line']
+            if last[-1] == boundary[0]['line'][0]:
+                last.pop()
+                if not last:
+                    boundary.pop()
+
+        return boundary
+
+def _error(lineno, line):
+    return ValueError("Can't parse line %d: %s" % (lineno, line))
+
+# Generate (volume, feature) pairs from OpenAir lines
+def iter_openair(lines):
+    volume = feature = builder = None
+    centre = dir = None
+
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line[0] == "*":
+            continue
+
+        tag = line[:2]
+        value = line[3:]
+        if tag == "AC":
+            if volume is not None:
+                volume['boundary'] = builder.finish()
+                yield volume, feature
+
+            feature = {'name': None, 'type': value}
+            volume = {'lower': None, 'upper': None}
+            builder = BoundaryBuilder()
+            dir = "cw"
+            continue
+
+        if volume is None:
+            raise _error(lineno, line)
+
+        try:
+            if tag == "DP":
+                builder.add_point(openair_latlon(value))
+            elif tag == "DB":
+                from_point, to = value.split(",")
+                builder.add_arc(dir, centre, openair_latlon(to),
+                                from_point=openair_latlon(from_point))
+            elif tag == "DC":
+                builder.add_circle(centre, value)
+            elif line.startswith("V X="):
+                centre = openair_latlon(line[4:])
+            elif line.startswith("V D="):
+                dir = "ccw" if line[4:] == "-" else "cw"
+            elif tag == "AN":
+                feature['name'] = value
+            elif tag == "AL":
+                volume['lower'] = parse_level(value)
+            elif tag == "AH":
+                volume['upper'] = parse_level(value)
+            else:
+                raise _error(lineno, line)
+        except (ValueError, TypeError, AttributeError):
+            raise _error(lineno, line)
+
+    if volume is not None:
+        volume['boundary'] = builder.finish()
+        yield volume, feature
+
+# Generate (volume, feature) pairs from TNP lines
+def iter_tnp(lines):
+    volume = feature = builder = None
+
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line[0] == "#" or line == "END":
+            continue
+
+        if line.startswith("TITLE="):
+            if volume is not None:
+                volume['boundary'] = builder.finish()
+                yield volume, feature
+
+            feature = {'name': line[6:], 'type': None, 'class': None}
+            volume = {'lower': None, 'upper': None}
+            builder = BoundaryBuilder()
+            continue
+
+        if volume is None:
+            raise _error(lineno, line)
+
+        try:
+            if line.startswith("POINT="):
+                builder.add_point(tnp_latlon(line[6:]))
+            elif line.startswith("CLOCKWISE ") or \
+                    line.startswith("ANTI-CLOCKWISE "):
+                dir, radius, lat, lon, to_lat, to_lon = line.split()
+                builder.add_arc("cw" if dir == "CLOCKWISE" else "ccw",
+                                tnp_latlon(lat[7:] + " " + lon),
+                                tnp_latlon(to_lat[3:] + " " + to_lon),
+                                radius=radius[7:])
+            elif line.startswith("CIRCLE "):
+                _, radius, lat, lon = line.split()
+                builder.add_circle(tnp_latlon(lat[7:] + " " + lon),
+                                   radius[7:])
+            elif line.startswith("TYPE="):
+                feature['type'] = line[5:]
+            elif line.startswith("CLASS="):
+                feature['class'] = line[6:] or None
+            elif line.startswith("BASE="):
+                volume['lower'] = parse_level(line[5:])
+            elif line.startswith("TOPS="):
+                volume['upper'] = parse_level(line[5:])
+            else:
+                raise _error(lineno, line)
+        except (ValueError, TypeError, AttributeError, IndexError):
+            raise _error(lineno, line)
+
+    if volume is not None:
+        volume['boundary'] = builder.finish()
+        yield volume, feature
@@ -0,0 +1,148 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Nearest airspace and distance to boundary.
+#
+# Distances are horizontal, in nm, to the exact line, arc and circle
+# edges of each volume in its own local projection (see geometry.py for
+# the approximation). Grid index cells are searched in rings outwards
+# from the position until no unsearched volume can be nearer than those
+# already found.
+
+import heapq
+import math
+
+from .convert import seq_name
+from .helpers import level, NM_TO_DEGREES
+from .index import GridIndex, level_ft
+
+class ProximityQuery():
+    def __init__(self, airspace, cell_size=0.25):
+        self.index = GridIndex(airspace, cell_size)
+        self.lower = [level(v['lower']) for v, f in self.index.volumes]
+        self.upper = [level(v['upper']) for v, f in self.index.volumes]
+
+        cells = self.index.cells
+        if cells:
+            self.imin = min(i for i, j in cells)
+            self.imax = max(i for i, j in cells)
+            self.jmin = min(j for i, j in cells)
+            self.jmax = max(j for i, j in cells)
+
+            # Minimum cell size (nm), longitude scaled at the highest
+            # latitude of any volume
+            max_lat = max(max(abs(s.latlon_bbox[0]), abs(s.latlon_bbox[2]))
+                          for s in self.index.shapes)
+            self.cell_nm = cell_size / NM_TO_DEGREES * \
+                    max(math.cos(math.radians(min(max_lat, 89.9))), 1e-3)
+
+    # Grid cells at Chebyshev distance r from cell (i, j)
+    def _ring(self, i, j, r):
+        if r == 0:
+            yield (i, j)
+            return
+
+        for dj in range(-r, r + 1):
+            yield (i - r, j + dj)
+            yield (i + r, j + dj)
+        for di in range(-r + 1, r):
+            yield (i + di, j - r)
+            yield (i + di, j + r)
+
+    # The k volumes nearest to lat/lon, optionally only those within
+    # max_distance (nm) and/or containing the given altitude (integer feet
+    # or level string). Volumes containing the position come first, then
+    # in order of distance. Returns list of dicts with distance to the
+    # boundary and an inside flag
+    def nearest(self, lat, lon, k=1, max_distance=None, altitude=None):
+        if not self.index.cells or k < 1:
+            return []
+
+        if altitude is not None:
+            altitude = level_ft(altitude)
+
+        size = self.index.cell_size
+        i, j = int(lat // size), int(lon // size)
+
+        # Max-heap, by negated distance to volume, of the best k so far
+        best = []
+        seen = set()
+        r = 0
+        while True:
+            for cell in self._ring(i, j, r):
+                for n in self.index.cells.get(cell, ()):
+                    if n in seen:
+                        continue
+                    seen.add(n)
+
+                    if altitude is not None and \
+                            not self.lower[n] <= altitude < self.upper[n]:
+                        continue
+
+                    shape = self.index.shapes[n]
+                    p = shape.projection.xy(lat, lon)
+
+                    bound = shape.bbox_distance_xy(p)
+                    if len(best) == k and bound > -best[0][0]:
+                        continue
+                    if max_distance is not None and bound > max_distance:
+                        continue
+
+                    distance = shape.distance_xy(p)
+                    inside = shape.contains_xy(p)
+                    item = (-(0.0 if inside else distance), -n, distance,
+                            inside)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+
+            # Unsearched volumes are at least this far away
+            bound = r * self.cell_nm
+            if len(best) == k and bound >= -best[0][0]:
+                break
+            if max_distance is not None and bound > max_distance:
+                break
+            if i - r <= self.imin and i + r >= self.imax and \
+                    j - r <= self.jmin and j + r >= self.jmax:
+                break
+
+            r += 1
+
+        result = []
+        for d, n, distance, inside in sorted(best, reverse=True):
+            if max_distance is not None and -d > max_distance:
+                continue
+
+            volume, feature = self.index.volumes[-n]
+            result.append({
+                'distance': distance,
+                'inside': inside,
+                'name': seq_name(volume, feature),
+                'lower': volume['lower'],
+                'upper': volume['upper'],
+                'volume': volume,
+                'feature': feature
+            })
+
+        return result
+
+    # Nearest volumes for each of a list of (lat, lon) positions
+    def nearest_batch(self, positions, k=1, max_distance=None,
+                      altitude=None):
+        return [self.nearest(lat, lon, k, max_distance, altitude)
+                for lat, lon in positions]
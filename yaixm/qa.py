@@ -0,0 +1,173 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Overlap, duplicate and gap detection between volumes.
+#
+# Candidate pairs, with overlapping bounding boxes and vertical extents,
+# are found with a sweep-line over latitude. Each pair is then checked
+# exactly, with both boundaries in the same projection, by splitting each
+# boundary where the other crosses it and testing the mid-point of each
+# piece:
+#
+#   overlap   - a piece of one boundary is inside the other volume
+#   duplicate - every piece of each boundary is on the other's boundary
+#   gap       - volumes of the same feature which don't overlap, but with
+#               a vertex close to, and outside, the other volume
+#
+# Points within the tolerance of a boundary are on it, so adjacent
+# volumes sharing a boundary don't overlap.
+
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import math
+
+from .convert import seq_name
+from .geometry import Shape
+from .helpers import level, NM_TO_DEGREES
+
+# Distance (nm) within which a point is on a boundary
+TOLERANCE = 0.01
+
+# Maximum width (nm) of a gap between volumes of the same feature
+GAP = 0.1
+
+# Candidate pairs sent to each pool task
+CHUNK_SIZE = 200
+
+# Pairs (i, j), i < j, of volumes with overlapping vertical extents and
+# bounding boxes, each box enlarged by margin (nm)
+def candidate_pairs(shapes, lower, upper, margin=0):
+    dlat = margin * NM_TO_DEGREES
+    boxes = []
+    for shape in shapes:
+        south, west, north, east = shape.latlon_bbox
+        dlon = dlat / max(math.cos(math.radians(max(abs(south), abs(north)))),
+                          1e-3)
+        boxes.append((south - dlat, west - dlon, north + dlat, east + dlon))
+
+    # Sweep northwards, active volumes in a heap by northern edge
+    pairs = []
+    active = []
+    for i in sorted(range(len(boxes)), key=lambda n: boxes[n][0]):
+        south, west, north, east = boxes[i]
+        while active and active[0][0] < south:
+            heapq.heappop(active)
+
+        for n, j in active:
+            s, w, no, e = boxes[j]
+            if w <= east and e >= west and \
+                    lower[i] < upper[j] and lower[j] < upper[i]:
+                pairs.append((min(i, j), max(i, j)))
+
+        heapq.heappush(active, (north, i))
+
+    pairs.sort()
+    return pairs
+
+# Check volume boundaries, returns (type, distance) or None
+def check_pair(boundary1, boundary2, same_feature, tolerance=TOLERANCE,
+               gap=GAP):
+    a = Shape(boundary1)
+    b = Shape(boundary2, a.projection)
+
+    compare = a.compare(b, tolerance)
+    if compare == "overlap":
+        return ("overlap", None)
+    elif compare == "coincident":
+        return ("duplicate", None)
+
+    if same_feature:
+        distances = []
+        for s1, s2 in [(a, b), (b, a)]:
+            for v in s1.vertices:
+                d = s2.distance_xy(v)
+                if tolerance < d < gap and not s2.contains_xy(v):
+                    distances.append(d)
+        if distances:
+            return ("gap", min(distances))
+
+    return None
+
+# Worker process state, set by pool initializer (or directly if serial)
+_worker = {}
+
+def _init_worker(boundaries, features, tolerance, gap):
+    _worker['boundaries'] = boundaries
+    _worker['features'] = features
+    _worker['tolerance'] = tolerance
+    _worker['gap'] = gap
+
+def _check_pairs(pairs):
+    boundaries = _worker['boundaries']
+    features = _worker['features']
+
+    results = []
+    for i, j in pairs:
+        result = check_pair(boundaries[i], boundaries[j],
+                            features[i] == features[j],
+                            _worker['tolerance'], _worker['gap'])
+        if result:
+            results.append((i, j) + result)
+    return results
+
+# Volume identifier, id if it has one, otherwise the sequenced name
+def volume_id(volume, feature):
+    return volume.get('id') or seq_name(volume, feature)
+
+# Find overlapping, duplicate and gapped volume pairs. Returns list of
+# findings, each a dict with type, volume ids, names and, for gaps, the
+# minimum gap distance (nm)
+def find_conflicts(airspace, jobs=None, tolerance=TOLERANCE, gap=GAP,
+                   chunk_size=CHUNK_SIZE):
+    volumes = []
+    features = []
+    for n, feature in enumerate(airspace):
+        for volume in feature['geometry']:
+            volumes.append((volume, feature))
+            features.append(n)
+
+    boundaries = [v['boundary'] for v, f in volumes]
+    shapes = [Shape(b) for b in boundaries]
+    lower = [level(v['lower']) for v, f in volumes]
+    upper = [level(v['upper']) for v, f in volumes]
+
+    pairs = candidate_pairs(shapes, lower, upper, gap)
+    chunks = [pairs[n:n + chunk_size] for n in range(0, len(pairs), chunk_size)]
+
+    args = (boundaries, features, tolerance, gap)
+    if jobs == 1 or len(chunks) < 2:
+        _init_worker(*args)
+        results = [_check_pairs(c) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=args) as executor:
+            results = list(executor.map(_check_pairs, chunks))
+
+    findings = []
+    for result in results:
+        for i, j, typ, distance in result:
+            finding = {
+                'type': typ,
+                'volumes': [volume_id(*volumes[i]), volume_id(*volumes[j])],
+                'names': [seq_name(*volumes[i]), seq_name(*volumes[j])],
+                'same_feature': features[i] == features[j]
+            }
+            if distance is not None:
+                finding['distance'] = distance
+            findings.append(finding)
+
+    return findings
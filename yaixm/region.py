@@ -0,0 +1,132 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Split airspace into named regions.
+#
+# A region is a latitude/longitude box or a YAIXM boundary (lines, arcs
+# or a circle), e.g.
+#
+#   regions:
+#     - name: scotland
+#       box: {south: 54.6, north: 61, west: -8, east: 0}
+#     - name: task
+#       boundary:
+#         - circle: {centre: 521000N 0003000W, radius: 50 nm}
+#
+# Volumes are assigned to each region which their footprint overlaps,
+# using a grid index over the volumes and an exact comparison of the
+# boundaries (in the volume's projection). GeoJSON output can be clipped
+# to a region.
+
+import math
+
+from .geometry import Shape
+from .helpers import dms, parse_latlon, NM_TO_DEGREES
+from .index import GridIndex
+from .obstacle import ObstacleArray, OBSTACLE_RADIUS
+
+# Distance (nm) within which a volume only touches a region
+TOLERANCE = 0.01
+
+def _latlon(lat, lon):
+    return "{0[d]:02d}{0[m]:02d}{0[s]:02d}{0[ns]} "\
+           "{1[d]:03d}{1[m]:02d}{1[s]:02d}{1[ew]}".format(dms(lat), dms(lon))
+
+class Region():
+    def __init__(self, name, boundary=None, box=None):
+        self.name = name
+        self.box = box
+        if box:
+            south, west, north, east = (box['south'], box['west'],
+                                        box['north'], box['east'])
+            if south >= north or west >= east:
+                raise ValueError("Bad box for region %s" % name)
+
+            boundary = [{'line': [_latlon(south, west), _latlon(north, west),
+                                  _latlon(north, east), _latlon(south, east)]}]
+        elif not boundary:
+            raise ValueError("Region %s needs a box or boundary" % name)
+
+        self.boundary = boundary
+        self.shape = Shape(boundary)
+
+    # Polygon of (lon, lat) points (not closed) for clipping. Boundaries
+    # with arcs or circles are approximated as for GeoJSON output
+    def points(self, resolution=15):
+        if self.box:
+            s, w, n, e = (self.box['south'], self.box['west'],
+                          self.box['north'], self.box['east'])
+            return [(w, s), (w, n), (e, n), (e, s)]
+
+        if all('line' in segment for segment in self.boundary):
+            points = [parse_latlon(p)[::-1] for segment in self.boundary
+                      for p in segment['line']]
+        else:
+            from .geojson import boundary_points
+            points = boundary_points(self.boundary, resolution)
+
+        if points[0] == points[-1]:
+            points = points[:-1]
+        return points
+
+    # True if volume shape overlaps the region
+    def overlaps(self, shape, tolerance=TOLERANCE):
+        region = Shape(self.boundary, shape.projection)
+        return shape.compare(region, tolerance) is not None
+
+# Regions from list of region definitions
+def make_regions(specs):
+    regions = []
+    for spec in specs:
+        if spec['name'] in [r.name for r in regions]:
+            raise ValueError("Duplicate region: %s" % spec['name'])
+        regions.append(Region(spec['name'], spec.get('boundary'),
+                              spec.get('box')))
+    return regions
+
+# Split airspace between regions. Returns map of region name to list of
+# (volume, feature) pairs, in airspace order. A volume overlapping
+# several regions is in each of them
+def split(airspace, regions, tolerance=TOLERANCE):
+    index = GridIndex(airspace)
+
+    result = {}
+    for region in regions:
+        result[region.name] = [
+            index.volumes[n] for n in index.query(region.shape.latlon_bbox)
+            if region.overlaps(index.shapes[n], tolerance)]
+
+    return result
+
+# Obstacles (list or ObstacleArray) whose circle overlaps the region
+def region_obstacles(obstacles, region):
+    if not isinstance(obstacles, ObstacleArray):
+        obstacles = ObstacleArray(obstacles)
+
+    south, west, north, east = region.shape.latlon_bbox
+    dlon = OBSTACLE_RADIUS * NM_TO_DEGREES / \
+           max(math.cos(math.radians(max(abs(south), abs(north)))), 1e-3)
+
+    shape = region.shape
+    result = []
+    for n in obstacles.select(north=north, south=south, east=east + dlon,
+                              west=west - dlon, radius=OBSTACLE_RADIUS):
+        p = shape.projection.xy(obstacles.lat[n], obstacles.lon[n])
+        if shape.contains_xy(p) or shape.distance_xy(p) <= OBSTACLE_RADIUS:
+            result.append(obstacles.obstacles[n])
+
+    return result
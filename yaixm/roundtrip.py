@@ -0,0 +1,157 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Round-trip check of OpenAir/TNP output against the source airspace.
+#
+# The output is parsed (see parse.py) and compared block by block with
+# the volumes the converter should have written. Names, types and
+# classes are compared with the converter's own name/type/class
+# functions, levels and boundaries are compared after normalising both
+# sides to the output precision (whole seconds and 0.001 nm).
+
+import functools
+import itertools
+
+from .convert import Tnp, format_distance, obstacle_volume
+from .helpers import parse_latlon, dms
+from .parse import iter_openair, iter_tnp
+
+LATLON_FMT = "{0[d]:02d}{0[m]:02d}{0[s]:02d}{0[ns]} "\
+             "{1[d]:03d}{1[m]:02d}{1[s]:02d}{1[ew]}"
+
+# Lat/lon rounded to whole seconds
+@functools.lru_cache(maxsize=65536)
+def normalise_latlon(latlon):
+    lat, lon = parse_latlon(latlon)
+    return LATLON_FMT.format(dms(lat), dms(lon))
+
+# Level as written to the output
+def normalise_level(level_str):
+    if level_str.endswith("ft"):
+        return level_str[:-3] + " ft"
+    else:
+        return level_str
+
+def normalise_distance(distance):
+    return round(float(format_distance(distance)), 3)
+
+# Boundary as list of tuples, with repeated and closing points removed.
+# Arc radii are included only if with_radius is set
+def normalise_boundary(boundary, with_radius=True):
+    items = []
+    for segment in boundary:
+        if 'line' in segment:
+            for point in segment['line']:
+                item = ('point', normalise_latlon(point))
+                if not items or items[-1] != item:
+                    items.append(item)
+        elif 'arc' in segment:
+            arc = segment['arc']
+            radius = normalise_distance(arc['radius']) if with_radius else None
+            items.append(('arc', arc['dir'], normalise_latlon(arc['centre']),
+                          normalise_latlon(arc['to']), radius))
+        elif 'circle' in segment:
+            circle = segment['circle']
+            items.append(('circle', normalise_latlon(circle['centre']),
+                          normalise_distance(circle['radius'])))
+
+    if len(items) > 1 and items[0][0] == 'point' and items[-1] == items[0]:
+        items.pop()
+
+    return items
+
+# (volume, feature) pairs for obstacles written by the converter
+def obstacle_volumes(converter, obstacles):
+    from .obstacle import ObstacleArray, cluster, filter_params, \
+            filter_indices
+
+    params = filter_params(converter.filter_func)
+    if params is None:
+        volumes = [obstacle_volume(o) for o in obstacles]
+        return [(v, f) for v, f in volumes if converter.filter_func(v, f)]
+
+    if not isinstance(obstacles, ObstacleArray):
+        obstacles = ObstacleArray(obstacles)
+
+    indices = filter_indices(obstacles, params)
+    distance = getattr(converter, 'obstacle_cluster', None)
+    if distance:
+        indices = [c[0] for c in cluster(obstacles, indices, distance)]
+
+    return [obstacle_volume(obstacles.obstacles[n]) for n in indices]
+
+# (volume, feature) pairs written by the converter
+def expected_volumes(converter, volumes, obstacles=None):
+    for volume, feature in volumes:
+        if converter.filter_func(volume, feature):
+            yield volume, feature
+
+    if obstacles:
+        for volume, feature in obstacle_volumes(converter, obstacles):
+            yield volume, feature
+
+# Normalised header fields and boundary for a volume
+def _record(name, as_type, as_class, volume, with_radius):
+    return {
+        'name': name,
+        'type': as_type,
+        'class': as_class or None,
+        'lower': normalise_level(volume['lower']),
+        'upper': normalise_level(volume['upper']),
+        'boundary': normalise_boundary(volume['boundary'], with_radius)
+    }
+
+# Compare converter output lines with the (volume, feature) pairs it
+# was made from, e.g. [(v, f) for f in airspace for v in f['geometry']].
+# Returns list of mismatches
+def check_roundtrip(converter, volumes, lines, obstacles=None):
+    tnp = isinstance(converter, Tnp)
+    parser = iter_tnp if tnp else iter_openair
+
+    mismatches = []
+    pairs = itertools.zip_longest(
+            expected_volumes(converter, volumes, obstacles), parser(lines))
+    for n, (expected, found) in enumerate(pairs):
+        if expected is None:
+            mismatches.append({'index': n, 'name': found[1]['name'],
+                               'field': "block", 'expected': None,
+                               'found': found[1]['name']})
+            continue
+        elif found is None:
+            name = converter.name_func(*expected)
+            mismatches.append({'index': n, 'name': name,
+                               'field': "block", 'expected': name,
+                               'found': None})
+            continue
+
+        volume, feature = expected
+        exp = _record(converter.name_func(volume, feature),
+                      converter.type_func(volume, feature),
+                      converter.class_func(volume, feature) if tnp else None,
+                      volume, tnp)
+
+        volume, feature = found
+        got = _record(feature['name'], feature['type'], feature.get('class'),
+                      volume, tnp)
+
+        for field in exp:
+            if exp[field] != got[field]:
+                mismatches.append({'index': n, 'name': exp['name'],
+                                   'field': field, 'expected': exp[field],
+                                   'found': got[field]})
+
+    return mismatches
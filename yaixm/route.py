@@ -0,0 +1,157 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Airspace crossed by a route.
+#
+# Each leg follows the great circle between its waypoints. It is split
+# into sub-legs of at most STEP nm, and each sub-leg is looked up in the
+# grid index, then intersected exactly with each candidate's boundary
+# (see geometry.py). A sub-leg is a straight line in the volume's own
+# projection, which is within a few metres of the great circle at this
+# length, so entry and exit distances are measured along the great
+# circle. Intervals which meet at sub-leg ends are joined.
+
+import math
+
+from .convert import seq_name
+from .geometry import haversine
+from .helpers import parse_latlon, level
+from .index import GridIndex, level_ft
+
+# Maximum sub-leg length (nm)
+STEP = 5
+
+# Waypoint from YAIXM lat/lon ("513654N 0010545W") or decimal degrees
+# ("51.615,-1.096")
+def parse_waypoint(waypoint):
+    if "," in waypoint:
+        lat, lon = [float(x) for x in waypoint.split(",")]
+        return lat, lon
+    else:
+        return parse_latlon(waypoint)
+
+# Points at equal spacing along the great circle between two lat/lon
+# points, split into n sub-legs
+def great_circle_points(lat0, lon0, lat1, lon1, n):
+    vectors = []
+    for lat, lon in [(lat0, lon0), (lat1, lon1)]:
+        phi, lam = math.radians(lat), math.radians(lon)
+        vectors.append((math.cos(phi) * math.cos(lam),
+                        math.cos(phi) * math.sin(lam), math.sin(phi)))
+    (x0, y0, z0), (x1, y1, z1) = vectors
+
+    # Angle between the points
+    omega = math.atan2(
+            math.hypot(y0 * z1 - z0 * y1, z0 * x1 - x0 * z1, x0 * y1 - y0 * x1),
+            x0 * x1 + y0 * y1 + z0 * z1)
+    if omega < 1e-12:
+        return [(lat0, lon0)] * (n + 1)
+
+    points = [(lat0, lon0)]
+    for k in range(1, n):
+        a = math.sin((1 - k / n) * omega) / math.sin(omega)
+        b = math.sin(k / n * omega) / math.sin(omega)
+        x, y, z = a * x0 + b * x1, a * y0 + b * y1, a * z0 + b * z1
+        points.append((math.degrees(math.atan2(z, math.hypot(x, y))),
+                       math.degrees(math.atan2(y, x))))
+    points.append((lat1, lon1))
+    return points
+
+class RouteQuery():
+    def __init__(self, airspace, cell_size=0.25):
+        self.index = GridIndex(airspace, cell_size)
+
+    # Indices of volumes which may be crossed by leg
+    def candidates(self, lat0, lon0, lat1, lon1):
+        size = self.index.cell_size
+        npieces = max(1, math.ceil(max(abs(lat1 - lat0),
+                                       abs(lon1 - lon0)) / size))
+
+        candidates = set()
+        for n in range(npieces):
+            la0 = lat0 + (lat1 - lat0) * n / npieces
+            lo0 = lon0 + (lon1 - lon0) * n / npieces
+            la1 = lat0 + (lat1 - lat0) * (n + 1) / npieces
+            lo1 = lon0 + (lon1 - lon0) * (n + 1) / npieces
+            candidates.update(self.index.query((min(la0, la1), min(lo0, lo1),
+                                                max(la0, la1), max(lo0, lo1))))
+
+        return sorted(candidates)
+
+    # Volumes crossed by route through (lat, lon) waypoints, with optional
+    # altitude (integer feet or level string) at each waypoint. Returns
+    # list of crossings, ordered by leg then entry distance
+    def query(self, waypoints, altitudes=None):
+        if altitudes is not None:
+            if len(altitudes) != len(waypoints):
+                raise ValueError("Need one altitude per waypoint")
+            altitudes = [level_ft(a) for a in altitudes]
+
+        crossings = []
+        for leg in range(len(waypoints) - 1):
+            lat0, lon0 = waypoints[leg]
+            lat1, lon1 = waypoints[leg + 1]
+            length = haversine(lat0, lon0, lat1, lon1)
+            points = great_circle_points(lat0, lon0, lat1, lon1,
+                                         max(1, math.ceil(length / STEP)))
+
+            # Inside intervals (nm along leg) of each candidate volume
+            intervals = {}
+            start = 0
+            for p0, p1 in zip(points, points[1:]):
+                sub_length = haversine(*p0, *p1)
+                for n in self.candidates(*p0, *p1):
+                    shape = self.index.shapes[n]
+                    volume_intervals = intervals.setdefault(n, [])
+                    for t0, t1 in shape.intervals(*p0, *p1):
+                        entry = start + t0 * sub_length
+                        exit = start + t1 * sub_length
+                        if volume_intervals and \
+                                entry - volume_intervals[-1][1] < 1e-9:
+                            volume_intervals[-1] = (volume_intervals[-1][0],
+                                                    exit)
+                        else:
+                            volume_intervals.append((entry, exit))
+                start += sub_length
+
+            for n, volume_intervals in intervals.items():
+                volume, feature = self.index.volumes[n]
+                lower = level(volume['lower'])
+                upper = level(volume['upper'])
+
+                for entry, exit in volume_intervals:
+                    if altitudes is not None:
+                        # Altitude varies linearly along the leg
+                        a0, a1 = altitudes[leg], altitudes[leg + 1]
+                        alt0 = a0 + (a1 - a0) * entry / (length or 1)
+                        alt1 = a0 + (a1 - a0) * exit / (length or 1)
+                        if min(alt0, alt1) >= upper or max(alt0, alt1) < lower:
+                            continue
+
+                    crossings.append({
+                        'leg': leg,
+                        'entry': entry,
+                        'exit': exit,
+                        'name': seq_name(volume, feature),
+                        'lower': volume['lower'],
+                        'upper': volume['upper'],
+                        'volume': volume,
+                        'feature': feature
+                    })
+
+        crossings.sort(key=lambda c: (c['leg'], c['entry'], c['exit']))
+        return crossings
@@ -0,0 +1,120 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# JSON serialisation, written as bytes directly to the output stream.
+#
+# Backends are the standard library json module and, if installed,
+# orjson. With the default options output is identical to json.dump().
+# Compact mode removes all whitespace and precision mode rounds floats
+# to a fixed number of decimal places.
+#
+# The "auto" backend uses orjson for compact output (which it can
+# produce, with UTF-8 rather than ASCII escaped strings) and the
+# standard library otherwise.
+
+import io
+import json
+
+from .compact import json_default
+
+BACKENDS = ["auto", "json", "orjson"]
+
+# Write chunks of this size to the output stream
+CHUNK_SIZE = 65536
+
+def have_orjson():
+    try:
+        import orjson
+    except ImportError:
+        return False
+    return True
+
+# Copy of data with floats rounded to given number of decimal places
+def round_floats(data, precision):
+    if isinstance(data, float):
+        return round(data, precision)
+    elif isinstance(data, dict):
+        return {k: round_floats(v, precision) for k, v in data.items()}
+    elif isinstance(data, (list, tuple)):
+        return [round_floats(v, precision) for v in data]
+    else:
+        return data
+
+def _select_backend(backend, indent, compact):
+    if backend == "auto":
+        return "orjson" if compact and indent is None and have_orjson() \
+               else "json"
+
+    if backend == "orjson" and not (compact and indent is None):
+        raise ValueError("orjson backend only supports compact output")
+    if backend not in BACKENDS:
+        raise ValueError("Unknown JSON backend: %s" % backend)
+
+    return backend
+
+# Generate encoded JSON chunks
+def iter_encode(data, sort_keys=False, indent=None, compact=False,
+                precision=None, backend="auto"):
+    backend = _select_backend(backend, indent, compact)
+
+    if precision is not None:
+        data = round_floats(data, precision)
+
+    if backend == "orjson":
+        import orjson
+
+        option = orjson.OPT_SORT_KEYS if sort_keys else 0
+        yield orjson.dumps(data, default=json_default, option=option)
+        return
+
+    separators = (",", ":") if compact else None
+    encoder = json.JSONEncoder(sort_keys=sort_keys, indent=indent,
+                               separators=separators, default=json_default)
+
+    chunks = []
+    size = 0
+    for chunk in encoder.iterencode(data):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= CHUNK_SIZE:
+            yield "".join(chunks).encode("ascii")
+            chunks = []
+            size = 0
+
+    yield "".join(chunks).encode("ascii")
+
+# Serialise to bytes
+def dumps(data, **kwargs):
+    return b"".join(iter_encode(data, **kwargs))
+
+# Serialise to file object, binary or text
+def dump(data, fileobj, **kwargs):
+    out = fileobj
+    if isinstance(fileobj, io.TextIOBase):
+        out = getattr(fileobj, 'buffer', None)
+        if out is None:
+            # In memory text stream
+            for chunk in iter_encode(data, **kwargs):
+                fileobj.write(chunk.decode("utf-8"))
+            return
+
+        fileobj.flush()
+
+    for chunk in iter_encode(data, **kwargs):
+        out.write(chunk)
+
+    out.flush()
@@ -0,0 +1,288 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+import socketserver
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+from .build import Source, make_converter
+from .helpers import load
+from .obstacle import ObstacleArray
+from .instrument import stage
+
+# Output formats served, with their content type
+CONTENT_TYPES = {
+    'openair': "text/plain; charset=ascii",
+    'tnp': "text/plain; charset=ascii",
+    'geojson': "application/geo+json"
+}
+
+# Boolean filter parameters, all default to True
+FILTER_FLAGS = ["noatz", "microlight", "hgl", "gliding_site"]
+
+# Parse boolean query value
+def parse_flag(value):
+    value = value.lower()
+    if value in ["1", "true", "yes", "on"]:
+        return True
+    elif value in ["0", "false", "no", "off"]:
+        return False
+    else:
+        raise ValueError("Bad boolean value: %s" % value)
+
+# Convert query string values to normalised conversion parameters
+def parse_params(query):
+    qs = {k: v[-1] for k, v in parse_qs(query).items()}
+
+    params = {}
+    for flag in FILTER_FLAGS + ["comp", "seqno", "service", "obstacle"]:
+        if flag in qs:
+            params[flag] = parse_flag(qs.pop(flag))
+
+    for arg in ["north", "south", "obstacle_cluster"]:
+        if arg in qs:
+            params[arg] = float(qs.pop(arg))
+
+    for arg in ["max_level", "resolution"]:
+        if arg in qs:
+            params[arg] = int(qs.pop(arg))
+
+    if "loa" in qs:
+        names = [x.strip() for x in qs.pop("loa").split(",")]
+        params['loa'] = tuple(sorted(x for x in names if x))
+
+    if "header" in qs:
+        params['header'] = qs.pop("header")
+
+    if qs:
+        raise ValueError("Unknown parameter: %s" % ", ".join(sorted(qs)))
+
+    return params
+
+# Loaded airspace, with merged airspace cached for re-use between requests
+class Model():
+    def __init__(self, path):
+        # Stat the open file, so the stamp is for the data read even if the
+        # file is replaced meanwhile
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            raw = f.read()
+
+        self.path = path
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        self.version = hashlib.sha1(raw).hexdigest()
+
+        with stage("load"):
+            self.source = Source(load(raw, compact=True))
+        self.data = self.source.yaixm
+        self.obstacles = None
+        self.lock = threading.Lock()
+
+    # Return True if source file has changed since it was loaded
+    def changed(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+
+        return (stat.st_mtime_ns, stat.st_size) != self.stamp
+
+    # Get airspace merged with given LoAs and (optionally) services
+    def airspace(self, loa_names=(), service=False):
+        with self.lock:
+            key = self.source.merge_key({'loa': loa_names, 'service': service})
+            return self.source.airspace(key)
+
+    # Obstacles, parsed on first use
+    def obstacle_array(self):
+        with self.lock:
+            if self.obstacles is None:
+                self.obstacles = ObstacleArray(self.data.get('obstacle') or [])
+            return self.obstacles
+
+    # Convert airspace to requested format
+    def convert(self, fmt, params):
+        airspace = self.airspace(params.get('loa', ()),
+                                 params.get('service', False))
+
+        if fmt == "geojson":
+            from .geojson import geojson
+            gjson = geojson(airspace, resolution=params.get('resolution', 15))
+            return json.dumps(gjson, sort_keys=True, indent=4).encode("utf-8")
+
+        converter = make_converter(fmt, params)
+
+        obstacles = self.obstacle_array() if params.get('obstacle') else None
+        output = converter.convert(airspace, obstacles)
+
+        # Don't accept anything other than ASCII
+        return output.encode("ascii")
+
+# Least recently used cache of converted output, keyed by model version,
+# format and parameters
+class ResultCache():
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body):
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        with self.lock:
+            self.entries[key] = (etag, body)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+        return etag, body
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+# Conversion service. Holds current model and result cache and reloads
+# model when source file is modified
+class Service():
+    def __init__(self, path, cache_size=32):
+        self.path = path
+        self.model = Model(path)
+        self.cache = ResultCache(cache_size)
+        self.reload_lock = threading.Lock()
+
+    # Replace model if source has changed. The new model is built before
+    # being swapped in, so concurrent requests see either the old or the
+    # new airspace, never a partial load
+    def check_reload(self):
+        if not self.model.changed():
+            return
+
+        with self.reload_lock:
+            if not self.model.changed():
+                return
+
+            try:
+                model = Model(self.path)
+            except Exception as e:
+                logging.error("Reload of %s failed: %s", self.path, e)
+                return
+
+            self.model = model
+            self.cache.clear()
+            logging.info("Reloaded %s, version %s", self.path, model.version)
+
+    # Return (etag, body) for given format and query string
+    def get(self, fmt, query):
+        if fmt not in CONTENT_TYPES:
+            raise ValueError("Unknown format: %s" % fmt)
+
+        params = parse_params(query)
+
+        self.check_reload()
+        model = self.model
+
+        key = (model.version, fmt, tuple(sorted(params.items())))
+        entry = self.cache.get(key)
+        if entry is None:
+            entry = self.cache.put(key, model.convert(fmt, params))
+
+        return entry
+
+class RequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        fmt = url.path.strip("/")
+
+        if fmt == "version":
+            model = self.server.service.model
+            body = json.dumps({'version': model.version,
+                               'release': model.data.get('release')})
+            self.send_body(200, "application/json", body.encode("utf-8"))
+            return
+
+        if fmt not in CONTENT_TYPES:
+            self.send_error(404, "Unknown format: %s" % fmt)
+            return
+
+        try:
+            etag, body = self.server.service.get(fmt, url.query)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        except Exception:
+            logging.exception("Error serving %s", self.path)
+            self.send_error(500)
+            return
+
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_body(200, CONTENT_TYPES[fmt], body, etag)
+
+    def send_body(self, code, content_type, body, etag=None):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Unix socket clients don't have an address
+    def address_string(self):
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+        return self.server.server_address
+
+class UnixHTTPServer(socketserver.ThreadingMixIn,
+                     socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+# Create HTTP server on TCP port or, if socket_path is given, Unix socket
+def make_server(path, host="127.0.0.1", port=8080, socket_path=None,
+                cache_size=32):
+    service = Service(path, cache_size)
+
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, RequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), RequestHandler)
+
+    server.service = service
+    return server
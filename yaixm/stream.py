@@ -0,0 +1,258 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Streaming YAIXM loading, validation and conversion.
+#
+# iter_load() yields (section, item) pairs as the document is parsed:
+# one pair for each element of a top level list (airspace features,
+# LoAs, obstacles, etc.) and one pair for any other top level value
+# (e.g. the release header). Only a single item is held in memory at a
+# time, so checking and conversion can start before the whole file has
+# been read.
+
+import codecs
+import functools
+import io
+import json as _json
+import re
+
+from .helpers import yaml_loader, section_validators, item_name
+
+CHUNK_SIZE = 65536
+
+#----------------------------------------------------------------------
+# YAML
+
+# YAML loader which can compose a node at a time (the C parser doesn't
+# provide compose_node)
+def _stream_loader():
+    from yaml.composer import Composer
+
+    Loader = yaml_loader()
+    if issubclass(Loader, Composer):
+        return Loader
+
+    return type("StreamLoader", (Loader, Composer), {})
+
+def _iter_yaml(stream):
+    from yaml import events
+
+    loader = _stream_loader()(stream)
+    loader.anchors = {}
+
+    def construct():
+        return loader.construct_document(loader.compose_node(None, None))
+
+    try:
+        loader.get_event()
+        if loader.check_event(events.StreamEndEvent):
+            return
+
+        loader.get_event()
+        if not loader.check_event(events.MappingStartEvent):
+            raise ValueError("YAIXM document must be a mapping")
+        loader.get_event()
+
+        while not loader.check_event(events.MappingEndEvent):
+            section = construct()
+            if loader.check_event(events.SequenceStartEvent):
+                loader.get_event()
+                while not loader.check_event(events.SequenceEndEvent):
+                    yield section, construct()
+                loader.get_event()
+            else:
+                yield section, construct()
+    finally:
+        loader.dispose()
+
+#----------------------------------------------------------------------
+# JSON
+
+WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+
+# Characters which may continue a number
+NUMBER_CHARS = "0123456789.eE+-"
+
+# Incremental JSON reader. Values are decoded from a buffer which is
+# extended until it holds the complete value
+class _JsonReader():
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = _json.JSONDecoder()
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        data = self.stream.read(self.chunk_size)
+        if isinstance(data, bytes):
+            data = self.utf8.decode(data, final=not data)
+        if not data:
+            self.eof = True
+
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+
+    def peek(self):
+        while True:
+            self.pos = WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                break
+            self.fill()
+
+        return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError("Expecting one of '%s' at offset %d" %
+                             (chars, self.pos))
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except _json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A number at, or followed by more of a number at, the end
+                # of the buffer may be incomplete
+                if self.eof or not (isinstance(value, (int, float)) and
+                                    (end == len(self.buf) or
+                                     self.buf[end] in NUMBER_CHARS)):
+                    self.pos = end
+                    return value
+
+            self.fill()
+
+def _iter_json(stream):
+    reader = _JsonReader(stream)
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        section = reader.value()
+        reader.expect(":")
+        if reader.peek() == "[":
+            reader.pos += 1
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield section, reader.value()
+                    if reader.expect(",]") == "]":
+                        break
+        else:
+            yield section, reader.value()
+
+        if reader.expect(",}") == "}":
+            break
+
+#----------------------------------------------------------------------
+
+# Generate (section, item) pairs from YAML or JSON stream (or string)
+def iter_load(stream, json=False):
+    if json:
+        if isinstance(stream, bytes):
+            stream = io.BytesIO(stream)
+        elif isinstance(stream, str):
+            stream = io.StringIO(stream)
+        return _iter_json(stream)
+    else:
+        return _iter_yaml(stream)
+
+# Validator for top level structure, with list sections replaced by
+# lists of placeholder items and other sections by None. Empty lists
+# aren't yielded by iter_load() so are treated as missing
+@functools.lru_cache(maxsize=None)
+def _skeleton_validator():
+    top_validator, item_validators = section_validators()
+    schema = top_validator.schema
+
+    properties = {}
+    for section, prop in schema['properties'].items():
+        if section in item_validators:
+            properties[section] = {k: v for k, v in prop.items()
+                                   if k in ('type', 'minItems', 'maxItems')}
+        else:
+            properties[section] = {}
+
+    return type(top_validator)(dict(schema, properties=properties))
+
+# Pass through (section, item) pairs, appending schema validation error
+# messages to errors
+def iter_check(items, errors):
+    top_validator, item_validators = section_validators()
+    schema = top_validator.schema
+
+    sections = set()
+    counts = {}
+    for section, item in items:
+        sections.add(section)
+
+        validator = item_validators.get(section)
+        if validator:
+            n = counts.get(section, 0)
+            counts[section] = n + 1
+            errors.extend("%s: %s" % (item_name(section, n, item), e.message)
+                          for e in validator.iter_errors(item))
+        elif section in schema['properties']:
+            errors.extend("%s: %s" % (section, e.message) for e in
+                          top_validator.descend(
+                              item, schema['properties'][section]))
+        elif schema.get('additionalProperties') is False:
+            errors.append("Additional property %r is not allowed" % section)
+
+        yield section, item
+
+    # Check the sections present (and list lengths) against the top level
+    # schema's required sections
+    skeleton = {section: [None] * counts[section]
+                         if section in item_validators else None
+                for section in sections if section in schema['properties']}
+    for e in _skeleton_validator().iter_errors(skeleton):
+        if e.path:
+            errors.append("%s: %s" % (e.path[0], e.message))
+        else:
+            errors.append("Invalid set of top level sections: %s" %
+                          (", ".join(sorted(skeleton)) or "none"))
+
+# Generate converter blocks from (section, item) pairs. Obstacle blocks
+# are held until the end, so output is identical to Converter.convert()
+def iter_blocks(converter, items, obstacles=False):
+    yield converter.start()
+
+    obstacle_blocks = []
+    for section, item in items:
+        if section == "airspace":
+            for block in converter.do_feature(item):
+                yield block
+        elif section == "obstacle" and obstacles:
+            obstacle_blocks.extend(converter.do_obstacles([item]))
+
+    for block in obstacle_blocks:
+        yield block
+
+    yield converter.end()
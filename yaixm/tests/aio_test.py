@@ -0,0 +1,58 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import yaixm
+from yaixm.aio import AsyncConverter
+from yaixm.geojson import geojson
+
+from .yaixm_test import TEST_AIRSPACE
+
+def test_async_openair():
+    async def run():
+        aconv = AsyncConverter(chunk_size=10)
+        return await aconv.openair(TEST_AIRSPACE['airspace'],
+                                   TEST_AIRSPACE['obstacle'], header="Foo")
+
+    oa = asyncio.run(run())
+    expected = yaixm.Openair(header="Foo").convert(
+            TEST_AIRSPACE['airspace'], TEST_AIRSPACE['obstacle'])
+    assert oa == expected
+
+def test_async_tnp():
+    async def run():
+        aconv = AsyncConverter(ThreadPoolExecutor(2))
+        return await aconv.tnp(TEST_AIRSPACE['airspace'])
+
+    assert asyncio.run(run()) == yaixm.Tnp().convert(TEST_AIRSPACE['airspace'])
+
+def test_async_geojson():
+    async def run():
+        aconv = AsyncConverter()
+        return await aconv.geojson(TEST_AIRSPACE['airspace'], resolution=4)
+
+    expected = json.dumps(geojson(TEST_AIRSPACE['airspace'], resolution=4),
+                          sort_keys=True, indent=4)
+    assert asyncio.run(run()) == expected
+
+    async def run_empty():
+        return await AsyncConverter().geojson([])
+
+    assert asyncio.run(run_empty()) == json.dumps(geojson([]), sort_keys=True,
+                                                  indent=4)
+
+def test_async_dedup():
+    calls = []
+
+    def gen(n):
+        calls.append(n)
+        for i in range(n):
+            yield str(i)
+
+    async def run():
+        aconv = AsyncConverter(chunk_size=1)
+        streams = [aconv.stream("key", gen, 5) for i in range(3)]
+        return await asyncio.gather(*[aconv.join(s) for s in streams])
+
+    assert asyncio.run(run()) == ["01234"] * 3
+    assert calls == [5]
@@ -0,0 +1,52 @@
+import json
+
+import yaixm
+from yaixm.binary import BinaryAirspace, compile_binary
+
+from .synthetic import generate
+from .yaixm_test import TEST_AIRSPACE
+
+def compile_file(tmp_path, data):
+    path = tmp_path / "airspace.bin"
+    with open(path, "wb") as f:
+        compile_binary(data, f)
+    return path
+
+def to_plain(value):
+    return json.loads(json.dumps(value, default=lambda x: list(x) if
+                                 isinstance(x, yaixm.binary.Sequence) else
+                                 dict(x)))
+
+def test_round_trip(tmp_path):
+    data = generate(200, seed=3)
+    path = compile_file(tmp_path, data)
+
+    with BinaryAirspace(path) as binary:
+        assert binary.nvolumes == sum(len(f['geometry'])
+                                      for f in data['airspace'])
+        assert to_plain(binary.airspace) == data['airspace']
+        assert binary.obstacles() == data['obstacle']
+        assert binary.release == data['release']
+
+def test_convert(tmp_path):
+    data = generate(200, seed=4)
+    path = compile_file(tmp_path, data)
+
+    with BinaryAirspace(path) as binary:
+        for converter in [yaixm.Openair(), yaixm.Tnp()]:
+            assert converter.convert(binary.airspace) == \
+                   converter.convert(data['airspace'])
+
+def test_arrays(tmp_path):
+    path = compile_file(tmp_path, TEST_AIRSPACE)
+
+    with BinaryAirspace(path) as binary:
+        assert binary.nfeatures == len(TEST_AIRSPACE['airspace'])
+        assert binary.volume_lower_ft[0] == 0
+        assert binary.volume_upper_ft[0] == 2203
+        assert isinstance(binary.point_lat, memoryview)
+
+        feature = binary.airspace[0]
+        assert feature['name'] == "BENSON"
+        assert 'frequency' not in feature
+        assert feature['geometry'][0] == feature['geometry'][0]
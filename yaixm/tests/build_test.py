@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+import yaixm
+from yaixm.build import build, make_converter, Source
+
+from .yaixm_test import TEST_AIRSPACE
+
+def test_make_converter():
+    converter = make_converter("openair", {'seqno': True, 'north': 50})
+    assert converter.convert(TEST_AIRSPACE['airspace']) == ""
+
+    with pytest.raises(ValueError):
+        make_converter("foo", {})
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_build(tmp_path, jobs):
+    (tmp_path / "airspace.json").write_text(json.dumps(TEST_AIRSPACE))
+
+    manifest = {
+        'source': "airspace.json",
+        'outputs': [
+            {'file': "uk.txt", 'format': "openair"},
+            {'file': "loa.txt", 'format': "openair", 'loa': "all",
+             'header': "Test header"},
+            {'file': "uk.tnp", 'format': "tnp", 'obstacle': True, 'rat': True},
+            {'file': "merge.json", 'format': "json", 'loa': ["LOA FOO"]}
+        ]
+    }
+    timing = build(manifest, base_dir=str(tmp_path), jobs=jobs)
+    assert len(timing) == 6
+
+    oa = (tmp_path / "uk.txt").read_text()
+    assert oa == yaixm.Openair().convert(TEST_AIRSPACE['airspace'])
+
+    oa = (tmp_path / "loa.txt").read_text()
+    assert oa.startswith("* Test header")
+    assert "AN TEST BOX" in oa
+
+    tnp = (tmp_path / "uk.tnp").read_text()
+    assert "TITLE=RAT TEST" in tnp
+    assert "TITLE=OBSTACLE" in tnp
+
+    merged = json.loads((tmp_path / "merge.json").read_text())
+    assert "TEST BOX" in [f['name'] for f in merged['airspace']]
+
+def test_build_bad_loa(tmp_path):
+    (tmp_path / "airspace.json").write_text(json.dumps(TEST_AIRSPACE))
+    manifest = {
+        'source': "airspace.json",
+        'outputs': [{'file': "uk.txt", 'format': "openair", 'loa': ["BAR"]}]
+    }
+
+    with pytest.raises(ValueError):
+        build(manifest, base_dir=str(tmp_path))
+
+def test_single_loa():
+    source = Source(TEST_AIRSPACE)
+    assert source.merge_key({'loa': "LOA FOO"}) == \
+           source.merge_key({'loa': ["LOA FOO"]})
+
+    with pytest.raises(ValueError, match="Unknown LOA: BAR$"):
+        source.merge_key({'loa': "BAR"})
+
+def test_level_index_shared(tmp_path, monkeypatch):
+    import yaixm.index
+
+    built = []
+    class CountingIndex(yaixm.index.LevelIndex):
+        def __init__(self, airspace):
+            built.append(airspace)
+            super().__init__(airspace)
+    monkeypatch.setattr(yaixm.index, "LevelIndex", CountingIndex)
+
+    (tmp_path / "airspace.json").write_text(json.dumps(TEST_AIRSPACE))
+    manifest = {
+        'source': "airspace.json",
+        'outputs': [
+            {'file': "low.txt", 'format': "openair",
+             'level_band': ["SFC", "2000 ft"]},
+            {'file': "high.tnp", 'format': "tnp",
+             'level_band': ["2000 ft", "FL195"]},
+            {'file': "loa.txt", 'format': "openair", 'loa': "all",
+             'level_band': ["SFC", "FL195"]}
+        ]
+    }
+    build(manifest, base_dir=str(tmp_path), jobs=1)
+
+    # One index per merge key
+    assert len(built) == 2
+    assert "AN BENSON" in (tmp_path / "low.txt").read_text()
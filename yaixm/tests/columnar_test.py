@@ -0,0 +1,84 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from yaixm.columnar import columns, write_npz, load_npz, write_arrow, \
+                           load_arrow
+from yaixm.geometry import polygon_points
+
+from .synthetic import generate
+from .yaixm_test import TEST_AIRSPACE
+
+def test_columns():
+    airspace = generate(100, seed=32)['airspace']
+    cols = columns(airspace, resolution=4)
+
+    volumes = [(v, f) for f in airspace for v in f['geometry']]
+    assert len(cols['name']) == len(volumes)
+    assert len(cols['offsets']) == len(volumes) + 1
+    assert cols['offsets'][-1] == len(cols['lon']) == len(cols['lat'])
+
+    for n, (volume, feature) in enumerate(volumes):
+        assert cols['id'][n] == volume.get('id', "")
+        assert cols['type'][n] == feature['type']
+        assert airspace[cols['feature'][n]] is feature
+
+        points = polygon_points(volume['boundary'], 4)
+        start, end = cols['offsets'][n], cols['offsets'][n + 1]
+        assert list(zip(cols['lon'][start:end], cols['lat'][start:end])) == \
+               points
+        assert cols['north'][n] == max(p[1] for p in points)
+
+def test_benson():
+    cols = columns(TEST_AIRSPACE['airspace'])
+    assert cols['name'] == ["BENSON ATZ (NOTAM)", "FOOBAR"]
+    assert cols['rules'] == ["NOTAM", ""]
+    assert list(cols['normupper']) == [2203, 2203]
+
+def test_npz():
+    np = pytest.importorskip("numpy")
+
+    cols = columns(generate(100, seed=33)['airspace'], resolution=4)
+    f = io.BytesIO()
+    write_npz(f, cols)
+    f.seek(0)
+    data = load_npz(f)
+
+    assert list(data['name']) == cols['name']
+    assert np.array_equal(data['offsets'], np.array(cols['offsets']))
+    assert np.array_equal(data['lat'], np.array(cols['lat']))
+
+    # Vectorised per-volume vertex sums
+    sums = np.add.reduceat(data['lat'], data['offsets'][:-1])
+    n = 5
+    start, end = cols['offsets'][n], cols['offsets'][n + 1]
+    assert abs(sums[n] - sum(cols['lat'][start:end])) < 1e-6
+
+def test_arrow():
+    pytest.importorskip("pyarrow")
+
+    cols = columns(generate(100, seed=34)['airspace'], resolution=4)
+    f = io.BytesIO()
+    write_arrow(f, cols)
+    f.seek(0)
+    data = load_arrow(f)
+
+    assert data['name'].to_pylist() == cols['name']
+    assert data['offsets'].to_pylist() == list(cols['offsets'])
+    assert data['lon'].to_pylist() == list(cols['lon'])
+
+def test_cli(tmp_path):
+    pytest.importorskip("numpy")
+
+    src = tmp_path / "airspace.json"
+    src.write_text(json.dumps(TEST_AIRSPACE))
+    dst = tmp_path / "out.npz"
+
+    root = os.path.join(os.path.dirname(__file__), "..", "..")
+    subprocess.run([sys.executable, os.path.join(root, "cli.py"), "columnar",
+                    str(src), str(dst)], check=True, cwd=root)
+    assert list(load_npz(str(dst))['name']) == ["BENSON ATZ (NOTAM)", "FOOBAR"]
@@ -0,0 +1,45 @@
+from copy import deepcopy
+import json
+import pickle
+
+import yaml
+
+import yaixm
+from yaixm.compact import compact, json_default
+
+from .synthetic import generate
+from .yaixm_test import TEST_AIRSPACE
+
+def test_compact_equal():
+    data = generate(200, seed=5)
+    compacted = compact(data)
+
+    assert compacted == data
+    assert json.loads(json.dumps(compacted, default=json_default)) == data
+    assert pickle.loads(pickle.dumps(compacted)) == data
+
+def test_compact_load():
+    text = yaml.dump(TEST_AIRSPACE)
+    data = yaixm.load(text, compact=True)
+
+    volume = data['airspace'][0]['geometry'][0]
+    assert volume['boundary'][0]['circle']['radius'] == "2 nm"
+    assert 'arc' not in volume['boundary'][0]
+
+    # Repeated strings are shared
+    lower = [v['lower'] for f in data['airspace'] for v in f['geometry']]
+    assert lower[0] is lower[1]
+
+def test_compact_convert():
+    data = generate(200, seed=6)
+    compacted = compact(data)
+
+    for converter in [yaixm.Openair(), yaixm.Tnp()]:
+        assert converter.convert(compacted['airspace'],
+                                 compacted['obstacle']) == \
+               converter.convert(data['airspace'], data['obstacle'])
+
+    # LoA merge copies and modifies compact data
+    merged = yaixm.merge_loa(compacted['airspace'], compacted['loa'])
+    assert merged == yaixm.merge_loa(data['airspace'], data['loa'])
+    assert deepcopy(compacted) == data
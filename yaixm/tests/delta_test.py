@@ -0,0 +1,55 @@
+from copy import deepcopy
+
+import pytest
+
+import yaixm
+from yaixm.delta import make_delta, apply_delta, split_blocks
+
+from .synthetic import generate
+
+def edited(airspace):
+    airspace = deepcopy(airspace)
+    del airspace[3]
+    airspace.insert(10, airspace.pop(20))
+    airspace[15]['geometry'][0]['upper'] = "FL195"
+    airspace.append(deepcopy(airspace[0]))
+    airspace.insert(0, deepcopy(airspace[5]))
+    return airspace
+
+def test_split():
+    airspace = generate(20, seed=4)['airspace']
+    text = yaixm.Tnp(header="Test").convert(airspace)
+    header, blocks, trailer = split_blocks(text.split("\n"), "tnp")
+
+    assert header == ["# Test"]
+    assert trailer == ["#", "END"]
+    assert len(blocks) == sum(len(f['geometry']) for f in airspace)
+    assert header + sum((b for k, b in blocks), []) + trailer == \
+           text.split("\n")
+
+def test_delta():
+    old = generate(100, seed=5)['airspace']
+    new = edited(old)
+
+    for cls in [yaixm.Openair, yaixm.Tnp]:
+        old_text = cls(header="Old").convert(old)
+        new_text = cls(header="New").convert(new)
+
+        delta = make_delta(old_text, new_text)
+        assert delta['header'] == [new_text.split("\n")[0]]
+        assert len(delta['change']) == 1
+        assert apply_delta(old_text, delta) == new_text
+
+        # No changes
+        delta = make_delta(new_text, new_text)
+        assert delta['remove'] == delta['change'] == delta['add'] == []
+        assert apply_delta(new_text, delta) == new_text
+
+def test_wrong_source():
+    airspace = generate(100, seed=6)['airspace']
+    old_text = yaixm.Openair().convert(airspace)
+    new_text = yaixm.Openair().convert(edited(airspace))
+
+    delta = make_delta(old_text, new_text)
+    with pytest.raises(ValueError):
+        apply_delta(new_text, delta)
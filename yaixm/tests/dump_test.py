@@ -0,0 +1,44 @@
+import yaml
+
+import yaixm
+from yaixm.compact import compact
+from yaixm.helpers import PPRINT_PROP_LIST
+from yaixm.stream import iter_load
+
+from .synthetic import generate
+from .yaixm_test import TEST_AIRSPACE
+
+# Reference emitter, pure Python with linear property search
+class ReferenceDumper(yaml.Dumper):
+    pass
+
+ReferenceDumper.add_representer(dict, lambda dumper, data:
+    dumper.represent_mapping('tag:yaml.org,2002:map',
+        sorted(data.items(), key=lambda t: PPRINT_PROP_LIST.index(t[0]))))
+
+def test_dump_identical():
+    data = generate(100, seed=12)
+    expected = yaml.dump(data, Dumper=ReferenceDumper)
+
+    assert yaixm.dump(data) == expected
+    assert yaixm.dump(compact(data)) == expected
+    assert yaixm.dump(TEST_AIRSPACE) == \
+           yaml.dump(TEST_AIRSPACE, Dumper=ReferenceDumper)
+
+def test_iter_dump():
+    data = generate(100, seed=13)
+    expected = yaixm.dump(data)
+
+    assert "".join(yaixm.iter_dump(data)) == expected
+    assert "".join(yaixm.iter_dump(iter_load(expected))) == expected
+
+    data['rat'] = []
+    assert "".join(yaixm.iter_dump(data)) == yaixm.dump(data)
+
+def test_dump_stream(tmp_path):
+    path = tmp_path / "airspace.yaml"
+    with open(path, "w") as f:
+        yaixm.dump(TEST_AIRSPACE, f)
+
+    with open(path) as f:
+        assert yaixm.load(f) == TEST_AIRSPACE
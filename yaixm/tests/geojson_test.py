@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+from yaixm.geojson import geojson, boundary_points, compact_boundary, \
+                          expand_boundary, parallel_points
+
+from .synthetic import generate
+
+def test_compact_boundary():
+    airspace = generate(100, seed=27)['airspace']
+    for feature in airspace:
+        for volume in feature['geometry']:
+            boundary = volume['boundary']
+            assert expand_boundary(compact_boundary(boundary)) == boundary
+
+def test_parallel():
+    airspace = generate(100, seed=28)['airspace']
+    serial = json.dumps(geojson(airspace, resolution=4), sort_keys=True)
+    parallel = json.dumps(geojson(airspace, resolution=4, jobs=2),
+                          sort_keys=True)
+    assert parallel == serial
+
+    # Several chunks, in order
+    boundaries = [v['boundary'] for f in airspace for v in f['geometry']]
+    assert parallel_points(boundaries, 4, jobs=2, chunk_size=7) == \
+           [boundary_points(b, 4) for b in boundaries]
+
+def test_cli(tmp_path):
+    src = tmp_path / "airspace.json"
+    src.write_text(json.dumps(generate(40, seed=29)))
+
+    root = os.path.join(os.path.dirname(__file__), "..", "..")
+    outputs = []
+    for jobs in ["1", "2"]:
+        dst = tmp_path / ("out%s.geojson" % jobs)
+        subprocess.run(
+            [sys.executable, os.path.join(root, "cli.py"), "geojson", str(src),
+             str(dst), "--jobs", jobs], check=True, cwd=root)
+        outputs.append(dst.read_bytes())
+
+    assert outputs[0] == outputs[1]
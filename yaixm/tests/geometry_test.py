@@ -0,0 +1,82 @@
+import math
+import random
+
+from yaixm.geometry import Shape, in_polygon, haversine, radius_nm
+
+from .synthetic import generate, latlon, offset
+
+# Densified boundary polygon, for comparison
+def densify(shape, n=2000):
+    points = []
+    for edge in shape.edges:
+        if hasattr(edge, 'sweep'):
+            for i in range(n):
+                points.append(edge.point(edge.start + edge.sweep * i / n))
+        else:
+            points.append(edge.p0)
+    return points
+
+def test_circle():
+    shape = Shape([{'circle': {'centre': latlon(52, -1), 'radius': "5 nm"}}])
+    assert shape.contains(52, -1)
+    assert shape.contains(*offset(52, -1, 4.9, 30))
+    assert not shape.contains(*offset(52, -1, 5.1, 30))
+
+def test_arc_directions():
+    # Square with west side replaced by an arc bulging out...
+    c = (52, -1)
+    points = [latlon(*offset(*c, 5, b)) for b in [45, 135, 225, 315]]
+    shape = Shape([{'line': points[:3]},
+                   {'arc': {'centre': latlon(*c), 'dir': "cw",
+                            'radius': "5 nm", 'to': points[3]}}])
+    assert shape.contains(*offset(*c, 4.5, 270))
+    assert shape.contains(*offset(*c, 3, 180))
+
+    # ...or in, from a centre 10 nm west
+    radius = math.hypot(10 - 5 / math.sqrt(2), 5 / math.sqrt(2))
+    shape = Shape([{'line': points[:3]},
+                   {'arc': {'centre': latlon(*offset(*c, 10, 270)),
+                            'dir': "ccw", 'radius': "%.4f nm" % radius,
+                            'to': points[3]}}])
+    assert not shape.contains(*offset(*c, 3, 270))
+    assert shape.contains(*offset(*c, 2, 270))
+    assert shape.contains(*offset(*c, 3, 180))
+
+def test_contains_random():
+    rand = random.Random(1)
+    airspace = generate(200, seed=17)['airspace']
+    for feature in airspace:
+        for volume in feature['geometry']:
+            shape = Shape(volume['boundary'])
+            poly = densify(shape)
+            xmin, ymin, xmax, ymax = shape.bbox
+            for n in range(20):
+                p = (rand.uniform(xmin, xmax), rand.uniform(ymin, ymax))
+                assert shape.contains_xy(p) == in_polygon(poly, p)
+
+def test_intervals():
+    shape = Shape([{'circle': {'centre': latlon(52, -1), 'radius': "5 nm"}}])
+    p = shape.projection.xy(*offset(52, -1, 10, 270))
+    q = shape.projection.xy(*offset(52, -1, 10, 90))
+    intervals = shape.intervals_xy(p, q)
+    assert len(intervals) == 1
+    assert abs(intervals[0][0] - 0.25) < 1e-6
+    assert abs(intervals[0][1] - 0.75) < 1e-6
+
+def test_distance():
+    assert abs(haversine(52, -1, 53, -1) - 60.04) < 0.01
+    assert abs(radius_nm("1.852 km") - 1) < 1e-9
+
+def test_polygon_points():
+    # Same as GeoJSON (Vincenty) points, to within a metre
+    from yaixm.geojson import boundary_points
+    from yaixm.geometry import polygon_points
+
+    airspace = generate(50, seed=31)['airspace']
+    for feature in airspace:
+        for volume in feature['geometry']:
+            points = polygon_points(volume['boundary'], 4)
+            expected = boundary_points(volume['boundary'], 4)
+            assert len(points) == len(expected)
+            for p, q in zip(points, expected):
+                assert haversine(p[1], p[0], q[1], q[0]) * 1852 < 1
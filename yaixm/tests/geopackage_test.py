@@ -0,0 +1,67 @@
+import json
+import os
+import sqlite3
+import struct
+import subprocess
+import sys
+
+from yaixm.geometry import polygon_points
+from yaixm.geopackage import write_geopackage, APPLICATION_ID
+
+from .synthetic import generate
+from .yaixm_test import TEST_AIRSPACE
+
+def test_write(tmp_path):
+    data = generate(200, seed=30, nobstacle=50)
+    path = str(tmp_path / "test.gpkg")
+    write_geopackage(path, data['airspace'], data['obstacle'], resolution=4)
+
+    db = sqlite3.connect(path)
+    assert db.execute("PRAGMA application_id").fetchone()[0] == APPLICATION_ID
+
+    nvol = sum(len(f['geometry']) for f in data['airspace'])
+    assert db.execute("SELECT count(*) FROM feature").fetchone()[0] == \
+           len(data['airspace'])
+    assert db.execute("SELECT count(*) FROM volume").fetchone()[0] == nvol
+    assert db.execute("SELECT count(*) FROM rtree_volume_geom").fetchone()[0] \
+           == nvol
+    assert db.execute("SELECT count(*) FROM obstacle").fetchone()[0] == 50
+
+    # Polygon geometry and bounding box
+    volume = data['airspace'][0]['geometry'][0]
+    points = polygon_points(volume['boundary'], 4)
+    blob, = db.execute("SELECT geom FROM volume WHERE fid = 1").fetchone()
+    assert blob[:2] == b"GP"
+    npoints, = struct.unpack("<I", blob[8 + 32 + 9:8 + 32 + 13])
+    assert npoints == len(points)
+
+    box = db.execute("SELECT minx, maxx, miny, maxy FROM rtree_volume_geom "
+                     "WHERE id = 1").fetchone()
+    assert box[0] <= min(p[0] for p in points) and \
+           box[1] >= max(p[0] for p in points)
+
+    # Spatial and level query
+    rows = db.execute(
+        "SELECT v.fid FROM volume v JOIN rtree_volume_geom r "
+        "ON v.fid = r.id WHERE r.minx <= 0 AND r.maxx >= -1 AND "
+        "r.miny <= 53 AND r.maxy >= 52 AND v.normlower < 6500").fetchall()
+    assert rows
+
+    indexes = {r[0] for r in db.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"volume_id", "volume_type", "volume_localtype",
+            "volume_level"} <= indexes
+
+def test_cli(tmp_path):
+
+    src = tmp_path / "airspace.json"
+    src.write_text(json.dumps(TEST_AIRSPACE))
+    dst = tmp_path / "out.gpkg"
+
+    root = os.path.join(os.path.dirname(__file__), "..", "..")
+    subprocess.run([sys.executable, os.path.join(root, "cli.py"), "gpkg",
+                    str(src), str(dst)], check=True, cwd=root)
+
+    db = sqlite3.connect(str(dst))
+    names = [r[0] for r in db.execute("SELECT name FROM volume ORDER BY fid")]
+    assert names == ["BENSON ATZ (NOTAM)", "FOOBAR"]
@@ -0,0 +1,57 @@
+import argparse
+
+import pytest
+
+import yaixm
+from yaixm.cli import add_level_args
+from yaixm.helpers import level
+from yaixm.index import LevelIndex
+
+from .synthetic import generate
+
+def brute_force(volumes, lower, upper):
+    return [n for n, (v, f) in enumerate(volumes)
+            if level(v['lower']) < upper and level(v['upper']) > lower]
+
+def test_level():
+    assert level("SFC") == 0
+    assert level("FL65") == 6500
+    assert level("2000 ft") == 2000
+    assert level("1000 m") == 3281
+
+def test_level_index():
+    airspace = generate(1000, seed=15)['airspace']
+    index = LevelIndex(airspace)
+    assert len(index) == sum(len(f['geometry']) for f in airspace)
+
+    for lower, upper in [(2000, 6500), (0, 1), (24500, 30000), (0, 100000),
+                         (5000, 5000)]:
+        assert index.query(lower, upper) == \
+               brute_force(index.volumes, lower, upper)
+
+    assert index.query("2000 ft", "FL65") == index.query(2000, 6500)
+    assert index.at("FL100") == brute_force(index.volumes, 10000, 10001)
+    assert index.below(3000) == [n for n, (v, f) in enumerate(index.volumes)
+                                 if level(v['lower']) < 3000]
+
+def test_band_export():
+    airspace = generate(200, seed=16)['airspace']
+    index = LevelIndex(airspace)
+
+    # Band from surface is equivalent to make_filter max_level
+    converter = yaixm.Openair(filter_func=yaixm.make_filter(max_level=6500))
+    expected = converter.convert(airspace)
+    assert yaixm.Openair().convert_volumes(index.band("SFC", "FL65")) == \
+           expected
+
+def test_level_band_args():
+    parser = argparse.ArgumentParser()
+    add_level_args(parser)
+
+    args = parser.parse_args(["--level-band", "SFC", "FL65"])
+    assert args.level_band == ["SFC", "FL65"]
+    assert parser.parse_args(["--level-band", "500 m", "3000 ft"]).level_band
+
+    for band in [["5000", "FL65"], ["SFC", "FL6"], ["SFC", "3000ft"]]:
+        with pytest.raises(SystemExit):
+            parser.parse_args(["--level-band"] + band)
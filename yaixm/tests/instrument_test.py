@@ -0,0 +1,74 @@
+import json
+import subprocess
+import sys
+
+from .yaixm_test import TEST_AIRSPACE
+
+def run_cli(command, *args):
+    code = "import sys, yaixm.cli; sys.argv = %r; yaixm.cli.%s()" % \
+           (["yaixm_" + command] + list(args), command)
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+def test_profile_report(tmp_path):
+    airspace = tmp_path / "airspace.json"
+    airspace.write_text(json.dumps(TEST_AIRSPACE))
+    report = tmp_path / "report.json"
+
+    run_cli("openair", str(airspace), str(tmp_path / "out.txt"),
+            "--profile-json", str(report))
+
+    stats = json.loads(report.read_text())
+    assert [s['name'] for s in stats['stages']] == ["load", "convert", "write"]
+    assert stats['functions']['Openair.do_volume']['calls'] == 2
+    assert stats['counters']['filter.accept'] == 2
+
+def test_profile_off():
+    from yaixm import instrument
+
+    with instrument.stage("foo"):
+        pass
+
+    assert not instrument.enabled()
+    assert instrument.snapshot()['stages'] == []
+
+def test_enable_disable():
+    from yaixm import convert, helpers, instrument
+
+    level = helpers.level
+    do_volume = convert.Openair.do_volume
+    defaults = convert.Openair.__init__.__defaults__
+
+    instrument.enable()
+    try:
+        assert helpers.level is not level
+        assert convert.Openair.do_volume is not do_volume
+        assert convert.Openair.__init__.__defaults__ != defaults
+    finally:
+        instrument.disable()
+        instrument.reset()
+
+    assert not instrument.enabled()
+    assert helpers.level is level
+    assert convert.Openair.do_volume is do_volume
+    assert convert.Openair.__init__.__defaults__ == defaults
+
+def test_build_stage_names(tmp_path):
+    from yaixm import instrument
+    from yaixm.build import build
+
+    (tmp_path / "airspace.json").write_text(json.dumps(TEST_AIRSPACE))
+    manifest = {
+        'source': "airspace.json",
+        'outputs': [{'file': "uk.txt", 'format': "openair"}]
+    }
+
+    instrument.enable()
+    try:
+        build(manifest, base_dir=str(tmp_path), jobs=1)
+        stages = instrument.snapshot()['stages']
+    finally:
+        instrument.disable()
+        instrument.reset()
+
+    assert [s['name'] for s in stages] == ["load", "merge", "uk.txt"]
+    assert 'process_max_rss_kb' in stages[0]
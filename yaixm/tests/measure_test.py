@@ -0,0 +1,61 @@
+import csv
+import io
+import math
+
+from yaixm.geometry import Shape, NM_TO_DEGREES
+from yaixm.measure import measure, write_csv
+
+from .synthetic import generate, latlon, offset
+from .geometry_test import densify
+from .yaixm_test import TEST_AIRSPACE
+
+# Shoelace area of projected polygon
+def poly_area(poly):
+    return abs(sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1)
+                   in zip(poly, poly[1:] + poly[:1]))) / 2
+
+def test_circle():
+    shape = Shape([{'circle': {'centre': latlon(52, -1), 'radius': "5 nm"}}])
+    assert abs(shape.area() - math.pi * 25) < 1e-6
+    assert abs(shape.perimeter() - math.pi * 10) < 1e-6
+
+def test_rectangle():
+    # Lat/lon rectangle, compared with area on a sphere
+    shape = Shape([{'line': [latlon(50, -3), latlon(53, -3), latlon(53, 1),
+                             latlon(50, 1)]}])
+    r = 1 / math.radians(NM_TO_DEGREES)
+    area = r ** 2 * math.radians(4) * \
+           (math.sin(math.radians(53)) - math.sin(math.radians(50)))
+    assert abs(shape.area() / area - 1) < 1e-3
+
+def test_arc():
+    # Square with an arc bulging out on the west side
+    c = (52, -1)
+    points = [latlon(*offset(*c, 5, b)) for b in [45, 135, 225, 315]]
+    shape = Shape([{'line': points[:3]},
+                   {'arc': {'centre': latlon(*c), 'dir': "cw",
+                            'radius': "5 nm", 'to': points[3]}}])
+    assert abs(shape.area() - (50 + 12.5 * (math.pi / 2 - 1))) < 0.1
+    assert abs(shape.perimeter() - (15 * math.sqrt(2) + 2.5 * math.pi)) < 0.05
+
+def test_densified():
+    airspace = generate(100, seed=21)['airspace']
+    for feature in airspace:
+        for volume in feature['geometry']:
+            shape = Shape(volume['boundary'])
+            poly = densify(shape, 500)
+
+            # Densified area is uncorrected for projection scale
+            area = shape.area()
+            assert abs(area - poly_area(poly)) < 0.02 * area + 0.05
+
+def test_table():
+    rows = measure(TEST_AIRSPACE['airspace'])
+    assert len(rows) == 2
+    assert rows[0]['name'] == "BENSON ATZ (NOTAM)"
+
+    out = io.StringIO()
+    write_csv(rows, out)
+    table = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert len(table) == 2
+    assert abs(float(table[0]['area_nm2']) - math.pi * 4) < 0.01
@@ -0,0 +1,44 @@
+import yaixm
+from yaixm.obstacle import ObstacleArray, cluster, filter_indices
+
+from .synthetic import generate, latlon
+
+# Converter with filter which can't be applied in bulk
+def per_obstacle(converter):
+    converter.filter_func = lambda v, f: yaixm.make_filter(
+            north=54, south=52, exclude=[{'name': "PYLON"}])(v, f)
+    return converter
+
+def test_bulk_identical():
+    obstacles = generate(10, seed=14, nobstacle=500)['obstacle']
+
+    airfilter = yaixm.make_filter(north=54, south=52,
+                                  exclude=[{'name': "PYLON"}])
+    for cls in [yaixm.Openair, yaixm.Tnp]:
+        bulk = cls(filter_func=airfilter).do_obstacles(obstacles)
+        single = per_obstacle(cls()).do_obstacles(obstacles)
+        assert bulk == single
+        assert 0 < len(bulk) < len(obstacles)
+
+def test_select():
+    obstacles = ObstacleArray([
+        {'position': latlon(52, -1), 'elevation': "500 ft", 'type': "MET"},
+        {'position': latlon(53, 1), 'elevation': "900 ft", 'type': "MET"},
+        {'position': latlon(53, -1), 'elevation': "100 m", 'type': "MET"}])
+
+    assert list(obstacles.select(west=-2, east=0)) == [0, 2]
+    assert list(obstacles.select(min_elevation=600)) == [1]
+
+def test_cluster():
+    obstacles = ObstacleArray([
+        {'position': latlon(52, -1), 'elevation': "500 ft", 'type': "MET"},
+        {'position': latlon(52.005, -1), 'elevation': "900 ft", 'type': "PYL"},
+        {'position': latlon(52.1, -1), 'elevation': "100 ft", 'type': "MET"}])
+
+    indices = filter_indices(obstacles, yaixm.make_filter().params)
+    assert cluster(obstacles, indices) == [(1, [1, 0]), (2, [2])]
+
+    output = yaixm.Openair(obstacle_cluster=0.5).do_obstacles(obstacles)
+    assert len(output) == 2
+    assert output[0][2] == "AN PYLON"
+    assert output[0][4] == "AH 900ALT"
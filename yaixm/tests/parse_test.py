@@ -0,0 +1,73 @@
+import yaixm
+from yaixm.convert import seq_name, make_openair_type
+from yaixm.parse import iter_openair, iter_tnp
+from yaixm.roundtrip import check_roundtrip
+
+from .synthetic import generate
+
+ARC_VOLUME = {
+    'lower': "1500 ft",
+    'upper': "FL65",
+    'boundary': [
+        {'line': ["513000N 0010000W", "520000N 0010000W"]},
+        {'arc': {'dir': "ccw", 'radius': "15 nm", 'centre': "514500N 0010000W",
+                 'to': "513000N 0010000W"}}]
+}
+
+ARC_FEATURE = {'name': "ARC", 'type': "CTA", 'class': "D",
+               'geometry': [ARC_VOLUME]}
+
+def volumes(airspace):
+    return [(v, f) for f in airspace for v in f['geometry']]
+
+def test_openair():
+    lines = yaixm.Openair().convert([ARC_FEATURE]).splitlines()
+    [(volume, feature)] = list(iter_openair(lines))
+
+    assert feature == {'name': "ARC", 'type': "D"}
+    assert volume['lower'] == "1500 ft"
+    assert volume['upper'] == "FL65"
+
+    # Closing point is removed, radius is calculated
+    assert volume['boundary'][0] == ARC_VOLUME['boundary'][0]
+    arc = volume['boundary'][1]['arc']
+    assert arc['dir'] == "ccw"
+    assert arc['to'] == "513000N 0010000W"
+    assert abs(float(arc['radius'].split()[0]) - 15) < 0.01
+
+def test_tnp():
+    lines = yaixm.Tnp().convert([ARC_FEATURE]).splitlines()
+    [(volume, feature)] = list(iter_tnp(lines))
+
+    assert feature == {'name': "ARC", 'type': "CTA/CTR", 'class': "D"}
+    assert volume['boundary'][1]['arc']['radius'] == "15 nm"
+    assert len(volume['boundary']) == 2
+
+def test_roundtrip():
+    data = generate(300, seed=11, nobstacle=200)
+    airspace = data['airspace']
+
+    for converter in [yaixm.Openair(),
+                      yaixm.Openair(name_func=seq_name,
+                                    type_func=make_openair_type(comp=True),
+                                    obstacle_cluster=1),
+                      yaixm.Tnp()]:
+        lines = converter.convert(airspace, data['obstacle']).splitlines()
+        assert check_roundtrip(converter, volumes(airspace), lines,
+                               data['obstacle']) == []
+
+def test_mismatch():
+    converter = yaixm.Tnp()
+    lines = converter.convert([ARC_FEATURE]).splitlines()
+
+    bad = [l.replace("TOPS=FL65", "TOPS=FL75") for l in lines]
+    [m] = check_roundtrip(converter, volumes([ARC_FEATURE]), bad)
+    assert (m['field'], m['expected'], m['found']) == ("upper", "FL65", "FL75")
+
+    bad = [l.replace("RADIUS=15 ", "RADIUS=14 ") for l in lines]
+    [m] = check_roundtrip(converter, volumes([ARC_FEATURE]), bad)
+    assert m['field'] == "boundary"
+
+    # Missing block
+    [m] = check_roundtrip(converter, volumes([ARC_FEATURE] * 2), lines)
+    assert (m['index'], m['field'], m['found']) == (1, "block", None)
@@ -0,0 +1,82 @@
+import math
+import random
+
+from yaixm.geometry import Shape
+from yaixm.proximity import ProximityQuery
+
+from .synthetic import generate, latlon, offset
+from .geometry_test import densify
+from .yaixm_test import TEST_AIRSPACE
+
+# Distance from point to polygon edges
+def poly_distance(poly, p):
+    result = []
+    for (x0, y0), (x1, y1) in zip(poly, poly[1:] + poly[:1]):
+        ex, ey = x1 - x0, y1 - y0
+        t = ((p[0] - x0) * ex + (p[1] - y0) * ey) / (ex * ex + ey * ey)
+        t = max(0, min(1, t))
+        result.append(math.hypot(p[0] - x0 - t * ex, p[1] - y0 - t * ey))
+    return min(result)
+
+def test_edge_distances():
+    c = (52, -1)
+    circle = Shape([{'circle': {'centre': latlon(*c), 'radius': "5 nm"}}])
+    assert abs(circle.distance(*c) - 5) < 0.01
+    assert abs(circle.distance(*offset(*c, 8, 60)) - 3) < 0.01
+
+    # Square with an arc bulging out on the west side
+    points = [latlon(*offset(*c, 5, b)) for b in [45, 135, 225, 315]]
+    shape = Shape([{'line': points[:3]},
+                   {'arc': {'centre': latlon(*c), 'dir': "cw",
+                            'radius': "5 nm", 'to': points[3]}}])
+    assert abs(shape.distance(*offset(*c, 7, 270)) - 2) < 0.01
+    assert abs(shape.distance(*offset(*c, 7, 90)) -
+               (7 - 5 / 2 ** 0.5)) < 0.01
+
+def test_distance_random():
+    rand = random.Random(2)
+    airspace = generate(100, seed=19)['airspace']
+    for feature in airspace:
+        for volume in feature['geometry']:
+            shape = Shape(volume['boundary'])
+            poly = densify(shape, 500)
+            xmin, ymin, xmax, ymax = shape.bbox
+            for n in range(5):
+                p = (rand.uniform(xmin - 5, xmax + 5),
+                     rand.uniform(ymin - 5, ymax + 5))
+                # Arc end points are rounded to the nearest second
+                assert abs(shape.distance_xy(p) - poly_distance(poly, p)) < 0.03
+
+def test_nearest_benson():
+    query = ProximityQuery(TEST_AIRSPACE['airspace'])
+
+    result = query.nearest(*offset(51.615, -1.096, 1, 0), k=5)
+    assert len(result) == 2
+    for r in result:
+        assert r['inside']
+        assert abs(r['distance'] - 1) < 0.05
+
+    result = query.nearest(*offset(51.615, -1.096, 10, 0), k=1)
+    assert len(result) == 1
+    assert not result[0]['inside']
+    assert abs(result[0]['distance'] - 8) < 0.05
+
+    assert query.nearest(*offset(51.615, -1.096, 10, 0), max_distance=5) == []
+    assert query.nearest(51.615, -1.096, altitude="FL50") == []
+
+def test_nearest_brute_force():
+    rand = random.Random(3)
+    airspace = generate(500, seed=20)['airspace']
+    query = ProximityQuery(airspace, cell_size=0.1)
+
+    positions = [(rand.uniform(50, 55), rand.uniform(-4, 1)) for n in range(20)]
+    results = query.nearest_batch(positions, k=4)
+    for (lat, lon), result in zip(positions, results):
+        expected = []
+        for n, shape in enumerate(query.index.shapes):
+            d = 0.0 if shape.contains(lat, lon) else shape.distance(lat, lon)
+            expected.append((d, n))
+        expected.sort()
+
+        found = [0.0 if r['inside'] else r['distance'] for r in result]
+        assert found == [d for d, n in expected[:4]]
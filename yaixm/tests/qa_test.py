@@ -0,0 +1,103 @@
+import json
+import os
+import subprocess
+import sys
+
+from yaixm.geometry import Shape
+from yaixm.helpers import level
+from yaixm.qa import candidate_pairs, check_pair, find_conflicts
+
+from .synthetic import generate, latlon, offset
+
+def square(lat, lon, size):
+    return [{'line': [latlon(lat, lon), latlon(lat + size, lon),
+                      latlon(lat + size, lon + size), latlon(lat, lon + size)]}]
+
+def test_squares():
+    # Adjacent, overlapping, identical and nearly adjacent
+    assert check_pair(square(52, -1, 0.1), square(52, -0.9, 0.1), True) is None
+    assert check_pair(square(52, -1, 0.1), square(52, -0.95, 0.1),
+                      True) == ("overlap", None)
+    assert check_pair(square(52, -1, 0.1), square(52, -1, 0.1),
+                      True) == ("duplicate", None)
+
+    typ, distance = check_pair(square(52, -1, 0.1),
+                               square(52, -0.899, 0.1), True)
+    assert typ == "gap" and 0.03 < distance < 0.05
+    assert check_pair(square(52, -1, 0.1), square(52, -0.899, 0.1),
+                      False) is None
+
+    # Inside
+    assert check_pair(square(52, -1, 0.1), square(52.02, -0.98, 0.05),
+                      False) == ("overlap", None)
+
+def test_arcs():
+    # Circle split into halves by a diameter
+    c = (52, -1)
+    n, s = latlon(*offset(*c, 5, 0)), latlon(*offset(*c, 5, 180))
+    east = [{'line': [n, s]},
+            {'arc': {'centre': latlon(*c), 'dir': "ccw", 'radius': "5 nm",
+                     'to': n}}]
+    west = [{'line': [s, n]},
+            {'arc': {'centre': latlon(*c), 'dir': "ccw", 'radius': "5 nm",
+                     'to': s}}]
+    circle = [{'circle': {'centre': latlon(*c), 'radius': "5 nm"}}]
+    assert check_pair(east, west, True) is None
+    assert check_pair(east, circle, True) == ("overlap", None)
+
+    # Intersecting circles
+    other = [{'circle': {'centre': latlon(*offset(*c, 8, 45)),
+                         'radius': "5 nm"}}]
+    touching = [{'circle': {'centre': latlon(*offset(*c, 10.5, 45)),
+                            'radius': "5 nm"}}]
+    assert check_pair(circle, other, False) == ("overlap", None)
+    assert check_pair(circle, touching, False) is None
+
+def test_candidates():
+    airspace = generate(300, seed=22)['airspace']
+    volumes = [v for f in airspace for v in f['geometry']]
+    shapes = [Shape(v['boundary']) for v in volumes]
+    lower = [level(v['lower']) for v in volumes]
+    upper = [level(v['upper']) for v in volumes]
+
+    expected = []
+    for i in range(len(shapes)):
+        for j in range(i + 1, len(shapes)):
+            s1, w1, n1, e1 = shapes[i].latlon_bbox
+            s2, w2, n2, e2 = shapes[j].latlon_bbox
+            if s1 <= n2 and s2 <= n1 and w1 <= e2 and w2 <= e1 and \
+                    lower[i] < upper[j] and lower[j] < upper[i]:
+                expected.append((i, j))
+
+    assert candidate_pairs(shapes, lower, upper) == expected
+
+def test_find_conflicts():
+    airspace = generate(300, seed=23)['airspace']
+    serial = find_conflicts(airspace, jobs=1, chunk_size=10)
+    assert serial
+    assert find_conflicts(airspace, jobs=2, chunk_size=10) == serial
+
+    # Stacked volumes of one feature, with overlapping levels
+    volume = {'lower': "SFC", 'upper': "2000 ft", 'id': "a",
+              'boundary': square(52, -1, 0.1)}
+    feature = {'name': "TEST", 'type': "D", 'geometry': [
+        volume, dict(volume, id="b", lower="1500 ft", upper="FL50"),
+        dict(volume, id="c", lower="FL50", upper="FL100")]}
+    findings = find_conflicts([feature])
+    assert findings == [{'type': "duplicate", 'volumes': ["a", "b"],
+                         'names': ["TEST-A", "TEST-B"], 'same_feature': True}]
+
+def test_cli(tmp_path):
+    volume = {'lower': "SFC", 'upper': "2000 ft", 'id': "a",
+              'boundary': square(52, -1, 0.1)}
+    feature = {'name': "TEST", 'type': "D",
+               'geometry': [volume, dict(volume, id="b")]}
+    src = tmp_path / "airspace.json"
+    src.write_text(json.dumps({'airspace': [feature]}))
+
+    root = os.path.join(os.path.dirname(__file__), "..", "..")
+    result = subprocess.run(
+        [sys.executable, os.path.join(root, "cli.py"), "qa", str(src),
+         "--json"], stdout=subprocess.PIPE, text=True, cwd=root)
+    assert result.returncode == 1
+    assert json.loads(result.stdout)[0]['volumes'] == ["a", "b"]
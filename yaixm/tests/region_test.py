@@ -0,0 +1,132 @@
+import json
+import os
+import subprocess
+import sys
+
+from yaixm.geojson import geojson_volumes
+from yaixm.geometry import Shape, clip_polygon
+from yaixm.region import Region, make_regions, region_obstacles, split
+
+from .synthetic import generate
+from .yaixm_test import TEST_AIRSPACE
+
+# Shoelace area of polygon
+def area(points):
+    return abs(sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1)
+                   in zip(points, points[1:] + points[:1]))) / 2
+
+def test_clip_polygon():
+    square = [(0, 0), (2, 0), (2, 2), (0, 2)]
+    result = clip_polygon(square, [(1, 1), (1, 3), (3, 3), (3, 1)])
+    assert [sorted(p) for p in result] == [[(1, 1), (1, 2), (2, 1), (2, 2)]]
+    assert clip_polygon(square, [(5, 5), (6, 5), (6, 6)]) == []
+
+    # Non-convex clip polygon splits the square
+    clip = [(-1, -1), (3, -1), (3, 0.5), (1, 0.5), (1, 1.5), (3, 1.5),
+            (3, 3), (-1, 3)][::-1]
+    result = clip_polygon(square, clip)
+    assert len(result) == 1 and abs(area(result[0]) - 3) < 1e-6
+
+    clip = [(1, -1), (3, -1), (3, 3), (1, 3), (1, 1.5), (2.5, 1.5),
+            (2.5, 0.5), (1, 0.5)]
+    result = clip_polygon(square, clip)
+    assert len(result) == 2
+    assert abs(sum(area(p) for p in result) - 1) < 1e-6
+
+    # Inside, and containing, the clip polygon
+    assert clip_polygon(square, [(-1, -1), (3, -1), (3, 3)]) != []
+    assert clip_polygon(square, [(0.5, 0.5), (1.5, 0.5), (1, 1)]) == \
+           [[(0.5, 0.5), (1.5, 0.5), (1, 1)]]
+
+    # Shared edges and vertices
+    result = clip_polygon(square, [(1, 0), (3, 0), (3, 2), (1, 2)])
+    assert len(result) == 1 and abs(area(result[0]) - 2) < 1e-6
+
+def test_split():
+    regions = make_regions([
+        {'name': "north", 'box': {'south': 51.6, 'north': 52,
+                                  'west': -2, 'east': 0}},
+        {'name': "away", 'box': {'south': 50, 'north': 51,
+                                 'west': -2, 'east': 0}},
+        {'name': "circle", 'boundary': [{'circle': {
+            'centre': "513654N 0010545W", 'radius': "5 nm"}}]}])
+
+    volumes = split(TEST_AIRSPACE['airspace'], regions)
+    assert len(volumes['north']) == 2
+    assert volumes['away'] == []
+    assert len(volumes['circle']) == 2
+
+def test_split_brute_force():
+    airspace = generate(500, seed=25)['airspace']
+    region = Region("test", box={'south': 51.5, 'north': 53,
+                                 'west': -2.5, 'east': -0.5})
+    volumes = split(airspace, [region])['test']
+
+    expected = []
+    for feature in airspace:
+        for volume in feature['geometry']:
+            shape = Shape(volume['boundary'])
+            box = Shape(region.boundary, shape.projection)
+            if shape.compare(box, 0.01):
+                expected.append(id(volume))
+
+    assert expected
+    assert [id(v) for v, f in volumes] == expected
+
+def test_clip_geojson():
+    region = Region("west", box={'south': 51, 'north': 52, 'west': -2,
+                                 'east': -1.0958})
+    volumes = split(TEST_AIRSPACE['airspace'], [region])['west']
+    gjson = geojson_volumes(volumes, clip=region.points())
+    for feature in gjson['features']:
+        points = feature['geometry']['coordinates'][0]
+        assert points[0] == points[-1]
+        assert max(p[0] for p in points) <= -1.0958 + 1e-9
+        assert min(p[0] for p in points) < -1.12
+
+def test_clip_geojson_concave():
+    # Region with a notch cutting through the Benson circle
+    region = Region("notch", boundary=[{'line': [
+        "510000N 0020000W", "520000N 0020000W", "520000N 0010000W",
+        "513700N 0010000W", "513700N 0011000W", "513630N 0011000W",
+        "513630N 0010000W", "510000N 0010000W"]}])
+    volumes = split(TEST_AIRSPACE['airspace'], [region])['notch']
+    gjson = geojson_volumes(volumes, clip=region.points())
+
+    assert gjson['features']
+    for feature in gjson['features']:
+        assert feature['geometry']['type'] == "MultiPolygon"
+        assert len(feature['geometry']['coordinates']) == 2
+
+def test_obstacles():
+    obstacles = generate(100, seed=26, nobstacle=500)['obstacle']
+    region = Region("test", box={'south': 51.5, 'north': 53,
+                                 'west': -2.5, 'east': -0.5})
+    result = region_obstacles(obstacles, region)
+    assert 0 < len(result) < len(obstacles)
+    for obstacle in result:
+        lat, lon = region.shape.projection.latlon(
+            *region.shape.xy(obstacle['position']))
+        assert 51.49 < lat < 53.01 and -2.52 < lon < -0.48
+
+def test_cli(tmp_path):
+    src = tmp_path / "airspace.json"
+    src.write_text(json.dumps(TEST_AIRSPACE))
+    regions = tmp_path / "regions.json"
+    regions.write_text(json.dumps({'regions': [
+        {'name': "north", 'box': {'south': 51.6, 'north': 52,
+                                  'west': -2, 'east': 0}},
+        {'name': "away", 'box': {'south': 50, 'north': 51,
+                                 'west': -2, 'east': 0}}]}))
+
+    root = os.path.join(os.path.dirname(__file__), "..", "..")
+    for fmt, ext in [("openair", "txt"), ("geojson", "geojson")]:
+        subprocess.run(
+            [sys.executable, os.path.join(root, "cli.py"), "split", str(src),
+             str(regions), str(tmp_path / "out"), "-f", fmt, "--clip"],
+            check=True, cwd=root)
+
+    assert (tmp_path / "out" / "north.txt").read_text().count("AN ") == 2
+    assert "AN " not in (tmp_path / "out" / "away.txt").read_text()
+    gjson = json.loads((tmp_path / "out" / "north.geojson").read_text())
+    assert len(gjson['features']) == 2
@@ -0,0 +1,98 @@
+import json
+import os
+import subprocess
+import sys
+
+from yaixm.geometry import haversine
+from yaixm.helpers import parse_latlon
+from yaixm.route import RouteQuery, great_circle_points, parse_waypoint
+
+from .synthetic import generate, latlon, offset
+from .yaixm_test import TEST_AIRSPACE
+
+def test_route_benson():
+    query = RouteQuery(TEST_AIRSPACE['airspace'])
+
+    start = offset(51.615, -1.096, 5, 270)
+    end = offset(51.615, -1.096, 5, 90)
+    crossings = query.query([start, end])
+    assert len(crossings) == 2
+    assert {c['name'] for c in crossings} == {"BENSON ATZ (NOTAM)", "FOOBAR"}
+    for c in crossings:
+        assert abs(c['entry'] - 3.0) < 0.05
+        assert abs(c['exit'] - 7.0) < 0.05
+
+    # Above the ATZ
+    assert query.query([start, end], altitudes=[3000, "FL50"]) == []
+
+def test_route_brute_force():
+    airspace = generate(500, seed=18)['airspace']
+    query = RouteQuery(airspace)
+
+    waypoints = [(51, -3), (53, -1), (52.5, 1)]
+    crossings = query.query(waypoints)
+
+    # Every volume crossed is found, compared with testing each shape
+    expected = set()
+    for n, shape in enumerate(query.index.shapes):
+        for leg in range(2):
+            points = great_circle_points(*waypoints[leg], *waypoints[leg + 1],
+                                         100)
+            if any(shape.intervals(*p0, *p1)
+                   for p0, p1 in zip(points, points[1:])):
+                expected.add(n)
+
+    found = {id(c['volume']) for c in crossings}
+    assert found == {id(query.index.volumes[n][0]) for n in expected}
+
+def test_route_great_circle():
+    # 200 nm east-west leg, the great circle is about 1.8 nm north of
+    # the straight line at the middle of the leg
+    start, end = (52, -3.5), (52, 1.9)
+    length = haversine(*start, *end)
+    centre = latlon(*great_circle_points(*start, *end, 2)[1])
+
+    airspace = [{
+        'name': "MIDDLE",
+        'type': "ATZ",
+        'geometry': [{
+            'boundary': [{'circle': {'centre': centre, 'radius': "1 nm"}}],
+            'lower': "SFC",
+            'upper': "2000 ft"
+        }]
+    }]
+    [crossing] = RouteQuery(airspace).query([start, end])
+
+    middle = haversine(*start, *parse_latlon(centre))
+    assert abs((crossing['entry'] + crossing['exit']) / 2 - middle) < 0.02
+    assert abs(crossing['exit'] - crossing['entry'] - 2) < 0.02
+    assert abs(middle - length / 2) < 0.05
+
+    # Entry and exit across sub-leg ends are joined
+    [crossing] = RouteQuery(TEST_AIRSPACE['airspace'][:1]).query(
+            [offset(51.615, -1.096, 30, 270), offset(51.615, -1.096, 30, 90)])
+    assert abs(crossing['entry'] - 28) < 0.05
+    assert abs(crossing['exit'] - 32) < 0.05
+
+def test_great_circle_points():
+    points = great_circle_points(52, -3.5, 52, 1.9, 4)
+    assert points[0] == (52, -3.5) and points[-1] == (52, 1.9)
+    steps = [haversine(*p0, *p1) for p0, p1 in zip(points, points[1:])]
+    assert max(steps) - min(steps) < 1e-6
+    assert points[2][0] > 52.02
+
+def test_parse_waypoint():
+    assert parse_waypoint("51.5,-1.25") == (51.5, -1.25)
+    lat, lon = parse_waypoint(latlon(51.5, -1.25))
+    assert abs(lat - 51.5) < 1e-3 and abs(lon + 1.25) < 1e-3
+
+def test_cli(tmp_path):
+    src = tmp_path / "airspace.json"
+    src.write_text(json.dumps(TEST_AIRSPACE))
+
+    root = os.path.join(os.path.dirname(__file__), "..", "..")
+    result = subprocess.run(
+        [sys.executable, os.path.join(root, "cli.py"), "route", str(src),
+         "51.615,-1.3", "51.615,-0.9", "--json"],
+        check=True, stdout=subprocess.PIPE, text=True, cwd=root)
+    assert len(json.loads(result.stdout)) == 2
@@ -0,0 +1,89 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from yaixm.compact import compact
+from yaixm.helpers import merge_loa
+from yaixm.serialise import dump, dumps, have_orjson
+
+from .synthetic import generate
+from .yaixm_test import TEST_AIRSPACE
+
+def test_default_identical():
+    data = generate(50, seed=10)
+
+    for kwargs in [{}, {'sort_keys': True, 'indent': 4}, {'indent': 2}]:
+        assert dumps(data, **kwargs).decode("ascii") == \
+               json.dumps(data, **kwargs)
+
+def test_compact_precision():
+    data = {'b': [1.23456789, {'c': 2.5}], 'a': "x"}
+
+    out = dumps(data, sort_keys=True, compact=True, precision=2,
+                backend="json")
+    assert out == b'{"a":"x","b":[1.23,{"c":2.5}]}'
+
+    if have_orjson():
+        assert dumps(data, sort_keys=True, compact=True, precision=2) == out
+        assert json.loads(dumps(compact(TEST_AIRSPACE), compact=True)) == \
+               TEST_AIRSPACE
+
+def test_orjson_options():
+    with pytest.raises(ValueError):
+        dumps({}, indent=4, backend="orjson")
+
+def test_dump_streams():
+    data = generate(20, seed=11)
+    expected = json.dumps(data, sort_keys=True, indent=4)
+
+    text = io.StringIO()
+    dump(data, text, sort_keys=True, indent=4)
+    assert text.getvalue() == expected
+
+    binary = io.BytesIO()
+    dump(data, binary, sort_keys=True, indent=4)
+    assert binary.getvalue().decode("ascii") == expected
+
+def test_cli_merge(tmp_path):
+    src = tmp_path / "airspace.json"
+    src.write_text(json.dumps(TEST_AIRSPACE))
+
+    root = os.path.join(os.path.dirname(__file__), "..", "..")
+    result = subprocess.run(
+        [sys.executable, os.path.join(root, "cli.py"), "merge", str(src)],
+        check=True, stdout=subprocess.PIPE, text=True, cwd=root)
+    merged = merge_loa(TEST_AIRSPACE['airspace'], TEST_AIRSPACE['loa'])
+    assert result.stdout == json.dumps({'airspace': merged}, sort_keys=True,
+                                       indent=4)
+
+def run_json_cli(tmp_path, *args, code=""):
+    src = tmp_path / "airspace.json"
+    src.write_text(json.dumps(TEST_AIRSPACE))
+
+    root = os.path.join(os.path.dirname(__file__), "..", "..")
+    argv = ["yaixm_json", str(src), str(tmp_path / "out.json")] + list(args)
+    return subprocess.run(
+        [sys.executable, "-c",
+         code + "import sys; sys.argv = %r; import yaixm.cli; "
+                "yaixm.cli.to_json()" % argv],
+        stderr=subprocess.PIPE, text=True, cwd=root)
+
+def test_cli_orjson_not_compact(tmp_path):
+    result = run_json_cli(tmp_path, "--json-backend", "orjson")
+    assert result.returncode == 2
+    assert "requires --compact" in result.stderr
+
+    result = run_json_cli(tmp_path, "--json-backend", "orjson", "--compact")
+    if have_orjson():
+        assert result.returncode == 0
+
+def test_cli_orjson_missing(tmp_path):
+    # Hide orjson, if installed
+    result = run_json_cli(tmp_path, "--json-backend", "orjson", "--compact",
+                          code="import sys; sys.modules['orjson'] = None; ")
+    assert result.returncode == 2
+    assert "requires the orjson package" in result.stderr
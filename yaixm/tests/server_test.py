@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from yaixm.server import make_server, parse_params, Model, ResultCache
+
+from .yaixm_test import TEST_AIRSPACE
+
+@pytest.fixture
+def airspace_file(tmp_path):
+    path = tmp_path / "airspace.json"
+    path.write_text(json.dumps(TEST_AIRSPACE))
+    return str(path)
+
+@pytest.fixture
+def server(airspace_file):
+    httpd = make_server(airspace_file, port=0, cache_size=2)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+
+    httpd.shutdown()
+    httpd.server_close()
+
+def get(httpd, path, headers={}):
+    url = "http://127.0.0.1:%d%s" % (httpd.server_port, path)
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, resp.headers, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, b""
+
+def test_parse_params():
+    params = parse_params("noatz=0&loa=B,A&max_level=6600")
+    assert params == {'noatz': False, 'loa': ("A", "B"), 'max_level': 6600}
+
+    with pytest.raises(ValueError):
+        parse_params("foo=bar")
+
+def test_cache_eviction():
+    cache = ResultCache(2)
+    cache.put("a", b"a")
+    cache.put("b", b"b")
+    cache.get("a")
+    cache.put("c", b"c")
+
+    assert cache.get("a") and cache.get("c")
+    assert cache.get("b") is None
+
+def test_server_openair(server):
+    status, headers, body = get(server, "/openair")
+    assert status == 200
+    assert b"AN BENSON ATZ (NOTAM)" in body
+
+    status, _, _ = get(server, "/openair",
+                       headers={'If-None-Match': headers['ETag']})
+    assert status == 304
+
+def test_server_bad_request(server):
+    assert get(server, "/foo")[0] == 404
+    assert get(server, "/openair?loa=NOSUCHLOA")[0] == 400
+
+def test_server_error(server):
+    def convert(fmt, params):
+        raise KeyError("bug")
+
+    server.service.model.convert = convert
+    assert get(server, "/openair")[0] == 500
+
+def test_model_stamp(airspace_file):
+    # Stamp is taken from the file as read
+    model = Model(airspace_file)
+    stat = os.stat(airspace_file)
+    assert model.stamp == (stat.st_mtime_ns, stat.st_size)
+    assert not model.changed()
+
+def test_server_reload(server, airspace_file):
+    _, headers, body = get(server, "/tnp?loa=LOA%20FOO")
+    assert b"TEST BOX" in body
+
+    data = dict(TEST_AIRSPACE)
+    data['airspace'] = TEST_AIRSPACE['airspace'][:1]
+    with open(airspace_file, "w") as f:
+        json.dump(data, f)
+    os.utime(airspace_file, ns=(time.time_ns(), time.time_ns() + 10**9))
+
+    _, headers2, body = get(server, "/tnp")
+    assert b"FOOBAR" not in body
+    assert headers['ETag'] != headers2['ETag']
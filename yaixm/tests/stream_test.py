@@ -0,0 +1,107 @@
+from copy import deepcopy
+import io
+import json
+
+import yaml
+
+import yaixm
+from yaixm.stream import iter_load, iter_check, iter_blocks, _JsonReader
+
+from .synthetic import generate
+from .yaixm_test import TEST_AIRSPACE
+
+def collect(items):
+    data = {}
+    for section, item in items:
+        if section == "release":
+            data[section] = item
+        else:
+            data.setdefault(section, []).append(item)
+    return data
+
+def test_iter_load_yaml():
+    data = generate(100, seed=7)
+    text = yaml.dump(data)
+
+    assert collect(iter_load(text)) == yaixm.load(text)
+    assert collect(iter_load(io.StringIO(text))) == data
+
+def test_iter_load_json():
+    data = generate(100, seed=8)
+    text = json.dumps(data, indent=2)
+
+    assert collect(iter_load(text, json=True)) == data
+
+    # Values split across small chunks
+    stream = io.BytesIO(text.encode("utf-8"))
+    items = list(iter_load(stream, json=True))
+    assert collect(items) == data
+
+def test_json_reader_chunks():
+    text = json.dumps({'release': {'commit': "é" * 10},
+                       'obstacle': [123456, 7.5], 'empty': []})
+    reader = _JsonReader(io.BytesIO(text.encode("utf-8")), chunk_size=3)
+    reader.expect("{")
+    assert reader.value() == "release"
+    reader.expect(":")
+    assert reader.value() == {'commit': "é" * 10}
+
+    items = list(iter_load(io.StringIO(text), json=True))
+    assert items[1:] == [("obstacle", 123456), ("obstacle", 7.5)]
+
+def test_json_reader_numbers():
+    text = '{"obstacle":[123.25, 1e5, -7]}'
+    for chunk_size in range(1, len(text) + 1):
+        reader = _JsonReader(io.StringIO(text), chunk_size=chunk_size)
+        reader.expect("{")
+        assert reader.value() == "obstacle"
+        reader.expect(":")
+        reader.expect("[")
+        assert reader.value() == 123.25
+        reader.expect(",")
+        assert reader.value() == 1e5
+        reader.expect(",")
+        assert reader.value() == -7
+        reader.expect("]")
+
+def test_iter_check():
+    errors = []
+    items = list(iter_check(iter_load(yaml.dump(TEST_AIRSPACE)), errors))
+    assert errors == []
+    assert collect(items) == collect(iter_load(yaml.dump(TEST_AIRSPACE)))
+
+    data = deepcopy(TEST_AIRSPACE)
+    data['airspace'][0]['type'] = "NOT REALLY A TYPE"
+    del data['release']['timestamp']
+    list(iter_check(iter_load(yaml.dump(data)), errors))
+    assert len(errors) == 2
+    assert errors[0].startswith("airspace[0] BENSON:")
+    assert errors[1].startswith("release:")
+
+def test_iter_check_sections():
+    for data in [{}, {'airspace': TEST_AIRSPACE['airspace'],
+                      'loa': TEST_AIRSPACE['loa']}]:
+        assert yaixm.validate(data) is not None
+
+        errors = []
+        list(iter_check(iter_load(yaml.dump(data)), errors))
+        assert len(errors) == 1
+
+    # Single section file
+    errors = []
+    data = {'obstacle': generate(10, seed=10, nobstacle=5)['obstacle']}
+    list(iter_check(iter_load(yaml.dump(data)), errors))
+    assert errors == []
+
+def test_iter_blocks():
+    data = generate(100, seed=9)
+    text = json.dumps(data)
+
+    converter = yaixm.Openair()
+    output = []
+    for block in iter_blocks(converter, iter_load(text, json=True),
+                             obstacles=True):
+        output.extend(block)
+
+    assert "\n".join(output) == converter.convert(data['airspace'],
+                                                  data['obstacle'])
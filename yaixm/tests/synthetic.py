@@ -0,0 +1,228 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Seeded generator of schema valid, synthetic YAIXM data for tests and
+# benchmarks
+
+import math
+import random
+
+from yaixm.convert import OBSTACLE_TYPES
+from yaixm.helpers import dms
+
+# Area covered, approximately the UK
+LAT_RANGE = (50.0, 58.5)
+LON_RANGE = (-6.0, 1.5)
+
+FEATURE_TYPES = ["ATZ", "AWY", "CTA", "CTR", "D", "D_OTHER", "OTHER", "P",
+                 "R", "TMA"]
+LOCAL_TYPES = {
+    'D_OTHER': ["DZ", "GLIDER", "GVS", "HIRTA", "LASER"],
+    'OTHER': ["GLIDER", "ILS", "MATZ", "NOATZ", "RMZ", "TMZ", "UL"]
+}
+CLASSES = ["A", "C", "D", "E", "G"]
+RULES = ["INTENSE", "NOSSR", "NOTAM", "RAZ", "SI", "TMZ", "RMZ"]
+OBSTACLE_TYPE_LIST = sorted(OBSTACLE_TYPES)
+
+# Format floating point lat/lon as YAIXM string
+def latlon(lat, lon):
+    return "{0[d]:02d}{0[m]:02d}{0[s]:02d}{0[ns]} "\
+           "{1[d]:03d}{1[m]:02d}{1[s]:02d}{1[ew]}".format(dms(lat), dms(lon))
+
+# Point at given distance (nm) and bearing (degrees) from centre
+def offset(clat, clon, radius, bearing):
+    b = math.radians(bearing)
+    lat = clat + radius / 60 * math.cos(b)
+    lon = clon + radius / 60 * math.sin(b) / math.cos(math.radians(clat))
+    return lat, lon
+
+class Generator():
+    def __init__(self, seed=0):
+        self.rand = random.Random(seed)
+        self.count = 0
+
+    def uid(self, prefix):
+        self.count += 1
+        return "%s%d" % (prefix, self.count)
+
+    def name(self):
+        return "%s%d" % (self.rand.choice(["ALPHA", "BRAVO", "DELTA", "ECHO",
+                                           "KILO", "LIMA", "ROMEO"]),
+                         self.count)
+
+    def centre(self):
+        return (self.rand.uniform(*LAT_RANGE), self.rand.uniform(*LON_RANGE))
+
+    # Lower and upper levels, lower < upper
+    def levels(self):
+        r = self.rand.random()
+        if r < 0.4:
+            lower, lower_ft = "SFC", 0
+        elif r < 0.8:
+            lower_ft = self.rand.randrange(500, 6000, 500)
+            lower = "%d ft" % lower_ft
+        else:
+            lower_ft = self.rand.randrange(65, 245, 10) * 100
+            lower = "FL%d" % (lower_ft // 100)
+
+        upper_ft = lower_ft + self.rand.randrange(1000, 10000, 500)
+        if upper_ft >= 6000 and self.rand.random() < 0.5:
+            upper = "FL%d" % (upper_ft // 100)
+        else:
+            upper = "%d ft" % upper_ft
+
+        return lower, upper
+
+    # Circle, polygon, or polygon with arcs
+    def boundary(self, clat, clon):
+        radius = self.rand.choice([2, 2.5, 5, 8, 10, 15])
+        r = self.rand.random()
+        if r < 0.3:
+            return [{'circle': {'centre': latlon(clat, clon),
+                                'radius': "%s nm" % radius}}]
+
+        npoints = self.rand.randint(3, 8)
+        bearings = sorted(self.rand.uniform(0, 360) for n in range(npoints))
+        points = [latlon(*offset(clat, clon, radius, b)) for b in bearings]
+
+        if r < 0.6:
+            return [{'line': points}]
+
+        # Replace last point with an arc back to the first
+        return [{'line': points[:-1]},
+                {'arc': {'centre': latlon(clat, clon),
+                         'dir': "cw",
+                         'radius': "%s nm" % radius,
+                         'to': points[0]}}]
+
+    def volume(self, clat, clon, vid=None):
+        lower, upper = self.levels()
+        volume = {
+            'lower': lower,
+            'upper': upper,
+            'boundary': self.boundary(clat, clon)
+        }
+        if vid:
+            volume['id'] = vid
+        if self.rand.random() < 0.2:
+            volume['class'] = self.rand.choice(CLASSES)
+        if self.rand.random() < 0.05:
+            volume['rules'] = [self.rand.choice(RULES)]
+
+        return volume
+
+    # Feature with given number of volumes, stacked on a common centre
+    def feature(self, nvol, as_type=None, localtype=None, ids=None):
+        as_type = as_type or self.rand.choice(FEATURE_TYPES)
+        feature = {
+            'name': self.name(),
+            'type': as_type,
+            'geometry': []
+        }
+
+        if localtype or as_type in LOCAL_TYPES:
+            feature['localtype'] = localtype or \
+                                   self.rand.choice(LOCAL_TYPES[as_type])
+        if self.rand.random() < 0.3:
+            feature['class'] = self.rand.choice(CLASSES)
+        if self.rand.random() < 0.1:
+            feature['rules'] = [self.rand.choice(RULES)]
+        if self.rand.random() < 0.2:
+            feature['id'] = self.uid("feature")
+
+        clat, clon = self.centre()
+        for n in range(nvol):
+            vid = self.uid("vol") if (ids or self.rand.random() < 0.2) \
+                  else None
+            volume = self.volume(clat, clon, vid)
+            if nvol > 1:
+                volume['seqno'] = n + 1
+            feature['geometry'].append(volume)
+
+        return feature
+
+    def airspace(self, nvol):
+        airspace = []
+        while nvol > 0:
+            n = min(nvol, self.rand.choice([1, 1, 1, 2, 3, 4]))
+            airspace.append(self.feature(n))
+            nvol -= n
+
+        return airspace
+
+    # LoA adding new features and replacing volumes with given ids
+    def loa(self, vids):
+        areas = []
+        for n in range(self.rand.randint(1, 3)):
+            area = {
+                'name': self.name(),
+                'add': [self.feature(1, "D_OTHER", "GLIDER")]
+            }
+            if vids:
+                area['replace'] = [{
+                    'id': self.rand.choice(vids),
+                    'geometry': [self.volume(*self.centre())
+                                 for m in range(self.rand.randint(0, 2))]}]
+            areas.append(area)
+
+        return {'name': "LOA " + self.name(), 'areas': areas}
+
+    def obstacle(self):
+        return {
+            'id': self.uid("UK").upper(),
+            'elevation': "%d ft" % self.rand.randint(300, 1500),
+            'position': latlon(*self.centre()),
+            'type': self.rand.choice(OBSTACLE_TYPE_LIST)
+        }
+
+    def service(self, ids):
+        return {
+            'callsign': "%s RADAR" % self.name().rstrip("0123456789"),
+            'frequency': round(self.rand.uniform(118, 136), 3),
+            'controls': self.rand.sample(ids, min(len(ids), 3))
+        }
+
+# Generate YAIXM data with (approximately) nvol airspace volumes
+def generate(nvol, seed=0, nloa=None, nrat=None, nobstacle=None,
+             nservice=None):
+    gen = Generator(seed)
+
+    airspace = gen.airspace(nvol)
+    nloa = max(1, nvol // 100) if nloa is None else nloa
+    nrat = max(1, nvol // 200) if nrat is None else nrat
+    nobstacle = max(1, nvol // 2) if nobstacle is None else nobstacle
+    nservice = max(1, nvol // 50) if nservice is None else nservice
+
+    vids = [v['id'] for f in airspace for v in f['geometry'] if 'id' in v]
+    ids = vids + [f['id'] for f in airspace if 'id' in f]
+
+    yaixm = {
+        'release': {
+            'airac_date': "2017-05-12T00:00:00Z",
+            'timestamp': "2017-05-11T07:55:53+00:00",
+            'schema_version': 1,
+            'commit': "unknown"
+        },
+        'airspace': airspace,
+        'loa': [gen.loa(vids) for n in range(nloa)],
+        'rat': [gen.feature(1, "OTHER", "RAT") for n in range(nrat)],
+        'obstacle': [gen.obstacle() for n in range(nobstacle)]
+    }
+    if ids and nservice:
+        yaixm['service'] = [gen.service(ids) for n in range(nservice)]
+
+    return yaixm
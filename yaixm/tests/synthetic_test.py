@@ -0,0 +1,24 @@
+import yaixm
+
+from .synthetic import generate
+
+def test_synthetic_valid():
+    data = generate(200, seed=1)
+    assert yaixm.validate(data) is None
+
+    nvol = sum(len(f['geometry']) for f in data['airspace'])
+    assert nvol == 200
+
+    segtypes = {list(s)[0] for f in data['airspace'] for v in f['geometry']
+                for s in v['boundary']}
+    assert segtypes == {'line', 'arc', 'circle'}
+
+def test_synthetic_seed():
+    assert generate(50, seed=2) == generate(50, seed=2)
+    assert generate(50, seed=2) != generate(50, seed=3)
+
+def test_synthetic_convert():
+    data = generate(100)
+    airspace = yaixm.merge_loa(data['airspace'], data['loa'])
+    oa = yaixm.Openair().convert(airspace, data['obstacle'])
+    assert oa.count("AN ") >= 100
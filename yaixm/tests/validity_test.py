@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+
+from yaixm.geometry import Shape
+from yaixm.validity import check_boundary, check_geometry, self_intersections
+
+from .synthetic import generate, latlon, offset
+from .yaixm_test import TEST_AIRSPACE
+
+def test_ring():
+    assert check_boundary([{'line': [latlon(52, -1), latlon(52.1, -1),
+                                     latlon(52, -1)]}])[0][:2] == ("ring", 2)
+    assert check_boundary([{'line': [latlon(52, -1), latlon(52.1, -1),
+                                     latlon(52.1, -0.9)]}]) == []
+
+def test_arc_radius():
+    c = (52, -1)
+    points = [latlon(*offset(*c, 5, b)) for b in [45, 135, 225]]
+    arc = {'centre': latlon(*c), 'dir': "cw", 'radius': "5 nm",
+           'to': points[0]}
+    assert check_boundary([{'line': points}, {'arc': arc}]) == []
+
+    issues = check_boundary([{'line': points},
+                             {'arc': dict(arc, radius="5.2 nm")}])
+    assert [i[0] for i in issues] == ["arc_radius", "arc_radius"]
+    assert 0.15 < issues[0][1] < 0.25
+    assert issues[0][2] == 0.05
+
+def test_self_intersection():
+    # Bow tie
+    bowtie = [{'line': [latlon(52, -1), latlon(52.1, -0.9),
+                        latlon(52.1, -1), latlon(52, -0.9)]}]
+    issues = check_boundary(bowtie)
+    assert len(issues) == 1 and issues[0][0] == "self_intersection"
+
+    # Line out across an arc and back to its start
+    c = (52, -1)
+    points = [latlon(*offset(*c, 5, b)) for b in [315, 45, 135, 225]]
+    points.insert(3, latlon(*offset(*c, 7, 260)))
+    shape = Shape([{'line': points},
+                   {'arc': {'centre': latlon(*c), 'dir': "cw",
+                            'radius': "5 nm", 'to': points[0]}}])
+    assert len(self_intersections(shape)) == 1
+
+def test_synthetic():
+    airspace = generate(300, seed=24)['airspace']
+    assert check_geometry(airspace, jobs=1) == []
+    assert check_geometry(TEST_AIRSPACE['airspace']) == []
+
+    volume = airspace[0]['geometry'][0]
+    volume['boundary'] = [{'line': [latlon(52, -1)] * 3}]
+    issues = check_geometry(airspace, jobs=2, chunk_size=10)
+    assert len(issues) == 1
+    assert issues[0]['check'] == "ring"
+    assert issues[0]['volume'] == volume.get('id', issues[0]['name'])
+
+def test_cli(tmp_path):
+    src = tmp_path / "airspace.yaml"
+    src.write_text("""
+airspace:
+- name: BOWTIE
+  type: D
+  geometry:
+  - lower: SFC
+    upper: 2000 ft
+    boundary:
+    - line:
+      - 520000N 0010000W
+      - 520600N 0005400W
+      - 520600N 0010000W
+      - 520000N 0005400W
+""")
+
+    root = os.path.join(os.path.dirname(__file__), "..", "..")
+    result = subprocess.run(
+        [sys.executable, os.path.join(root, "cli.py"), "check", str(src),
+         "--geometry"], stderr=subprocess.PIPE, text=True, cwd=root)
+    assert result.returncode == 1
+    assert "self_intersection" in result.stderr
@@ -0,0 +1,55 @@
+from copy import deepcopy
+import json
+
+import yaixm
+from yaixm.watch import IncrementalBuild, watch
+
+from .yaixm_test import TEST_AIRSPACE
+
+def test_incremental_convert():
+    build = IncrementalBuild(yaixm.Openair())
+
+    errors, output = build.update(TEST_AIRSPACE)
+    assert errors == []
+    assert output == yaixm.Openair().convert(TEST_AIRSPACE['airspace'])
+
+    data = deepcopy(TEST_AIRSPACE)
+    data['airspace'][1]['name'] = "BARFOO"
+    errors, output = build.update(data)
+    assert output == yaixm.Openair().convert(data['airspace'])
+
+    # Only the modified feature is re-validated and re-converted
+    assert build.counts['changed'] == 2
+
+def test_incremental_check():
+    build = IncrementalBuild()
+
+    data = deepcopy(TEST_AIRSPACE)
+    data['airspace'][0]['type'] = "NOT REALLY A TYPE"
+    errors, output = build.update(data)
+    assert len(errors) == 1
+    assert errors[0].startswith("airspace[0] BENSON:")
+    assert output is None
+
+    del data['release']
+    errors, output = build.update(data)
+    assert len(errors) == 2
+
+def test_watch(tmp_path):
+    airspace = tmp_path / "airspace.json"
+    airspace.write_text(json.dumps({'airspace': TEST_AIRSPACE['airspace']}))
+    obstacle = tmp_path / "obstacle.json"
+    obstacle.write_text("{not valid")
+
+    results = []
+    def rebuild(data, error):
+        results.append((data, error))
+
+    watch([str(airspace), str(obstacle)], rebuild, once=True)
+    assert results[0][1] is not None
+
+    obstacle.write_text(json.dumps({'obstacle': TEST_AIRSPACE['obstacle']}))
+    watch([str(airspace), str(obstacle)], rebuild, once=True)
+    data, error = results[1]
+    assert error is None
+    assert set(data) == {'airspace', 'obstacle'}
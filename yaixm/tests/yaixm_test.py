@@ -1,5 +1,7 @@
 from copy import deepcopy
 import json
+import subprocess
+import sys
 import tempfile
 
 import yaml
@@ -231,6 +233,21 @@ def test_merge_loa():
     names = [feature['name'] for feature in airspace]
     assert "TEST BOX" in names
 
+def test_merge_args():
+    import argparse
+    from yaixm.cli import add_merge_args, merged_airspace
+
+    parser = argparse.ArgumentParser()
+    add_merge_args(parser)
+
+    args = parser.parse_args([])
+    assert merged_airspace(TEST_AIRSPACE, args) is TEST_AIRSPACE['airspace']
+
+    args = parser.parse_args(["-m", " LOA FOO , LOA BAR"])
+    airspace = merged_airspace(TEST_AIRSPACE, args)
+    assert airspace == yaixm.merge_loa(TEST_AIRSPACE['airspace'],
+                                       TEST_AIRSPACE['loa'][:1])
+
 def test_merge_service():
     service = {'foobar': 123.4}
 
@@ -262,3 +279,12 @@ def test_openair_freq():
     oa = converter.convert(airspace)
 
     assert "AN FOOBAR 123.400" in oa
+
+def test_lazy_import():
+    code = "import sys, yaixm.cli; print(' '.join(sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True)
+    modules = result.stdout.split()
+
+    for heavy in ["yaml", "jsonschema", "pkg_resources"]:
+        assert heavy not in modules
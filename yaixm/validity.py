@@ -0,0 +1,187 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+# Volume boundary geometry checks:
+#
+#   ring              - boundary of lines only with fewer than three
+#                       distinct points
+#   arc_radius        - arc start or end point not at the stated radius
+#                       from the centre
+#   self_intersection - boundary edges crossing each other
+#
+# Edges are checked for crossings with a sweep over their projected
+# bounding boxes, and volumes are checked in a process pool.
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .convert import seq_name
+from .geometry import Arc, Shape, haversine, intersections, radius_nm
+from .helpers import parse_latlon
+from .qa import volume_id
+
+# Distance (nm) within which points are the same
+TOLERANCE = 0.001
+
+# Allowed difference (nm) between arc end point distance and radius
+ARC_TOLERANCE = 0.05
+
+# Volumes sent to each pool task
+CHUNK_SIZE = 100
+
+def _edge_bbox(edge):
+    if isinstance(edge, Arc):
+        (x, y), r = edge.centre, edge.radius
+        return (x - r, y - r, x + r, y + r)
+    else:
+        (x0, y0), (x1, y1) = edge.p0, edge.p1
+        return (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+
+def _near(p, q, tolerance):
+    return abs(p[0] - q[0]) <= tolerance and abs(p[1] - q[1]) <= tolerance
+
+# Self intersection points of boundary edges. Crossings of adjacent edges
+# within tolerance of their common point are ignored
+def self_intersections(shape, tolerance=ARC_TOLERANCE):
+    edges = shape.edges
+    n = len(edges)
+    boxes = [_edge_bbox(e) for e in edges]
+
+    points = []
+    active = []
+    for i in sorted(range(n), key=lambda k: boxes[k][0]):
+        xmin, ymin, xmax, ymax = boxes[i]
+        active = [j for j in active if boxes[j][2] >= xmin]
+        for j in active:
+            if boxes[j][1] > ymax or boxes[j][3] < ymin:
+                continue
+
+            a, b = min(i, j), max(i, j)
+            ends = []
+            if b == a + 1:
+                ends.append(edges[a].p1)
+            if a == 0 and b == n - 1:
+                ends.append(edges[b].p1)
+
+            for p in intersections(edges[a], edges[b]):
+                if not any(_near(p, e, tolerance) for e in ends):
+                    points.append(p)
+
+        active.append(i)
+
+    return points
+
+# Check volume boundary, returns list of (check, value, tolerance,
+# message) issues. Ring issue value is the number of points distinct by
+# more than the tolerance. Self intersections have no value, their
+# tolerance is the distance from a common point within which adjacent
+# edges may cross
+def check_boundary(boundary, tolerance=TOLERANCE, arc_tolerance=ARC_TOLERANCE):
+    issues = []
+
+    # Distinct points
+    points = []
+    for segment in boundary:
+        if 'line' in segment:
+            points.extend(parse_latlon(p) for p in segment['line'])
+
+    if all('line' in segment for segment in boundary):
+        distinct = []
+        for p in points:
+            if not any(haversine(*p, *q) <= tolerance for q in distinct):
+                distinct.append(p)
+                if len(distinct) == 3:
+                    break
+        if len(distinct) < 3:
+            issues.append(("ring", len(distinct), tolerance,
+                           "%d distinct points" % len(distinct)))
+            return issues
+
+    # Arc radius
+    last = None
+    for segment in boundary:
+        if 'line' in segment:
+            last = parse_latlon(segment['line'][-1])
+        elif 'arc' in segment:
+            arc = segment['arc']
+            centre = parse_latlon(arc['centre'])
+            radius = radius_nm(arc['radius'])
+            to = parse_latlon(arc['to'])
+            for name, p in [("start", last), ("to", to)]:
+                if p is None:
+                    continue
+                error = abs(haversine(*centre, *p) - radius)
+                if error > arc_tolerance:
+                    issues.append(("arc_radius", error, arc_tolerance,
+                                   "arc %s point %.3f nm from radius %s" %
+                                   (name, error, arc['radius'])))
+            last = to
+
+    # Self intersection
+    shape = Shape(boundary)
+    for x, y in self_intersections(shape, arc_tolerance):
+        lat, lon = shape.projection.latlon(x, y)
+        issues.append(("self_intersection", None, arc_tolerance,
+                       "edges cross at %.5f, %.5f" % (lat, lon)))
+
+    return issues
+
+# Worker process state, set by pool initializer (or directly if serial)
+_worker = {}
+
+def _init_worker(boundaries, tolerance, arc_tolerance):
+    _worker['boundaries'] = boundaries
+    _worker['tolerance'] = tolerance
+    _worker['arc_tolerance'] = arc_tolerance
+
+def _check_volumes(indices):
+    return [(n, check_boundary(_worker['boundaries'][n], _worker['tolerance'],
+                               _worker['arc_tolerance']))
+            for n in indices]
+
+# Check all volume boundaries. Returns list of issues, each a dict with
+# volume id and name, check, the value and tolerance it breached and a
+# message
+def check_geometry(airspace, jobs=None, tolerance=TOLERANCE,
+                   arc_tolerance=ARC_TOLERANCE, chunk_size=CHUNK_SIZE):
+    volumes = [(v, f) for f in airspace for v in f['geometry']]
+    boundaries = [v['boundary'] for v, f in volumes]
+    chunks = [range(n, min(n + chunk_size, len(volumes)))
+              for n in range(0, len(volumes), chunk_size)]
+
+    args = (boundaries, tolerance, arc_tolerance)
+    if jobs == 1 or len(chunks) < 2:
+        _init_worker(*args)
+        results = [_check_volumes(c) for c in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=args) as executor:
+            results = list(executor.map(_check_volumes, chunks))
+
+    issues = []
+    for result in results:
+        for n, volume_issues in result:
+            for check, value, tol, message in volume_issues:
+                issues.append({
+                    'volume': volume_id(*volumes[n]),
+                    'name': seq_name(*volumes[n]),
+                    'check': check,
+                    'value': value,
+                    'tolerance': tol,
+                    'message': message
+                })
+
+    return issues
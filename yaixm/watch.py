@@ -0,0 +1,175 @@
+# Copyright 2017 Alan Sparrow
+#
+# This file is part of YAIXM
+#
+# YAIXM is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# YAIXM is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with YAIXM.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import time
+
+from .helpers import load, section_validators, item_name
+
+# Key identifying item contents
+def fingerprint(item):
+    return json.dumps(item, sort_keys=True)
+
+# Incremental validation and conversion. Results for each feature (or LoA,
+# obstacle, etc.) are cached by content and only items that have changed
+# since the last update are re-validated and re-converted.
+class IncrementalBuild():
+    def __init__(self, converter=None, obstacles=False):
+        self.converter = converter
+        self.obstacles = obstacles
+
+        # Top level validator doesn't check list items
+        self.validator, self.item_validators = section_validators()
+
+        self.checked = {}
+        self.converted = {}
+        self.obstacle_key = None
+        self.obstacle_blocks = []
+        self.counts = {'changed': 0, 'reused': 0}
+
+    # Return list of validation error messages
+    def check(self, yaixm):
+        errors = []
+
+        # Top level structure
+        errors.extend(e.message for e in self.validator.iter_errors(yaixm))
+
+        checked = {}
+        for section, validator in self.item_validators.items():
+            items = yaixm.get(section)
+            if not isinstance(items, list):
+                continue
+
+            for n, item in enumerate(items):
+                key = (section, fingerprint(item))
+                if key in self.checked:
+                    messages = self.checked[key]
+                    self.counts['reused'] += 1
+                else:
+                    messages = [e.message for e in validator.iter_errors(item)]
+                    self.counts['changed'] += 1
+
+                checked[key] = messages
+                errors.extend("%s: %s" % (item_name(section, n, item), m)
+                              for m in messages)
+
+        # Drop results for items no longer present
+        self.checked = checked
+
+        # Unique, but in order
+        return list(dict.fromkeys(errors))
+
+    # Return converted airspace
+    def convert(self, yaixm):
+        converter = self.converter
+
+        output = list(converter.start())
+        converted = {}
+        for feature in yaixm.get('airspace', []):
+            key = fingerprint(feature)
+            if key in self.converted:
+                blocks = self.converted[key]
+                self.counts['reused'] += 1
+            else:
+                blocks = converter.do_feature(feature)
+                self.counts['changed'] += 1
+
+            converted[key] = blocks
+            for block in blocks:
+                output.extend(block)
+
+        # Drop results for features no longer present
+        self.converted = converted
+
+        # Obstacles are cached as a single list
+        if self.obstacles:
+            obstacles = yaixm.get('obstacle') or []
+            key = fingerprint(obstacles)
+            if key != self.obstacle_key:
+                self.obstacle_blocks = converter.do_obstacles(obstacles)
+                self.obstacle_key = key
+
+            for block in self.obstacle_blocks:
+                output.extend(block)
+
+        output.extend(converter.end())
+
+        return "\n".join(output)
+
+    # Check and, if there are no errors, convert. Returns errors and
+    # converted output (None if not converted)
+    def update(self, yaixm):
+        self.counts = {'changed': 0, 'reused': 0}
+
+        errors = self.check(yaixm)
+        if errors or self.converter is None:
+            return errors, None
+
+        return errors, self.convert(yaixm)
+
+# Source files, re-parsed only when modified. Files are combined into a
+# single YAIXM document (e.g. separate airspace, LoA and obstacle files)
+class SourceFiles():
+    def __init__(self, paths):
+        self.paths = paths
+        self.stamps = {}
+        self.data = {}
+
+    def stamp(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    # Re-load any modified files. Returns True if anything has changed
+    def update(self):
+        changed = False
+        for path in self.paths:
+            stamp = self.stamp(path)
+            if stamp != self.stamps.get(path):
+                # Update stamp first so a bad file is only reported once
+                self.stamps[path] = stamp
+                changed = True
+                with open(path) as f:
+                    self.data[path] = load(f)
+
+        return changed
+
+    def yaixm(self):
+        combined = {}
+        for path in self.paths:
+            combined.update(self.data.get(path) or {})
+        return combined
+
+# Poll source files and call rebuild(yaixm, error) with combined data
+# whenever any file is modified, or with error set if a file can't be loaded
+def watch(paths, rebuild, interval=0.5, once=False):
+    sources = SourceFiles(paths)
+    while True:
+        try:
+            if sources.update():
+                rebuild(sources.yaixm(), None)
+        except Exception as e:
+            # Keep watching, e.g. after a YAML syntax error mid-edit
+            rebuild(None, e)
+
+        if once:
+            break
+
+        time.sleep(interval)